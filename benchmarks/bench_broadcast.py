@@ -0,0 +1,99 @@
+"""
+Compare broadcast fan-out cost: encoding per recipient vs. encoding once.
+
+Run from the project root:
+
+    python -m benchmarks.bench_broadcast
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Dict, List
+
+from server.services.connection_manager import ConnectionManager
+
+
+class NullWebSocket:
+    """Websocket stand-in that accepts frames without doing any I/O."""
+
+    async def send_text(self, frame: str) -> None:
+        return None
+
+
+def sample_event() -> Dict[str, object]:
+    return {
+        "type": "event",
+        "data": {"text": "Bob the Brave tells everyone: 'Meet me in the Vault!'"},
+    }
+
+
+async def per_recipient(connections: ConnectionManager, rounds: int) -> float:
+    """The previous path: the message is encoded again for every recipient."""
+    message = sample_event()
+    player_ids = connections.get_all_connected_player_ids()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for player_id in player_ids:
+            await connections.send(player_id, message)
+        await connections.flush()
+    return time.perf_counter() - start
+
+
+async def encode_once(connections: ConnectionManager, rounds: int) -> float:
+    message = sample_event()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        await connections.send_to_all(message)
+        await connections.flush()
+    return time.perf_counter() - start
+
+
+def encode_only(count: int, rounds: int) -> float:
+    """Pure encoding cost of one broadcast, without any queueing."""
+    message = sample_event()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for _ in range(count):
+            json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+    return time.perf_counter() - start
+
+
+async def run(recipient_counts: List[int], rounds: int) -> None:
+    print(
+        f"{'recipients':>10} {'encode us':>10} {'per-recipient us':>17}"
+        f" {'encode-once us':>15} {'speedup':>8}"
+    )
+    for count in recipient_counts:
+        connections = ConnectionManager(max_queue=rounds + 1)
+        for idx in range(count):
+            connections.attach(f"player_{idx}", NullWebSocket())
+
+        encode = encode_only(count, rounds)
+        before = await per_recipient(connections, rounds)
+        after = await encode_once(connections, rounds)
+        print(
+            f"{count:>10} {encode / rounds * 1e6:>10.1f}"
+            f" {before / rounds * 1e6:>17.1f} {after / rounds * 1e6:>15.1f}"
+            f" {before / after:>7.2f}x"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument(
+        "--recipients",
+        type=int,
+        nargs="+",
+        default=[1, 10, 100, 1000],
+    )
+    args = parser.parse_args()
+    asyncio.run(run(args.recipients, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Compare outbound frame size and encode time: JSON text vs. the binary codec.
+
+Encodes the messages a player actually receives (room views from a
+generated world, events, inventory) with ``encode_message`` and with the
+``jungeon.msgpack`` codec.
+
+Run from the project root:
+
+    python -m benchmarks.bench_codec
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import shutil
+import time
+from typing import Callable, Dict, Union
+
+from benchmarks.bench_commands import CHARACTER_ID, make_world
+from benchmarks.bench_world_load import make_data_dir
+from server.services.codec import MSGPACK
+from server.services.connection_manager import encode_message
+
+
+async def sample_messages(room_count: int) -> Dict[str, Dict[str, object]]:
+    data_dir = make_data_dir(room_count)
+    try:
+        world = make_world(data_dir)
+        player = await world.allocate_player(CHARACTER_ID)
+        room = await world.describe_room_for_player(player.player_id)
+        inventory = await world.get_inventory(player.player_id)
+    finally:
+        shutil.rmtree(data_dir)
+    return {
+        "roomState": {"type": "roomState", "data": room},
+        "inventory": {"type": "inventory", "data": inventory},
+        "event": {
+            "type": "event",
+            "data": {"text": "You hear footsteps as someone moves."},
+        },
+    }
+
+
+def time_encode(
+    encode: Callable[[Dict[str, object]], Union[str, bytes]],
+    message: Dict[str, object],
+    iterations: int,
+) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        encode(message)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def run(room_count: int, iterations: int) -> None:
+    messages = asyncio.run(sample_messages(room_count))
+    print(f"iterations: {iterations}")
+    print(
+        f"{'message':>10} {'json B':>7} {'binary B':>9} "
+        f"{'json us':>8} {'binary us':>10}"
+    )
+    for name, message in messages.items():
+        json_bytes = len(encode_message(message).encode())
+        binary_bytes = len(MSGPACK.encode(message))
+        json_us = time_encode(encode_message, message, iterations)
+        binary_us = time_encode(MSGPACK.encode, message, iterations)
+        print(
+            f"{name:>10} {json_bytes:>7} {binary_bytes:>9} "
+            f"{json_us:>8.2f} {binary_us:>10.2f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rooms", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=20_000)
+    args = parser.parse_args()
+    run(args.rooms, args.iterations)
+
+
+if __name__ == "__main__":
+    main()
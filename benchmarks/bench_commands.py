@@ -0,0 +1,145 @@
+"""
+Count lock acquisitions per command: separate engine calls vs. one transaction.
+
+The router runs a command and its refreshes under a single room-lock
+acquisition. The "separate calls" column replays the handlers' old call
+sequence (the command itself, then a fresh room description and inventory
+for the refresh) through the current public engine methods. It is not the
+pre-change cost: those methods now share the transactional code paths, so
+the column is a lower bound on what the old engine took. Both paths replay
+the same seeded command script against identical worlds.
+
+Run from the project root:
+
+    python -m benchmarks.bench_commands
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Tuple
+
+from benchmarks.bench_world_load import make_data_dir
+from server.commands.base import CommandInput
+from server.commands.router import CommandRouter
+from server.services.connection_manager import ConnectionManager
+from server.world import WorldEngine, WorldLoader, WorldRepository
+
+CHARACTER_ID = "bob_the_brave"
+
+
+class CountingLock(asyncio.Lock):
+    def __init__(self) -> None:
+        super().__init__()
+        self.acquisitions = 0
+
+    async def acquire(self) -> bool:
+        self.acquisitions += 1
+        return await super().acquire()
+
+
+def make_world(data_dir: Path) -> WorldEngine:
+    save_dir = Path(tempfile.mkdtemp())
+    world = WorldEngine(
+        WorldLoader(data_dir, use_cache=False),
+        WorldRepository(save_dir / "savegame.json"),
+        rng=random.Random(1),
+    )
+    world.lock = CountingLock()
+    return world
+
+
+def script(world: WorldEngine, player_id: str, rng: random.Random) -> CommandInput:
+    """A command that will succeed from the player's current position."""
+    player = world.state.players[player_id]
+    room = world.state.config.rooms[player.room_id]
+    options = [CommandInput(action="look")]
+    if world.state.rooms_state[player.room_id].coins:
+        options.append(CommandInput(action="collect"))
+    if player.coins:
+        options.append(CommandInput(action="drop"))
+    open_exits = [d for d, exit_def in room.exits.items() if not exit_def.locked]
+    if open_exits:
+        options.append(CommandInput(action="go", args=[rng.choice(open_exits)]))
+    return rng.choice(options)
+
+
+async def separate_calls(
+    world: WorldEngine, player_id: str, command: CommandInput
+) -> None:
+    """The old handlers' call sequence, run against the current engine."""
+    if command.action == "go":
+        await world.move_player(player_id, command.args[0])
+        return
+    if command.action == "collect":
+        await world.collect_coins(player_id)
+    elif command.action == "drop":
+        await world.drop_coins(player_id)
+    await world.describe_room_for_player(player_id)
+    if command.action != "look":
+        await world.get_inventory(player_id)
+
+
+async def replay(
+    data_dir: Path,
+    commands: int,
+    run: Callable[[WorldEngine, str, CommandInput], Awaitable[None]],
+) -> Dict[str, Tuple[int, int]]:
+    """Return ``action -> (commands, lock acquisitions)``."""
+    world = make_world(data_dir)
+    player = await world.allocate_player(CHARACTER_ID)
+    rng = random.Random(7)
+    counts: Dict[str, Tuple[int, int]] = {}
+    for _ in range(commands):
+        command = script(world, player.player_id, rng)
+        before = world.lock.acquisitions + world.room_locks.acquisitions
+        await run(world, player.player_id, command)
+        taken = world.lock.acquisitions + world.room_locks.acquisitions - before
+        seen, locks = counts.get(command.action, (0, 0))
+        counts[command.action] = (seen + 1, locks + taken)
+    return counts
+
+
+async def run(room_count: int, commands: int) -> None:
+    data_dir = make_data_dir(room_count)
+    try:
+        routers: Dict[int, CommandRouter] = {}
+
+        async def dispatch(
+            world: WorldEngine, player_id: str, command: CommandInput
+        ) -> None:
+            router = routers.setdefault(
+                id(world), CommandRouter(world, ConnectionManager())
+            )
+            await router.dispatch(player_id, command)
+
+        separate = await replay(data_dir, commands, separate_calls)
+        batched = await replay(data_dir, commands, dispatch)
+    finally:
+        shutil.rmtree(data_dir)
+    print(f"rooms: {room_count}  commands: {commands}")
+    print(f"{'command':>8} {'count':>7} {'separate calls':>15} {'dispatch':>9}")
+    for action in sorted(separate):
+        seen, separate_locks = separate[action]
+        _, dispatch_locks = batched[action]
+        print(
+            f"{action:>8} {seen:>7} {separate_locks / seen:>15.2f} "
+            f"{dispatch_locks / seen:>9.2f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rooms", type=int, default=1_000)
+    parser.add_argument("--commands", type=int, default=20_000)
+    args = parser.parse_args()
+    asyncio.run(run(args.rooms, args.commands))
+
+
+if __name__ == "__main__":
+    main()
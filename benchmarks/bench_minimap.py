@@ -0,0 +1,116 @@
+"""
+Compare minimap cost: drawing the grid on every call vs. the cached renderer.
+
+Run from the project root:
+
+    python -m benchmarks.bench_minimap
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from server.models import RoomDefinition, RoomState
+from server.world import WorldEngine, WorldLoader, WorldRepository
+from server.world.minimap import MinimapRenderer
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+
+
+def draw_minimap(
+    room_def: RoomDefinition, rooms_state: Dict[str, RoomState], viewer_id: str
+) -> str:
+    """The previous renderer: a fresh grid drawn from scratch per call."""
+    width = 15
+    height = 15
+    grid: List[List[str]] = [[" " for _ in range(width)] for _ in range(height)]
+    center_x = width // 2
+    center_y = height // 2
+    step = 4
+
+    def draw_room_block(cx: int, cy: int, ch: str) -> None:
+        for dy in (-1, 0):
+            for dx in (-1, 0):
+                x = cx + dx
+                y = cy + dy
+                if 0 <= x < width and 0 <= y < height:
+                    grid[y][x] = ch
+
+    draw_room_block(center_x, center_y, "*")
+    offsets = {"north": (0, -1), "south": (0, 1), "west": (-1, 0), "east": (1, 0)}
+    for direction, exit_def in room_def.exits.items():
+        offset = offsets.get(direction)
+        if not offset:
+            continue
+        dx, dy = offset
+        neighbour_state = rooms_state.get(exit_def.target_room_id)
+        if neighbour_state:
+            has_other = any(pid != viewer_id for pid in neighbour_state.players)
+            draw_room_block(
+                center_x + dx * step, center_y + dy * step, "P" if has_other else "."
+            )
+        if dx == 0:
+            grid[center_y + dy * (step // 2)][center_x] = "|"
+        else:
+            grid[center_y][center_x + dx * (step // 2)] = "-"
+    return "\n".join("".join(row) for row in grid)
+
+
+def load_world() -> WorldEngine:
+    # Point the repository at an empty temp file and skip the world cache so
+    # nothing is written into the real data directory.
+    tmp = Path(tempfile.mkdtemp()) / "savegame.json"
+    return WorldEngine(WorldLoader(DATA_DIR, use_cache=False), WorldRepository(tmp))
+
+
+def run(calls: int, occupied: int) -> None:
+    world = load_world()
+    rooms = world.state.config.rooms
+    rooms_state = world.state.rooms_state
+    room_ids = list(rooms.keys())
+    rng = random.Random(42)
+    for idx, room_id in enumerate(rng.sample(room_ids, min(occupied, len(room_ids)))):
+        rooms_state[room_id].add_player(f"other_{idx}")
+    viewer = "viewer"
+    sample = [rooms[rng.choice(room_ids)] for _ in range(calls)]
+
+    start = time.perf_counter()
+    for room_def in sample:
+        draw_minimap(room_def, rooms_state, viewer)
+    before = time.perf_counter() - start
+
+    renderer = MinimapRenderer()
+    start = time.perf_counter()
+    for room_def in sample:
+        renderer.render(room_def, rooms_state, viewer)
+    after = time.perf_counter() - start
+
+    mismatches = sum(
+        draw_minimap(room_def, rooms_state, viewer)
+        != renderer.render(room_def, rooms_state, viewer)
+        for room_def in rooms.values()
+    )
+    print(f"rooms: {len(rooms)}  occupied: {occupied}  calls: {calls}")
+    print(f"{'renderer':>10} {'us/call':>10}")
+    print(f"{'redraw':>10} {before / calls * 1e6:>10.2f}")
+    print(f"{'cached':>10} {after / calls * 1e6:>10.2f}")
+    print(f"speedup: {before / after:.2f}x  cache hit rate: "
+          f"{renderer.hits / max(1, renderer.hits + renderer.misses):.1%}")
+    print(f"mismatched maps: {mismatches}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=100_000)
+    parser.add_argument("--occupied", type=int, default=50)
+    args = parser.parse_args()
+    run(args.calls, args.occupied)
+
+
+if __name__ == "__main__":
+    main()
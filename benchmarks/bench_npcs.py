@@ -0,0 +1,135 @@
+"""
+Compare ghost tick cost: the Python loop vs. the NumPy vectorized NPC engine.
+
+Run from the project root (the vectorized column needs NumPy):
+
+    python -m benchmarks.bench_npcs
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+from typing import Dict, List, Tuple
+
+from server.models import (
+    ExitTable,
+    GhostState,
+    PlayerState,
+    RoomDefinition,
+    RoomState,
+    WorldConfig,
+    WorldState,
+)
+from server.world import BaseWorldRepository, WorldEngine
+from server.world.npcs import NUMPY_AVAILABLE
+
+
+class GridLoader:
+    """Build a square grid world in memory with ghosts scattered over it."""
+
+    def __init__(self, side: int, ghosts: int) -> None:
+        self.side = side
+        self.ghosts = ghosts
+
+    def load(self) -> Tuple[WorldConfig, Dict[str, RoomState], Dict[str, GhostState]]:
+        rooms: Dict[str, RoomDefinition] = {}
+        rooms_state: Dict[str, RoomState] = {}
+        steps = {"north": (0, -1), "south": (0, 1), "west": (-1, 0), "east": (1, 0)}
+        exit_table = ExitTable(
+            f"room_{x}_{y}" for y in range(self.side) for x in range(self.side)
+        )
+        for y in range(self.side):
+            for x in range(self.side):
+                room_id = f"room_{x}_{y}"
+                exits = exit_table.add_room(
+                    (direction, f"room_{x + dx}_{y + dy}", False, None)
+                    for direction, (dx, dy) in steps.items()
+                    if 0 <= x + dx < self.side and 0 <= y + dy < self.side
+                )
+                rooms[room_id] = RoomDefinition(
+                    room_id, room_id, "", exits, 0, {}, [], {}
+                )
+                rooms_state[room_id] = RoomState(id=room_id, coins=0)
+        rng = random.Random(1)
+        room_ids = list(rooms)
+        ghosts = {
+            f"ghost_{idx}": GhostState(f"ghost_{idx}", rng.choice(room_ids), "a chill")
+            for idx in range(self.ghosts)
+        }
+        config = WorldConfig(rooms, {}, {}, {}, [], exit_table)
+        return config, rooms_state, ghosts
+
+
+class NullRepository(BaseWorldRepository):
+    """Keep persistence out of the measurement."""
+
+    def restore_state(self, state: WorldState) -> None:
+        return None
+
+    def write_save(self, payload: Dict[str, object]) -> None:
+        return None
+
+    def write_delta(self, payload: Dict[str, object]) -> None:
+        return None
+
+
+def make_world(side: int, ghosts: int, players: int, vectorized: bool) -> WorldEngine:
+    world = WorldEngine(
+        GridLoader(side, ghosts),
+        NullRepository(),
+        rng=random.Random(7),
+        vectorized_npcs=vectorized,
+    )
+    rng = random.Random(3)
+    room_ids = list(world.state.rooms_state)
+    for idx in range(players):
+        room_id = rng.choice(room_ids)
+        player_id = f"player_{idx}"
+        world.state.players[player_id] = PlayerState(
+            player_id, f"char_{idx}", f"Player {idx}", room_id
+        )
+        world.state.rooms_state[room_id].add_player(player_id)
+    return world
+
+
+async def time_ticks(world: WorldEngine, ticks: int) -> float:
+    start = time.perf_counter()
+    for _ in range(ticks):
+        await world.move_ghosts_and_collect_events()
+    return time.perf_counter() - start
+
+
+async def run(ghost_counts: List[int], side: int, players: int, ticks: int) -> None:
+    print(f"rooms: {side * side}  players: {players}  ticks: {ticks}")
+    print(f"{'ghosts':>8} {'python ms':>10} {'numpy ms':>10} {'speedup':>8}")
+    for count in ghost_counts:
+        python_time = await time_ticks(make_world(side, count, players, False), ticks)
+        line = f"{count:>8} {python_time / ticks * 1e3:>10.3f}"
+        if NUMPY_AVAILABLE:
+            numpy_time = await time_ticks(make_world(side, count, players, True), ticks)
+            line += (
+                f" {numpy_time / ticks * 1e3:>10.3f}"
+                f" {python_time / numpy_time:>7.2f}x"
+            )
+        else:
+            line += f" {'n/a':>10} {'n/a':>8}"
+        print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--side", type=int, default=100)
+    parser.add_argument("--players", type=int, default=200)
+    parser.add_argument("--ticks", type=int, default=20)
+    parser.add_argument(
+        "--ghosts", type=int, nargs="+", default=[100, 1000, 10_000, 100_000]
+    )
+    args = parser.parse_args()
+    asyncio.run(run(args.ghosts, args.side, args.players, args.ticks))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Compare roomState bytes per command: full room payloads vs. versioned deltas.
+
+Replays the seeded command script from ``bench_commands`` through the
+router and encodes every room view it produces twice: as the full
+``roomState`` message older clients receive, and through ``RoomStateDeltas``
+as a client that opted into ``roomDeltas=1`` receives it.
+
+Run from the project root:
+
+    python -m benchmarks.bench_room_deltas
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import shutil
+from typing import Dict, Iterable, Tuple
+
+from benchmarks.bench_commands import CHARACTER_ID, make_world, script
+from benchmarks.bench_world_load import make_data_dir
+from server.commands.base import CommandResult
+from server.commands.router import CommandRouter
+from server.schemas import ServerMessage
+from server.services.connection_manager import ConnectionManager, encode_message
+from server.services.room_deltas import RoomStateDeltas
+
+
+def room_views(result: CommandResult) -> Iterable[Dict[str, object]]:
+    """The roomState messages the websocket loop sends for ``result``."""
+    for reply in result.replies:
+        if reply.type == "roomState":
+            yield reply.model_dump()
+    if result.room is not None:
+        yield ServerMessage(type="roomState", data=result.room).model_dump()
+
+
+async def run(room_count: int, commands: int) -> None:
+    data_dir = make_data_dir(room_count)
+    try:
+        world = make_world(data_dir)
+        router = CommandRouter(world, ConnectionManager())
+        player = await world.allocate_player(CHARACTER_ID)
+        rng = random.Random(7)
+        deltas = RoomStateDeltas()
+        # action -> (commands, full bytes, delta bytes)
+        totals: Dict[str, Tuple[int, int, int]] = {}
+        for _ in range(commands):
+            command = script(world, player.player_id, rng)
+            try:
+                result = await router.dispatch(player.player_id, command)
+            except ValueError:
+                continue
+            full = delta = 0
+            for message in room_views(result):
+                full += len(encode_message(message).encode())
+                delta += len(encode_message(deltas.encode(message)).encode())
+            seen, full_total, delta_total = totals.get(command.action, (0, 0, 0))
+            totals[command.action] = (seen + 1, full_total + full, delta_total + delta)
+    finally:
+        shutil.rmtree(data_dir)
+    print(f"rooms: {room_count}  commands: {commands}")
+    print(f"{'command':>8} {'count':>7} {'full B/cmd':>11} {'delta B/cmd':>12}")
+    for action in sorted(totals):
+        seen, full_total, delta_total = totals[action]
+        print(
+            f"{action:>8} {seen:>7} {full_total / seen:>11.0f} "
+            f"{delta_total / seen:>12.0f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rooms", type=int, default=1_000)
+    parser.add_argument("--commands", type=int, default=20_000)
+    args = parser.parse_args()
+    asyncio.run(run(args.rooms, args.commands))
+
+
+if __name__ == "__main__":
+    main()
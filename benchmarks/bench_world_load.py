@@ -0,0 +1,63 @@
+"""
+Compare world startup: parsing the JSON sources vs. loading the compiled cache.
+
+Run from the project root:
+
+    python -m benchmarks.bench_world_load
+"""
+
+from __future__ import annotations
+
+import argparse
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+from server.generate_world import write_world
+from server.world import WorldLoader
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+
+
+def make_data_dir(room_count: int) -> Path:
+    data_dir = Path(tempfile.mkdtemp())
+    for name in ("characters.json", "verbs.json"):
+        shutil.copy(DATA_DIR / name, data_dir / name)
+    with open(data_dir / "world.json", "w", encoding="utf-8") as f:
+        write_world(f, room_count, seed=1)
+    return data_dir
+
+
+def run(room_counts: List[int]) -> None:
+    print(f"{'rooms':>9} {'json s':>8} {'cached s':>9} {'speedup':>8}")
+    for count in room_counts:
+        data_dir = make_data_dir(count)
+        try:
+            start = time.perf_counter()
+            WorldLoader(data_dir).load()
+            cold = time.perf_counter() - start
+
+            loader = WorldLoader(data_dir)
+            start = time.perf_counter()
+            loader.load()
+            warm = time.perf_counter() - start
+            if not loader.loaded_from_cache:
+                raise RuntimeError("second load did not use the cache")
+            print(f"{count:>9} {cold:>8.2f} {warm:>9.2f} {cold / warm:>7.2f}x")
+        finally:
+            shutil.rmtree(data_dir)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--rooms", type=int, nargs="+", default=[1_000, 10_000, 100_000]
+    )
+    args = parser.parse_args()
+    run(args.rooms)
+
+
+if __name__ == "__main__":
+    main()
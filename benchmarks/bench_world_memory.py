@@ -0,0 +1,147 @@
+"""
+Measure bytes per room of the loaded world: compact models vs. the old layout.
+
+The old layout (plain dataclasses, one ExitDefinition and one target-id
+string per exit, one appearance dict per room, two empty sets per room
+state) is rebuilt here from the same world.json for comparison. Sizes are
+deep sizes of the room definitions plus room states, counting every shared
+object once.
+
+Run from the project root:
+
+    python -m benchmarks.bench_world_memory
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import shutil
+import sys
+from array import array
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set
+
+from benchmarks.bench_world_load import make_data_dir
+from server.world import WorldLoader
+
+
+@dataclass
+class LegacyExit:
+    direction: str
+    target_room_id: str
+    locked: bool = False
+    key_id: Optional[str] = None
+
+
+@dataclass
+class LegacyRoom:
+    id: str
+    name: str
+    description: str
+    exits: Dict[str, LegacyExit]
+    coins_initial: int
+    coins_respawn: Dict[str, object]
+    objects: List[object]
+    appearance: Dict[str, str]
+
+
+@dataclass
+class LegacyRoomState:
+    id: str
+    coins: int
+    players: Set[str] = field(default_factory=set)
+    objects_state: Dict[str, str] = field(default_factory=dict)
+    items: List[str] = field(default_factory=list)
+    version: int = 0
+    ghosts: Set[str] = field(default_factory=set)
+
+
+def legacy_load(world_data: Dict[str, object]) -> List[object]:
+    rooms: Dict[str, LegacyRoom] = {}
+    rooms_state: Dict[str, LegacyRoomState] = {}
+    for r in world_data["rooms"]:
+        exits: Dict[str, LegacyExit] = {}
+        for direction, value in r.get("exits", {}).items():
+            if isinstance(value, str):
+                exits[direction] = LegacyExit(direction, value)
+            else:
+                exits[direction] = LegacyExit(
+                    direction,
+                    value.get("target", ""),
+                    bool(value.get("locked", False)),
+                    value.get("keyId"),
+                )
+        rooms[r["id"]] = LegacyRoom(
+            id=r["id"],
+            name=r["name"],
+            description=r["description"],
+            exits=exits,
+            coins_initial=r.get("coins", {}).get("initial", 0),
+            coins_respawn=r.get("coins", {}).get("respawn", {}),
+            objects=[],
+            appearance=r.get("appearance", {}),
+        )
+        rooms_state[r["id"]] = LegacyRoomState(
+            id=r["id"], coins=rooms[r["id"]].coins_initial, objects_state={}
+        )
+        rooms_state[r["id"]].items.extend(r.get("items", []))
+    return [rooms, rooms_state]
+
+
+def deep_size(root: object) -> int:
+    """Total ``sys.getsizeof`` of everything reachable from ``root``, once each."""
+    seen: Set[int] = set()
+    stack = [root]
+    total = 0
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or obj is None or isinstance(obj, (bool, type)):
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        if isinstance(obj, (str, bytes, bytearray, array, int, float)):
+            continue
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        else:
+            if hasattr(obj, "__dict__"):
+                stack.append(vars(obj))
+            for cls in type(obj).__mro__:
+                for name in getattr(cls, "__slots__", ()):
+                    if hasattr(obj, name):
+                        stack.append(getattr(obj, name))
+    return total
+
+
+def run(room_counts: List[int]) -> None:
+    print(f"{'rooms':>9} {'old B/room':>11} {'new B/room':>11} {'saved':>7}")
+    for count in room_counts:
+        data_dir = make_data_dir(count)
+        try:
+            with open(data_dir / "world.json", "r", encoding="utf-8") as f:
+                before = deep_size(legacy_load(json.load(f))) / count
+            config, rooms_state, _ = WorldLoader(data_dir, use_cache=False).load()
+            after = deep_size([config.rooms, rooms_state]) / count
+            print(
+                f"{count:>9} {before:>11.0f} {after:>11.0f} "
+                f"{1 - after / before:>6.0%}"
+            )
+        finally:
+            shutil.rmtree(data_dir)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--rooms", type=int, nargs="+", default=[1_000, 10_000, 100_000]
+    )
+    args = parser.parse_args()
+    run(args.rooms)
+
+
+if __name__ == "__main__":
+    main()
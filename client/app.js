@@ -2,15 +2,30 @@ import { UiController } from "./modules/ui.js";
 import {
   fetchAvailableCharacters,
   loginWithCharacter,
+  createStream,
   createWebSocket,
+  sendMessage,
 } from "./modules/network.js";
 
+// The server keeps a dropped session for 30s; retry within that window.
+const RECONNECT_DELAY_MS = 1000;
+const MAX_RECONNECT_ATTEMPTS = 25;
+// Close codes after which reconnecting cannot help.
+const FINAL_CLOSE_CODES = new Set([
+  4001, // another connection took over the session
+  4004, // the session is gone
+]);
+
 class GameClient {
   constructor(ui) {
     this.ui = ui;
     this.sessionId = null;
     this.ws = null;
+    this.stream = null;
+    this.reconnectAttempts = 0;
     this.currentCharacter = null;
+    this.selfPlayerId = null;
+    this.onlinePlayers = new Map();
   }
 
   async init() {
@@ -39,6 +54,7 @@ class GameClient {
       this.ui.setLoginError("");
       const data = await loginWithCharacter(character.id);
       this.sessionId = data.sessionId;
+      this.stream = createStream();
       this.currentCharacter = {
         id: data.characterId,
         name: data.playerName,
@@ -68,20 +84,39 @@ class GameClient {
       return;
     }
 
-    this.ws = createWebSocket(this.sessionId, {
+    this.ws = createWebSocket(this.sessionId, this.stream, {
       onOpen: () => {
-        this.ui.appendLog("Connection to the dungeon established.", "system");
-      },
-      onMessage: (msg) => this.handleServerMessage(msg),
-      onClose: () => {
         this.ui.appendLog(
-          "Your connection to the dungeon has been lost.",
-          "error"
+          this.reconnectAttempts
+            ? "Reconnected to the dungeon."
+            : "Connection to the dungeon established.",
+          "system"
         );
+        this.reconnectAttempts = 0;
       },
+      onMessage: (msg) => this.handleServerMessage(msg),
+      onClose: (event) => this.handleClose(event),
     });
   }
 
+  handleClose(event) {
+    if (
+      FINAL_CLOSE_CODES.has(event.code) ||
+      this.reconnectAttempts >= MAX_RECONNECT_ATTEMPTS
+    ) {
+      this.ui.appendLog(
+        "Your connection to the dungeon has been lost.",
+        "error"
+      );
+      return;
+    }
+    if (this.reconnectAttempts === 0) {
+      this.ui.appendLog("Connection lost, reconnecting...", "system");
+    }
+    this.reconnectAttempts += 1;
+    setTimeout(() => this.connectWebSocket(), RECONNECT_DELAY_MS);
+  }
+
   handleServerMessage(msg) {
     const { type, data } = msg;
     if (type === "roomState") {
@@ -93,10 +128,22 @@ class GameClient {
     } else if (type === "inventory") {
       this.ui.renderInventory(data);
     } else if (type === "onlinePlayers") {
-      if (data.players) {
-        // Server already excludes the current player
-        this.ui.renderOnlinePlayers(data.players);
-      }
+      // Full roster, sent once on attach; the server excludes us from it.
+      this.selfPlayerId = data.selfId || null;
+      this.onlinePlayers = new Map(
+        (data.players || []).map((p) => [p.playerId, p])
+      );
+      this.renderOnlinePlayers();
+    } else if (type === "playerJoined") {
+      (data.players || []).forEach((p) => {
+        if (p.playerId !== this.selfPlayerId) {
+          this.onlinePlayers.set(p.playerId, p);
+        }
+      });
+      this.renderOnlinePlayers();
+    } else if (type === "playerLeft") {
+      (data.playerIds || []).forEach((id) => this.onlinePlayers.delete(id));
+      this.renderOnlinePlayers();
     } else if (type === "error") {
       if (data.message) {
         this.ui.appendLog(data.message, "error");
@@ -104,11 +151,15 @@ class GameClient {
     }
   }
 
+  renderOnlinePlayers() {
+    this.ui.renderOnlinePlayers(Array.from(this.onlinePlayers.values()));
+  }
+
   sendCommand(text) {
     if (!text || !this.ws || this.ws.readyState !== WebSocket.OPEN) {
       return;
     }
-    this.ws.send(JSON.stringify({ type: "command", input: text }));
+    sendMessage(this.ws, { type: "command", input: text });
   }
 }
 
@@ -0,0 +1,180 @@
+// Minimal MessagePack codec matching server/services/codec.py: nil, bool,
+// int, float, str, array and map.
+
+// Index == wire tag; must stay in step with MESSAGE_TYPES on the server.
+export const MESSAGE_TYPES = [
+  "roomState",
+  "roomDelta",
+  "inventory",
+  "event",
+  "error",
+  "onlinePlayers",
+  "playerJoined",
+  "playerLeft",
+  "batchResult",
+  "command",
+  "batch",
+  "resync",
+];
+
+const textEncoder = new TextEncoder();
+const textDecoder = new TextDecoder();
+
+export function pack(value) {
+  const out = [];
+  packInto(out, value);
+  return new Uint8Array(out);
+}
+
+function pushUint(out, value, bytes) {
+  for (let shift = (bytes - 1) * 8; shift >= 0; shift -= 8) {
+    out.push(Math.floor(value / 2 ** shift) & 0xff);
+  }
+}
+
+function packHeader(out, size, fix, code16, code32) {
+  if (size < 16) {
+    out.push(fix | size);
+  } else if (size < 0x10000) {
+    out.push(code16);
+    pushUint(out, size, 2);
+  } else {
+    out.push(code32);
+    pushUint(out, size, 4);
+  }
+}
+
+function packInto(out, value) {
+  if (value === null || value === undefined) {
+    out.push(0xc0);
+  } else if (value === true || value === false) {
+    out.push(value ? 0xc3 : 0xc2);
+  } else if (typeof value === "number") {
+    if (Number.isInteger(value) && value >= 0 && value < 2 ** 32) {
+      if (value < 0x80) {
+        out.push(value);
+      } else if (value < 0x100) {
+        out.push(0xcc, value);
+      } else if (value < 0x10000) {
+        out.push(0xcd);
+        pushUint(out, value, 2);
+      } else {
+        out.push(0xce);
+        pushUint(out, value, 4);
+      }
+    } else if (Number.isInteger(value) && value >= -32 && value < 0) {
+      out.push(value & 0xff);
+    } else {
+      const view = new DataView(new ArrayBuffer(8));
+      view.setFloat64(0, value);
+      out.push(0xcb, ...new Uint8Array(view.buffer));
+    }
+  } else if (typeof value === "string") {
+    const data = textEncoder.encode(value);
+    if (data.length < 32) {
+      out.push(0xa0 | data.length);
+    } else if (data.length < 0x100) {
+      out.push(0xd9, data.length);
+    } else if (data.length < 0x10000) {
+      out.push(0xda);
+      pushUint(out, data.length, 2);
+    } else {
+      out.push(0xdb);
+      pushUint(out, data.length, 4);
+    }
+    out.push(...data);
+  } else if (Array.isArray(value)) {
+    packHeader(out, value.length, 0x90, 0xdc, 0xdd);
+    value.forEach((item) => packInto(out, item));
+  } else {
+    const entries = Object.entries(value);
+    packHeader(out, entries.length, 0x80, 0xde, 0xdf);
+    entries.forEach(([key, item]) => {
+      packInto(out, key);
+      packInto(out, item);
+    });
+  }
+}
+
+export function unpack(buffer) {
+  const bytes = new Uint8Array(buffer);
+  const view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+  let offset = 0;
+
+  const str = (size) => {
+    const value = textDecoder.decode(bytes.subarray(offset, offset + size));
+    offset += size;
+    return value;
+  };
+  const array = (size) => {
+    const items = [];
+    for (let i = 0; i < size; i += 1) {
+      items.push(read());
+    }
+    return items;
+  };
+  const map = (size) => {
+    const result = {};
+    for (let i = 0; i < size; i += 1) {
+      const key = read();
+      result[key] = read();
+    }
+    return result;
+  };
+  const fixed = (getter, size) => {
+    const value = view[getter](offset);
+    offset += size;
+    return value;
+  };
+  const u64 = (signed) =>
+    Number(fixed(signed ? "getBigInt64" : "getBigUint64", 8));
+
+  function read() {
+    const code = bytes[offset];
+    offset += 1;
+    if (code < 0x80) return code;
+    if (code >= 0xe0) return code - 0x100;
+    if (code >= 0xa0 && code < 0xc0) return str(code & 0x1f);
+    if (code >= 0x90 && code < 0xa0) return array(code & 0x0f);
+    if (code >= 0x80 && code < 0x90) return map(code & 0x0f);
+    switch (code) {
+      case 0xc0: return null;
+      case 0xc2: return false;
+      case 0xc3: return true;
+      case 0xca: return fixed("getFloat32", 4);
+      case 0xcb: return fixed("getFloat64", 8);
+      case 0xcc: return fixed("getUint8", 1);
+      case 0xcd: return fixed("getUint16", 2);
+      case 0xce: return fixed("getUint32", 4);
+      case 0xcf: return u64(false);
+      case 0xd0: return fixed("getInt8", 1);
+      case 0xd1: return fixed("getInt16", 2);
+      case 0xd2: return fixed("getInt32", 4);
+      case 0xd3: return u64(true);
+      case 0xd9: return str(fixed("getUint8", 1));
+      case 0xda: return str(fixed("getUint16", 2));
+      case 0xdb: return str(fixed("getUint32", 4));
+      case 0xdc: return array(fixed("getUint16", 2));
+      case 0xdd: return array(fixed("getUint32", 4));
+      case 0xde: return map(fixed("getUint16", 2));
+      case 0xdf: return map(fixed("getUint32", 4));
+      default:
+        throw new Error(`Unsupported MessagePack type ${code}`);
+    }
+  }
+
+  return read();
+}
+
+// Server frames are [tag, data] or, on resumable connections,
+// [tag, data, seq]; client frames are [tag, {...fields}].
+export function decodeServerFrame(buffer) {
+  const [tag, data, seq] = unpack(buffer);
+  const type = typeof tag === "number" ? MESSAGE_TYPES[tag] : tag;
+  return seq === undefined ? { type, data } : { type, data, seq };
+}
+
+export function encodeClientMessage({ type, ...fields }) {
+  const tag = MESSAGE_TYPES.indexOf(type);
+  return pack([tag === -1 ? type : tag, fields]);
+}
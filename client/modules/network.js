@@ -1,4 +1,8 @@
+import { decodeServerFrame, encodeClientMessage } from "./msgpack.js";
+
 const API_BASE = "/api";
+const MSGPACK_SUBPROTOCOL = "jungeon.msgpack";
+const JSON_SUBPROTOCOL = "jungeon.json";
 
 export async function fetchAvailableCharacters() {
   const res = await fetch(`${API_BASE}/characters/available`);
@@ -20,20 +24,48 @@ export async function loginWithCharacter(characterId) {
   return res.json();
 }
 
-export function createWebSocket(sessionId, { onOpen, onMessage, onClose }) {
+// What a session has received so far. Pass the same object to every
+// createWebSocket call of a session so a reconnect resumes after lastSeq
+// and keeps applying room deltas to the view it already has.
+export function createStream() {
+  return { lastSeq: null, room: null };
+}
+
+export function createWebSocket(
+  sessionId,
+  stream,
+  { onOpen, onMessage, onClose }
+) {
   const proto = window.location.protocol === "https:" ? "wss" : "ws";
+  const resume =
+    stream.lastSeq === null ? "" : `&lastSeq=${stream.lastSeq}`;
   const url = `${proto}://${window.location.host}/ws?sessionId=${encodeURIComponent(
     sessionId
-  )}`;
-  const ws = new WebSocket(url);
+  )}&roomDeltas=1&resume=1${resume}`;
+  // Binary frames by default; open the page with ?codec=json to debug.
+  const useJson =
+    new URLSearchParams(window.location.search).get("codec") === "json";
+  const ws = new WebSocket(url, [
+    useJson ? JSON_SUBPROTOCOL : MSGPACK_SUBPROTOCOL,
+  ]);
+  ws.binaryType = "arraybuffer";
+  const decodeRoom = createRoomStateDecoder(ws, stream);
   if (onOpen) {
     ws.addEventListener("open", onOpen);
   }
   if (onMessage) {
     ws.addEventListener("message", (event) => {
       try {
-        const msg = JSON.parse(event.data);
-        onMessage(msg);
+        const msg =
+          event.data instanceof ArrayBuffer
+            ? decodeServerFrame(event.data)
+            : JSON.parse(event.data);
+        if (typeof msg.seq === "number") {
+          stream.lastSeq = msg.seq;
+        }
+        const messages =
+          msg.type === "batchResult" ? unpackBatchResult(msg.data) : [msg];
+        messages.map(decodeRoom).filter(Boolean).forEach(onMessage);
       } catch {
         // ignore malformed payloads
       }
@@ -44,3 +76,56 @@ export function createWebSocket(sessionId, { onOpen, onMessage, onClose }) {
   }
   return ws;
 }
+
+export function sendMessage(ws, message) {
+  if (ws.protocol === MSGPACK_SUBPROTOCOL) {
+    ws.send(encodeClientMessage(message));
+  } else {
+    ws.send(JSON.stringify(message));
+  }
+}
+
+// A batchResult frame answers several commands at once; replay it as the
+// individual messages those commands would have produced.
+function unpackBatchResult(data) {
+  const messages = [];
+  for (const result of data.results || []) {
+    messages.push(...result.messages);
+  }
+  if (data.roomState) {
+    messages.push({ type: "roomState", data: data.roomState });
+  }
+  if (data.roomDelta) {
+    messages.push({ type: "roomDelta", data: data.roomDelta });
+  }
+  if (data.inventory) {
+    messages.push({ type: "inventory", data: data.inventory });
+  }
+  return messages;
+}
+
+// Rebuild full roomState messages from roomDelta ones. A delta that does
+// not apply to the view we hold means we missed a frame: drop it, ask the
+// server for a full view and ignore further deltas until it arrives.
+function createRoomStateDecoder(ws, stream) {
+  return (msg) => {
+    if (msg.type === "roomState") {
+      stream.room = msg.data;
+      return msg;
+    }
+    if (msg.type !== "roomDelta") {
+      return msg;
+    }
+    const { baseVersion, ...changed } = msg.data;
+    if (!stream.room) {
+      return null;
+    }
+    if (stream.room.version !== baseVersion) {
+      stream.room = null;
+      sendMessage(ws, { type: "resync" });
+      return null;
+    }
+    stream.room = { ...stream.room, ...changed };
+    return { type: "roomState", data: stream.room };
+  };
+}
@@ -1,107 +1,259 @@
 from __future__ import annotations
 
+import json
+from typing import Any, Dict, Optional
+
 from fastapi import WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
 
 from ..commands.parser import parse_command_input
 from ..commands.router import CommandRouter
 from ..schemas import CommandMessage, ServerMessage
+from ..services.codec import MessagePackCodec, negotiate
 from ..services.connection_manager import ConnectionManager
 from ..services.game_service import GameService
+from ..services.presence import PresenceService
+from ..services.room_deltas import RoomStateDeltas
 from ..world.engine import WorldEngine
 
 
-async def send_room_state(ws: WebSocket, game: GameService, player_id: str) -> None:
-    room_info = await game.describe_room(player_id)
-    await ws.send_json(ServerMessage(type="roomState", data=room_info).model_dump())
+# Close code telling clients their session is gone and retrying is pointless.
+UNKNOWN_SESSION_CLOSE_CODE = 4004
+
+
+def parse_seq(value: Optional[str]) -> Optional[int]:
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+async def receive_message(
+    ws: WebSocket, codec: Optional[MessagePackCodec]
+) -> Dict[str, Any]:
+    """
+    Read and decode the next client frame.
+
+    Raises ``ValueError`` for a frame the connection's codec cannot read
+    (a text frame on a binary connection, bad MessagePack, bad JSON).
+    """
+    frame = await ws.receive()
+    if frame["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(frame.get("code", 1000))
+    if codec:
+        data = frame.get("bytes")
+        if data is None:
+            raise ValueError("Expected a binary frame.")
+        return codec.decode(data)
+    text = frame.get("text")
+    if text is None:
+        raise ValueError("Expected a text frame.")
+    return json.loads(text)
+
+
+def encode_for(
+    deltas: Optional[RoomStateDeltas], message: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Send room views as deltas to clients that asked for them."""
+    return deltas.encode(message) if deltas else message
 
 
-async def send_inventory(ws: WebSocket, game: GameService, player_id: str) -> None:
-    inventory = await game.get_inventory(player_id)
-    await ws.send_json(ServerMessage(type="inventory", data=inventory).model_dump())
+async def send_room_state(
+    connections: ConnectionManager,
+    game: GameService,
+    player_id: str,
+    room_info: Optional[Dict[str, object]] = None,
+    deltas: Optional[RoomStateDeltas] = None,
+) -> None:
+    if room_info is None:
+        room_info = await game.describe_room(player_id)
+    message = ServerMessage(type="roomState", data=room_info).model_dump()
+    await connections.send(player_id, encode_for(deltas, message))
 
 
-async def send_online_players(
-    ws: WebSocket, game: GameService, connections: ConnectionManager, exclude_player_id: str | None = None
+async def send_inventory(
+    connections: ConnectionManager,
+    game: GameService,
+    player_id: str,
+    inventory: Optional[Dict[str, object]] = None,
 ) -> None:
-    """Send the list of online players to a specific websocket, excluding the specified player."""
-    player_ids = connections.get_all_connected_player_ids()
-    players = await game.get_online_player_names(player_ids)
-    # Filter out the current player
-    if exclude_player_id:
-        players = [p for p in players if p["playerId"] != exclude_player_id]
-    await ws.send_json(
-        ServerMessage(type="onlinePlayers", data={"players": players}).model_dump()
+    if inventory is None:
+        inventory = await game.get_inventory(player_id)
+    await connections.send(
+        player_id, ServerMessage(type="inventory", data=inventory).model_dump()
     )
 
 
-async def broadcast_online_players_update(
-    game: GameService, connections: ConnectionManager
+async def run_batch(
+    router: CommandRouter,
+    connections: ConnectionManager,
+    world: WorldEngine,
+    player_id: str,
+    msg: CommandMessage,
+    deltas: Optional[RoomStateDeltas] = None,
 ) -> None:
-    """Broadcast the updated online players list to all connected clients, excluding each player from their own list."""
-    player_ids = connections.get_all_connected_player_ids()
-    all_players = await game.get_online_player_names(player_ids)
-    # Send personalized list to each player (excluding themselves)
-    for pid in player_ids:
-        other_players = [p for p in all_players if p["playerId"] != pid]
-        payload = ServerMessage(type="onlinePlayers", data={"players": other_players}).model_dump()
-        await connections.send(pid, payload)
+    """
+    Answer a ``batch`` message with a single ``batchResult`` frame.
+
+    Each command's replies are listed under the client's ``seq``; the room
+    and inventory views, when any command changed them, come once at the
+    end of the frame (the room as ``roomDelta`` for clients using deltas).
+    """
+    commands = msg.commands or []
+    try:
+        batch = await router.dispatch_batch(
+            player_id, [parse_command_input(command.input) for command in commands]
+        )
+    except ValueError as exc:
+        await connections.send(
+            player_id,
+            ServerMessage(type="error", data={"message": str(exc)}).model_dump(),
+        )
+        return
+    data: Dict[str, object] = {
+        "results": [
+            {
+                "seq": command.seq,
+                "messages": [
+                    encode_for(deltas, reply.model_dump()) for reply in result.replies
+                ],
+            }
+            for command, result in zip(commands, batch.results)
+        ]
+    }
+    if batch.room is not None:
+        room = encode_for(
+            deltas, ServerMessage(type="roomState", data=batch.room).model_dump()
+        )
+        data[room["type"]] = room["data"]
+    if batch.inventory is not None:
+        data["inventory"] = batch.inventory
+    await connections.send(
+        player_id, ServerMessage(type="batchResult", data=data).model_dump()
+    )
+    for result in batch.results:
+        for event in result.broadcasts:
+            await connections.broadcast_room_event(world, event)
 
 
 def create_websocket_endpoint(
     game: GameService,
     world: WorldEngine,
     connections: ConnectionManager,
+    presence: PresenceService,
 ):
     router = CommandRouter(world, connections)
+    # Per-player room view trackers; they outlive a socket so a resumed
+    # session's replayed deltas still apply on the client.
+    room_views: Dict[str, RoomStateDeltas] = {}
 
     async def websocket_endpoint(ws: WebSocket) -> None:
-        await ws.accept()
+        # Binary frames via Sec-WebSocket-Protocol or ?codec=msgpack;
+        # JSON text frames stay the default for debugging.
+        subprotocol, codec = negotiate(
+            ws.scope.get("subprotocols", ()), ws.query_params.get("codec")
+        )
+        await ws.accept(subprotocol=subprotocol)
         session_id = ws.query_params.get("sessionId")
-        if not session_id:
-            await ws.close()
-            return
-        session = game.get_session(session_id)
+        session = game.get_session(session_id) if session_id else None
         if not session:
-            await ws.close()
+            await ws.close(code=UNKNOWN_SESSION_CLOSE_CODE)
             return
         player_id = session.player_id
-        connections.attach(player_id, ws)
+        # Back within the grace period, or taking over from a live socket.
+        resumed = game.resume(session_id) or connections.get(player_id) is not None
+        player = await world.get_player(player_id)
+        if not player:
+            await ws.close(code=UNKNOWN_SESSION_CLOSE_CODE)
+            return
+        connections.attach(
+            player_id, ws, codec, resumable=ws.query_params.get("resume") == "1"
+        )
+        # Opt-in: the client applies roomDelta messages on top of its last view.
+        if ws.query_params.get("roomDeltas") != "1":
+            room_views.pop(player_id, None)
+        elif not resumed or player_id not in room_views:
+            room_views[player_id] = RoomStateDeltas()
+        deltas = room_views.get(player_id)
+
+        last_seq = parse_seq(ws.query_params.get("lastSeq"))
+        if not (
+            resumed and last_seq is not None and connections.replay(player_id, last_seq)
+        ):
+            if deltas:
+                deltas.forget()
+            await send_room_state(connections, game, player_id, deltas=deltas)
+            await send_inventory(connections, game, player_id)
+            if resumed:
+                await presence.send_roster(player_id)
+            else:
+                await presence.join(player_id, player.name)
 
-        await send_room_state(ws, game, player_id)
-        await send_inventory(ws, game, player_id)
-        await send_online_players(ws, game, connections, exclude_player_id=player_id)
-        # Broadcast updated list to all other players
-        await broadcast_online_players_update(game, connections)
+        async def end_session() -> None:
+            game.remove_session(session_id)
+            room_views.pop(player_id, None)
+            connections.forget(player_id)
+            presence.leave(player_id)
+            await game.release_player(player_id)
 
         try:
             while True:
-                raw = await ws.receive_json()
-                msg = CommandMessage.model_validate(raw)
+                try:
+                    msg = CommandMessage.model_validate(
+                        await receive_message(ws, codec)
+                    )
+                except (ValueError, ValidationError):
+                    await connections.send(
+                        player_id,
+                        ServerMessage(
+                            type="error", data={"message": "Malformed message."}
+                        ).model_dump(),
+                    )
+                    continue
+                if msg.type == "batch" and msg.commands is not None:
+                    await run_batch(
+                        router, connections, world, player_id, msg, deltas
+                    )
+                    continue
+                if msg.type == "resync" and deltas:
+                    deltas.forget()
+                    await send_room_state(connections, game, player_id, deltas=deltas)
+                    continue
                 if msg.type != "command" or msg.input is None:
                     continue
                 parsed = parse_command_input(msg.input)
                 try:
                     result = await router.dispatch(player_id, parsed)
                     for reply in result.replies:
-                        await ws.send_json(reply.model_dump())
+                        await connections.send(
+                            player_id, encode_for(deltas, reply.model_dump())
+                        )
                     if result.refresh_room:
-                        await send_room_state(ws, game, player_id)
+                        await send_room_state(
+                            connections, game, player_id, result.room, deltas
+                        )
                     if result.refresh_inventory:
-                        await send_inventory(ws, game, player_id)
+                        await send_inventory(
+                            connections, game, player_id, result.inventory
+                        )
                     for event in result.broadcasts:
                         await connections.broadcast_room_event(world, event)
                 except ValueError as exc:
-                    await ws.send_json(
+                    await connections.send(
+                        player_id,
                         ServerMessage(
                             type="error",
                             data={"message": str(exc)},
-                        ).model_dump()
+                        ).model_dump(),
                     )
         except WebSocketDisconnect:
-            await game.release_player(player_id)
-            game.remove_session(session_id)
-            connections.detach(player_id)
-            # Broadcast updated list to remaining players
-            await broadcast_online_players_update(game, connections)
+            pass
+        finally:
+            # Any exit, clean or not, suspends the session, unless a newer
+            # socket took it over and owns cleanup now.
+            current = connections.get(player_id)
+            if current is None or current is ws:
+                connections.detach(player_id, ws)
+                await game.suspend(session_id, end_session)
 
     return websocket_endpoint
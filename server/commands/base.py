@@ -3,6 +3,7 @@ from __future__ import annotations
 from dataclasses import dataclass, field
 from typing import Dict, List, Optional, Protocol
 
+from ..models import PlayerState
 from ..schemas import ServerMessage
 from ..services.connection_manager import BroadcastEvent, ConnectionManager
 from ..world.engine import WorldEngine
@@ -21,13 +22,33 @@ class CommandResult:
     broadcasts: List[BroadcastEvent] = field(default_factory=list)
     refresh_room: bool = False
     refresh_inventory: bool = False
+    # Filled in by the router, under the same lock as the command.
+    room: Optional[Dict[str, object]] = None
+    inventory: Optional[Dict[str, object]] = None
+
+
+@dataclass
+class BatchResult:
+    """One ``CommandResult`` per batched command plus the views they left behind."""
+
+    results: List[CommandResult] = field(default_factory=list)
+    room: Optional[Dict[str, object]] = None
+    inventory: Optional[Dict[str, object]] = None
+
+
+@dataclass
+class CommandContext:
+    """What a handler runs against; ``player``'s room is locked meanwhile."""
+
+    world: WorldEngine
+    connections: ConnectionManager
+    player_id: str
+    player: PlayerState
 
 
 class CommandHandler(Protocol):
     async def __call__(
         self,
-        world: WorldEngine,
-        connections: ConnectionManager,
-        player_id: str,
+        ctx: CommandContext,
         command: CommandInput,
     ) -> CommandResult: ...
@@ -1,16 +1,34 @@
 from __future__ import annotations
 
 import re
-from typing import Awaitable, Callable, Dict, List, Optional
+from typing import Dict, Iterable, List, Optional, Sequence
 
+from ..models import PlayerState
 from ..schemas import ServerMessage
 from ..services.connection_manager import BroadcastEvent, ConnectionManager
 from ..world.engine import WorldEngine
-from .base import CommandHandler, CommandInput, CommandResult
+from .base import (
+    BatchResult,
+    CommandContext,
+    CommandHandler,
+    CommandInput,
+    CommandResult,
+)
+
+# Upper bound on commands per batch frame; also bounds the rooms it locks.
+MAX_BATCH_COMMANDS = 32
 
 
 class CommandRouter:
-    """Map parsed commands to handler callables."""
+    """
+    Map parsed commands to handler callables.
+
+    Each dispatch runs as one transaction: the player's room (plus the
+    destination of a ``go``) is locked once, the handler gets the resolved
+    player in a ``CommandContext`` and uses the engine's ``*_unlocked``
+    methods, and the room and inventory refreshes it asks for are built
+    before the lock is released.
+    """
 
     def __init__(self, world: WorldEngine, connections: ConnectionManager) -> None:
         self.world = world
@@ -36,42 +54,115 @@ class CommandRouter:
     ) -> CommandResult:
         handler = self._handlers.get(command.action)
         if not handler:
-            return CommandResult(
-                replies=[
-                    ServerMessage(
-                        type="error",
-                        data={"message": f"Unknown command: {command.action}"},
+            return unknown_command(command)
+        async with self.world.lock_player_room(
+            player_id, *_directions([command])
+        ) as player:
+            result = await self._run(handler, player_id, player, command)
+            if result.refresh_room:
+                result.room = self.world.room_payload_unlocked(player_id)
+            if result.refresh_inventory:
+                result.inventory = self.world.inventory_unlocked(player)
+        return result
+
+    async def dispatch_batch(
+        self,
+        player_id: str,
+        commands: Sequence[CommandInput],
+    ) -> BatchResult:
+        """
+        Run ``commands`` in order as a single transaction.
+
+        Every room the batch could walk through is locked up front, so the
+        whole batch costs one lock acquisition. A failing command records
+        its error and the rest still run, as if they had been sent one by
+        one. The room and inventory views are built once, at the end.
+        """
+        if len(commands) > MAX_BATCH_COMMANDS:
+            raise ValueError(
+                f"A batch holds at most {MAX_BATCH_COMMANDS} commands."
+            )
+        batch = BatchResult()
+        async with self.world.lock_player_room(
+            player_id, *_directions(commands)
+        ) as player:
+            for command in commands:
+                handler = self._handlers.get(command.action)
+                if not handler:
+                    batch.results.append(unknown_command(command))
+                    continue
+                try:
+                    result = await self._run(handler, player_id, player, command)
+                except ValueError as exc:
+                    result = CommandResult(
+                        replies=[
+                            ServerMessage(type="error", data={"message": str(exc)})
+                        ]
                     )
-                ]
+                batch.results.append(result)
+            if any(result.refresh_room for result in batch.results):
+                batch.room = self.world.room_payload_unlocked(player_id)
+            if any(result.refresh_inventory for result in batch.results):
+                batch.inventory = self.world.inventory_unlocked(player)
+        return batch
+
+    async def _run(
+        self,
+        handler: CommandHandler,
+        player_id: str,
+        player: PlayerState,
+        command: CommandInput,
+    ) -> CommandResult:
+        ctx = CommandContext(self.world, self.connections, player_id, player)
+        result = await handler(ctx, command)
+        # Pin room events to where they happened; later commands in a
+        # batch may move the player on before they are broadcast.
+        for event in result.broadcasts:
+            if event.room_id is None:
+                event.room_id = player.room_id
+        return result
+
+
+def _directions(commands: Iterable[CommandInput]) -> List[str]:
+    return [
+        command.args[0]
+        for command in commands
+        if command.action == "go" and command.args
+    ]
+
+
+def unknown_command(command: CommandInput) -> CommandResult:
+    return CommandResult(
+        replies=[
+            ServerMessage(
+                type="error",
+                data={"message": f"Unknown command: {command.action}"},
             )
-        return await handler(self.world, self.connections, player_id, command)
+        ]
+    )
 
 
 async def noop_handler(
-    world: WorldEngine,
-    connections: ConnectionManager,
-    player_id: str,
+    ctx: CommandContext,
     command: CommandInput,
 ) -> CommandResult:
     return CommandResult()
 
 
 async def go_handler(
-    world: WorldEngine,
-    connections: ConnectionManager,
-    player_id: str,
+    ctx: CommandContext,
     command: CommandInput,
 ) -> CommandResult:
     args = command.args or []
     if not args:
         raise ValueError("Specify a direction (north/south/east/west).")
     direction = args[0]
-    room_info = await world.move_player(player_id, direction)
+    room_info = ctx.world.move_player_unlocked(ctx.player, direction)
     return CommandResult(
         replies=[ServerMessage(type="roomState", data=room_info)],
         broadcasts=[
             BroadcastEvent(
-                player_id=player_id,
+                player_id=ctx.player_id,
                 text="You hear footsteps as someone moves.",
                 include_self=False,
             )
@@ -80,12 +171,10 @@ async def go_handler(
 
 
 async def collect_handler(
-    world: WorldEngine,
-    connections: ConnectionManager,
-    player_id: str,
+    ctx: CommandContext,
     command: CommandInput,
 ) -> CommandResult:
-    info = await world.collect_coins(player_id)
+    info = ctx.world.collect_coins_unlocked(ctx.player)
     return CommandResult(
         replies=[
             ServerMessage(
@@ -95,7 +184,7 @@ async def collect_handler(
         ],
         broadcasts=[
             BroadcastEvent(
-                player_id=player_id,
+                player_id=ctx.player_id,
                 text="Someone collects coins nearby.",
                 include_self=False,
             )
@@ -106,12 +195,10 @@ async def collect_handler(
 
 
 async def drop_handler(
-    world: WorldEngine,
-    connections: ConnectionManager,
-    player_id: str,
+    ctx: CommandContext,
     command: CommandInput,
 ) -> CommandResult:
-    info = await world.drop_coins(player_id)
+    info = ctx.world.drop_coins_unlocked(ctx.player)
     return CommandResult(
         replies=[
             ServerMessage(
@@ -121,7 +208,7 @@ async def drop_handler(
         ],
         broadcasts=[
             BroadcastEvent(
-                player_id=player_id,
+                player_id=ctx.player_id,
                 text="You hear coins clatter onto the floor.",
                 include_self=False,
             )
@@ -132,13 +219,11 @@ async def drop_handler(
 
 
 async def take_handler(
-    world: WorldEngine,
-    connections: ConnectionManager,
-    player_id: str,
+    ctx: CommandContext,
     command: CommandInput,
 ) -> CommandResult:
     query = " ".join(command.args) if command.args else None
-    info = await world.take_items(player_id, query)
+    info = ctx.world.take_items_unlocked(ctx.player, query)
     replies: List[ServerMessage] = []
     broadcasts: List[BroadcastEvent] = []
     taken = info.get("taken") or []
@@ -152,7 +237,7 @@ async def take_handler(
         )
         broadcasts.append(
             BroadcastEvent(
-                player_id=player_id,
+                player_id=ctx.player_id,
                 text="Someone picks something up nearby.",
                 include_self=False,
             )
@@ -165,28 +250,23 @@ async def take_handler(
 
 
 async def look_handler(
-    world: WorldEngine,
-    connections: ConnectionManager,
-    player_id: str,
+    ctx: CommandContext,
     command: CommandInput,
 ) -> CommandResult:
     return CommandResult(refresh_room=True)
 
 
 async def emote_handler(
-    world: WorldEngine,
-    connections: ConnectionManager,
-    player_id: str,
+    ctx: CommandContext,
     command: CommandInput,
 ) -> CommandResult:
     verb = command.verb
     if not verb:
         raise ValueError("Specify an emote, e.g. /sneeze.")
-    emote_text = await world.get_emote_message(player_id, verb)
+    emote_text = await ctx.world.get_emote_message(ctx.player_id, verb)
     if not emote_text:
         raise ValueError("Unknown emote.")
-    player = await world.get_player(player_id)
-    reply_text = _format_self_emote(emote_text, player.name if player else None)
+    reply_text = _format_self_emote(emote_text, ctx.player.name)
     return CommandResult(
         replies=[
             ServerMessage(
@@ -196,7 +276,7 @@ async def emote_handler(
         ],
         broadcasts=[
             BroadcastEvent(
-                player_id=player_id,
+                player_id=ctx.player_id,
                 text=emote_text,
                 include_self=False,
             )
@@ -205,9 +285,7 @@ async def emote_handler(
 
 
 async def tell_handler(
-    world: WorldEngine,
-    connections: ConnectionManager,
-    player_id: str,
+    ctx: CommandContext,
     command: CommandInput,
 ) -> CommandResult:
     """Handle /tell {character} {message} or /tell all {message}"""
@@ -221,9 +299,7 @@ async def tell_handler(
     if not message:
         raise ValueError("What do you want to tell them?")
 
-    sender = await world.get_player(player_id)
-    if not sender:
-        raise ValueError("You are not a valid player.")
+    sender = ctx.player
 
     sender_name = sender.name
     replies: List[ServerMessage] = []
@@ -233,45 +309,39 @@ async def tell_handler(
     target_normalized = target.strip().lower()
     if target_normalized == "all":
         # Send to all online players
-        player_ids = connections.get_all_connected_player_ids()
+        player_ids = ctx.connections.get_all_connected_player_ids()
         message_text = f"{sender_name} tells everyone: '{message}'"
         payload = ServerMessage(type="event", data={"text": message_text}).model_dump()
 
         # Update last_message_sender_id for all recipients (so they can /reply)
-        async with world.lock:
-            for recipient_id in player_ids:
-                if recipient_id != player_id:  # Don't update sender's own last_message_sender_id
-                    recipient_player = world.state.players.get(recipient_id)
-                    if recipient_player:
-                        recipient_player.last_message_sender_id = player_id
+        for recipient_id in player_ids:
+            if recipient_id != ctx.player_id:  # Don't update sender's own last_message_sender_id
+                recipient_player = ctx.world.state.players.get(recipient_id)
+                if recipient_player:
+                    recipient_player.last_message_sender_id = ctx.player_id
 
         # Send to all players including sender
-        await connections.send_to_all(payload)
+        await ctx.connections.send_to_all(payload)
         return CommandResult()
     else:
         # Send to specific character
         # Use the normalized target for character resolution
-        target_player_id = await world.resolve_character_name(target_normalized, connections)
-        if not target_player_id:
+        target_player = await ctx.world.resolve_character_name(
+            target_normalized, ctx.connections
+        )
+        if not target_player:
             raise ValueError(f"'{target}' is not online or the name is ambiguous.")
 
-        if target_player_id == player_id:
+        target_player_id = target_player.player_id
+        if target_player_id == ctx.player_id:
             raise ValueError("You cannot tell yourself.")
 
-        target_player = await world.get_player(target_player_id)
-        if not target_player:
-            raise ValueError(f"'{target}' is not online.")
-
         # Update target's last_message_sender_id
-        async with world.lock:
-            # Get player again to ensure we're modifying the state object
-            state_player = world.state.players.get(target_player_id)
-            if state_player:
-                state_player.last_message_sender_id = player_id
+        target_player.last_message_sender_id = ctx.player_id
 
         # Send message to target
         target_message = f"{sender_name} tells you: '{message}'"
-        await connections.send(
+        await ctx.connections.send(
             target_player_id,
             ServerMessage(type="event", data={"text": target_message}).model_dump()
         )
@@ -284,9 +354,7 @@ async def tell_handler(
 
 
 async def yell_handler(
-    world: WorldEngine,
-    connections: ConnectionManager,
-    player_id: str,
+    ctx: CommandContext,
     command: CommandInput,
 ) -> CommandResult:
     """Handle /yell {character} {message} or /yell all {message}"""
@@ -300,9 +368,7 @@ async def yell_handler(
     if not message:
         raise ValueError("What do you want to yell?")
 
-    sender = await world.get_player(player_id)
-    if not sender:
-        raise ValueError("You are not a valid player.")
+    sender = ctx.player
 
     sender_name = sender.name.upper()
     message_upper = message.upper()
@@ -312,44 +378,38 @@ async def yell_handler(
     target_normalized = target.strip().lower()
     if target_normalized == "all":
         # Send to all online players
-        player_ids = connections.get_all_connected_player_ids()
+        player_ids = ctx.connections.get_all_connected_player_ids()
         message_text = f"{sender_name} YELLS AT EVERYONE: '{message_upper}'"
         payload = ServerMessage(type="event", data={"text": message_text}).model_dump()
 
         # Update last_message_sender_id for all recipients (so they can /reply)
-        async with world.lock:
-            for recipient_id in player_ids:
-                if recipient_id != player_id:  # Don't update sender's own last_message_sender_id
-                    recipient_player = world.state.players.get(recipient_id)
-                    if recipient_player:
-                        recipient_player.last_message_sender_id = player_id
+        for recipient_id in player_ids:
+            if recipient_id != ctx.player_id:  # Don't update sender's own last_message_sender_id
+                recipient_player = ctx.world.state.players.get(recipient_id)
+                if recipient_player:
+                    recipient_player.last_message_sender_id = ctx.player_id
 
         # Send to all players including sender
-        await connections.send_to_all(payload)
+        await ctx.connections.send_to_all(payload)
         return CommandResult()
 
     # Send to specific character
-    target_player_id = await world.resolve_character_name(target_normalized, connections)
-    if not target_player_id:
+    target_player = await ctx.world.resolve_character_name(
+        target_normalized, ctx.connections
+    )
+    if not target_player:
         raise ValueError(f"'{target}' is not online or the name is ambiguous.")
 
-    if target_player_id == player_id:
+    target_player_id = target_player.player_id
+    if target_player_id == ctx.player_id:
         raise ValueError("You cannot yell at yourself.")
 
-    target_player = await world.get_player(target_player_id)
-    if not target_player:
-        raise ValueError(f"'{target}' is not online.")
-
     # Update target's last_message_sender_id
-    async with world.lock:
-        # Get player again to ensure we're modifying the state object
-        state_player = world.state.players.get(target_player_id)
-        if state_player:
-            state_player.last_message_sender_id = player_id
+    target_player.last_message_sender_id = ctx.player_id
 
     # Send message to target (ALL CAPS)
     target_message = f"{sender_name} YELLS AT YOU: '{message_upper}'"
-    await connections.send(
+    await ctx.connections.send(
         target_player_id,
         ServerMessage(type="event", data={"text": target_message}).model_dump()
     )
@@ -362,9 +422,7 @@ async def yell_handler(
 
 
 async def reply_handler(
-    world: WorldEngine,
-    connections: ConnectionManager,
-    player_id: str,
+    ctx: CommandContext,
     command: CommandInput,
 ) -> CommandResult:
     """Handle /reply {message}"""
@@ -374,36 +432,30 @@ async def reply_handler(
 
     message = " ".join(args)
 
-    sender = await world.get_player(player_id)
-    if not sender:
-        raise ValueError("You are not a valid player.")
+    sender = ctx.player
 
     # Get the last person who sent a message
     last_sender_id = sender.last_message_sender_id
     if not last_sender_id:
         raise ValueError("You have no one to reply to.")
 
-    last_sender = await world.get_player(last_sender_id)
+    last_sender = await ctx.world.get_player(last_sender_id)
     if not last_sender:
         raise ValueError("The person you're replying to is no longer online.")
 
     # Check if last sender is still online
-    if not connections.get(last_sender_id):
+    if not ctx.connections.get(last_sender_id):
         raise ValueError("The person you're replying to is no longer online.")
 
     # Use tell_handler logic
     sender_name = sender.name
 
     # Update last sender's last_message_sender_id
-    async with world.lock:
-        # Get player again to ensure we're modifying the state object
-        state_sender = world.state.players.get(last_sender_id)
-        if state_sender:
-            state_sender.last_message_sender_id = player_id
+    last_sender.last_message_sender_id = ctx.player_id
 
     # Send message to last sender
     target_message = f"{sender_name} tells you: '{message}'"
-    await connections.send(
+    await ctx.connections.send(
         last_sender_id,
         ServerMessage(type="event", data={"text": target_message}).model_dump()
     )
@@ -455,9 +507,7 @@ def _verb_to_second_person(verb: str) -> str:
 
 
 async def help_handler(
-    world: WorldEngine,
-    connections: ConnectionManager,
-    player_id: str,
+    ctx: CommandContext,
     command: CommandInput,
 ) -> CommandResult:
     """Handle help command - show all available commands."""
@@ -1,94 +1,136 @@
 from __future__ import annotations
 
 import argparse
+import itertools
 import json
 import random
+from array import array
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Set, Tuple
+from typing import IO, Deque, Dict, Iterator, List, Optional
+
+from .world.graph import build_random_graph
 
 DATA_DIR = Path(__file__).resolve().parent.parent / "data"
 WORLD_FILE = DATA_DIR / "world.json"
 SAVE_FILE = DATA_DIR / "savegame.json"
-
-
-def _build_random_graph(
-    room_count: int, degrees: List[int], rng: random.Random
-) -> Set[Tuple[int, int]]:
-    if room_count <= 1:
-        return set()
-
-    max_attempts = 64
-    for _ in range(max_attempts):
-        remaining = list(degrees)
-        edges: Set[Tuple[int, int]] = set()
-        adjacency: List[Set[int]] = [set() for _ in range(room_count)]
-
-        candidates = [i for i, d in enumerate(remaining) if d > 0]
-        failed = False
-
-        while candidates:
-            u = rng.choice(candidates)
-            possible = [
-                v
-                for v in candidates
-                if v != u and v not in adjacency[u]
-            ]
-            if not possible:
-                failed = True
-                break
-            v = rng.choice(possible)
-            edge = (u, v) if u < v else (v, u)
-            edges.add(edge)
-            adjacency[u].add(v)
-            adjacency[v].add(u)
-            remaining[u] -= 1
-            remaining[v] -= 1
-            if remaining[u] < 0 or remaining[v] < 0:
-                failed = True
-                break
-            candidates = [i for i, d in enumerate(remaining) if d > 0]
-
-        if failed:
-            continue
-        if any(d != 0 for d in remaining):
-            continue
-        if _is_connected(room_count, edges):
-            return edges
-
-    # Fallback: simple path if we cannot satisfy the exact degree distribution.
-    fallback_edges: Set[Tuple[int, int]] = set()
-    for i in range(room_count - 1):
-        fallback_edges.add((i, i + 1))
-    return fallback_edges
-
-
-def _is_connected(room_count: int, edges: Set[Tuple[int, int]]) -> bool:
-    if room_count == 0:
-        return True
-    adjacency: Dict[int, Set[int]] = {i: set() for i in range(room_count)}
-    for u, v in edges:
-        adjacency[u].add(v)
-        adjacency[v].add(u)
-    visited: Set[int] = set()
-    stack: List[int] = [0]
-    while stack:
-        node = stack.pop()
-        if node in visited:
-            continue
-        visited.add(node)
-        stack.extend(adjacency[node] - visited)
-    return len(visited) == room_count
-
-
-def generate_world_definition(
-    room_count: int,
-    coins_mean: float = 4.0,
-    coins_std: float = 2.0,
-    coins_min: int = 0,
-    coins_max: int = 10,
-) -> Dict[str, object]:
-    """Generate a complete world definition as a JSON-serialisable dict."""
-    rng = random.Random()
+JOURNAL_FILE = DATA_DIR / "savegame.journal"
+SQLITE_FILE = DATA_DIR / "savegame.sqlite3"
+
+# Rooms per region. Fixed so the output never depends on the worker count.
+REGION_SIZE = 10_000
+
+ROOM_ADJECTIVES = [
+    "Dusty",
+    "Echoing",
+    "Shadowed",
+    "Dripping",
+    "Cracked",
+    "Twisting",
+    "Silent",
+    "Icy",
+    "Stifling",
+    "Gloomy",
+]
+ROOM_NOUNS = [
+    "Hall",
+    "Cellar",
+    "Antechamber",
+    "Vault",
+    "Passage",
+    "Gallery",
+    "Crypt",
+    "Cavern",
+    "Library",
+    "Guardroom",
+]
+GENERIC_ITEM_DESCRIPTIONS = [
+    "a tarnished silver ring",
+    "a cracked emerald amulet",
+    "a small brass compass",
+    "a rune-etched stone",
+    "a faded leather bookmark",
+    "a glass vial of swirling mist",
+    "a chipped obsidian dagger",
+    "a delicate bone flute",
+    "a copper coin with a square hole",
+    "a fragment of a stained map",
+    "a smooth stone painted with an eye",
+    "a tiny clockwork beetle",
+    "a lock of hair tied with red string",
+    "a silver bell that makes no sound",
+    "a wax-sealed black envelope",
+    "a bronze key-shaped brooch",
+]
+DIRECTIONS = ("north", "south", "east", "west")
+# Every ordering of the four door direction pairs, as indexes into
+# DIRECTIONS; one draw instead of a shuffle.
+DIR_PAIR_ORDERS = list(itertools.permutations([(0, 1), (1, 0), (2, 3), (3, 2)]))
+GHOST_DESCRIPTIONS = [
+    "a translucent knight with empty, burning eyes",
+    "a tattered-robed specter that drips shadow",
+    "a towering phantom crowned in jagged bone",
+    "a drifting child-ghost humming a tuneless song",
+]
+
+
+@dataclass
+class CoinSettings:
+    mean: float = 4.0
+    std: float = 2.0
+    minimum: int = 0
+    maximum: int = 10
+
+
+@dataclass
+class WorldPlan:
+    """
+    The parts of a world that need a global view: doors, items and ghosts.
+
+    Doors are flat arrays grouped by room rather than one dict per exit: the
+    exits of room ``n`` are slots ``exit_offsets[n]`` up to
+    ``exit_offsets[n + 1]`` of ``exit_targets`` (room index),
+    ``exit_directions`` (index into ``DIRECTIONS``) and ``exit_keys`` (key
+    number, -1 for an unlocked door), in the order the doors were laid.
+    Regions get slices of them and build their exit dicts themselves.
+    """
+
+    seed: int
+    room_count: int
+    exit_offsets: "array[int]"
+    exit_targets: "array[int]"
+    exit_directions: bytearray
+    exit_keys: "array[int]"
+    items: Dict[str, Dict[str, object]]
+    items_by_room: Dict[int, List[str]]
+    ghosts: Dict[str, Dict[str, object]]
+
+
+@dataclass
+class RegionTask:
+    seed: int
+    index: int
+    start: int
+    # The region's slices of the WorldPlan exit arrays; offsets keep their
+    # world-wide values, so slot ``exit_offsets[i] - exit_offsets[0]``.
+    exit_offsets: "array[int]"
+    exit_targets: "array[int]"
+    exit_directions: bytes
+    exit_keys: "array[int]"
+    items_by_room: Dict[int, List[str]]
+    coins: CoinSettings
+
+
+def _rng(seed: int, stream: str) -> random.Random:
+    # String seeds are hashed deterministically, independent of PYTHONHASHSEED.
+    return random.Random(f"{seed}:{stream}")
+
+
+def plan_world(room_count: int, seed: int) -> WorldPlan:
+    """Lay out doors, locks, item spots and ghosts for the whole world."""
+    rng = _rng(seed, "graph")
 
     # Degree distribution: ~10% with 1 door, 80% with 2, 10% with 3.
     num_two = int(room_count * 0.8)
@@ -108,159 +150,64 @@ def generate_world_definition(
                 degrees[i] = d + 1
                 break
 
-    edges = _build_random_graph(room_count, degrees, rng)
-
-    # Choose some doors to be locked and assign each a key id.
-    locked_doors_target = max(1, room_count // 10)
-    all_edges = list(edges)
-    if locked_doors_target > len(all_edges):
-        locked_doors_target = len(all_edges)
-    locked_edges: List[Tuple[int, int]] = rng.sample(all_edges, locked_doors_target)
-    locked_edge_keys: Dict[Tuple[int, int], str] = {}
-    for idx, edge in enumerate(locked_edges):
-        key_id = f"key_{idx}"
-        locked_edge_keys[edge] = key_id
-
-    # Assign exits (N/E/S/W) for each edge.
-    exits_by_index: List[Dict[str, Dict[str, object]]] = [
-        {} for _ in range(room_count)
-    ]
-    used_dirs: List[Set[str]] = [set() for _ in range(room_count)]
-    dir_pairs = [
-        ("north", "south"),
-        ("south", "north"),
-        ("east", "west"),
-        ("west", "east"),
-    ]
+    edges = build_random_graph(room_count, degrees, rng)
+
+    # Choose some doors to be locked; key_<n> opens the n-th one drawn.
+    edge_count = len(edges)
+    locked_doors_target = min(max(1, room_count // 10), edge_count)
+    edge_keys = array("i", [-1]) * edge_count
+    for key, edge_idx in enumerate(rng.sample(range(edge_count), locked_doors_target)):
+        edge_keys[edge_idx] = key
 
+    # Both ends of every door get a slot, grouped by room in door order.
+    exit_offsets = array("i", [0]) * (room_count + 1)
     for u, v in edges:
-        rng.shuffle(dir_pairs)
-        chosen_pair: Tuple[str, str] | None = None
+        exit_offsets[u + 1] += 1
+        exit_offsets[v + 1] += 1
+    for idx in range(room_count):
+        exit_offsets[idx + 1] += exit_offsets[idx]
+    next_slot = exit_offsets[:-1]
+    exit_targets = array("i", [0]) * (2 * edge_count)
+    exit_directions = bytearray(2 * edge_count)
+    exit_keys = array("i", [-1]) * (2 * edge_count)
+
+    # Assign exits (N/E/S/W) for each edge; used_dirs is a bitmask per room.
+    used_dirs = bytearray(room_count)
+    for edge_idx, (u, v) in enumerate(edges):
+        dir_pairs = rng.choice(DIR_PAIR_ORDERS)
         for d1, d2 in dir_pairs:
-            if d1 not in used_dirs[u] and d2 not in used_dirs[v]:
-                chosen_pair = (d1, d2)
+            if not (used_dirs[u] >> d1 & 1 or used_dirs[v] >> d2 & 1):
                 break
-        if chosen_pair is None:
-            d1, d2 = dir_pairs[0]
         else:
-            d1, d2 = chosen_pair
-        used_dirs[u].add(d1)
-        used_dirs[v].add(d2)
-
-        edge_key = (u, v) if (u, v) in locked_edge_keys else (v, u)
-        key_id = locked_edge_keys.get(edge_key)
-        locked = key_id is not None
-
-        exits_by_index[u][d1] = {
-            "target": f"room_{v}",
-            "locked": locked,
-            "keyId": key_id,
-        }
-        exits_by_index[v][d2] = {
-            "target": f"room_{u}",
-            "locked": locked,
-            "keyId": key_id,
-        }
-
-    def sample_coins() -> int:
-        value = int(round(rng.gauss(coins_mean, coins_std)))
-        if value < coins_min:
-            value = coins_min
-        if value > coins_max:
-            value = coins_max
-        return value
-
-    room_adjectives = [
-        "Dusty",
-        "Echoing",
-        "Shadowed",
-        "Dripping",
-        "Cracked",
-        "Twisting",
-        "Silent",
-        "Icy",
-        "Stifling",
-        "Gloomy",
-    ]
-    room_nouns = [
-        "Hall",
-        "Cellar",
-        "Antechamber",
-        "Vault",
-        "Passage",
-        "Gallery",
-        "Crypt",
-        "Cavern",
-        "Library",
-        "Guardroom",
-    ]
-
-    rooms: List[Dict[str, object]] = []
-    room_ids: List[str] = []
-    for idx in range(room_count):
-        room_id = f"room_{idx}"
-        room_ids.append(room_id)
-        adj = room_adjectives[idx % len(room_adjectives)]
-        noun = room_nouns[idx % len(room_nouns)]
-        name = f"{adj} {noun}"
-        description = (
-            f"A {adj.lower()} {noun.lower()} carved from damp stone. "
-            "Faint echoes hint at unseen passages."
-        )
-        coins_initial = sample_coins()
-        appearance = {
-            "coinsTemplate": "You see {coinCount} gold coin(s) scattered about.",
-            "emptyCoinsTemplate": "You see no coins here.",
-            "charactersTemplate": "{names} are here.",
-        }
-        rooms.append(
-            {
-                "id": room_id,
-                "name": name,
-                "description": description,
-                "exits": exits_by_index[idx],
-                "coins": {
-                    "initial": coins_initial,
-                    "respawn": {"enabled": False},
-                },
-                "objects": [],
-                "appearance": appearance,
-                "items": [],
-            }
-        )
-
-    room_index_by_id = {r["id"]: i for i, r in enumerate(rooms)}
+            d1, d2 = dir_pairs[0]
+        used_dirs[u] |= 1 << d1
+        used_dirs[v] |= 1 << d2
+
+        key = edge_keys[edge_idx]
+        slot = next_slot[u]
+        next_slot[u] = slot + 1
+        exit_targets[slot] = v
+        exit_directions[slot] = d1
+        exit_keys[slot] = key
+        slot = next_slot[v]
+        next_slot[v] = slot + 1
+        exit_targets[slot] = u
+        exit_directions[slot] = d2
+        exit_keys[slot] = key
+    del edges, edge_keys, next_slot, used_dirs
 
     # Items and keys.
+    rng = _rng(seed, "placement")
     items: Dict[str, Dict[str, object]] = {}
 
     total_items = max(1, room_count // 3)
-    num_keys = min(len(locked_edge_keys), total_items)
+    num_keys = min(locked_doors_target, total_items)
     num_generic = max(0, total_items - num_keys)
 
-    generic_item_descriptions = [
-        "a tarnished silver ring",
-        "a cracked emerald amulet",
-        "a small brass compass",
-        "a rune-etched stone",
-        "a faded leather bookmark",
-        "a glass vial of swirling mist",
-        "a chipped obsidian dagger",
-        "a delicate bone flute",
-        "a copper coin with a square hole",
-        "a fragment of a stained map",
-        "a smooth stone painted with an eye",
-        "a tiny clockwork beetle",
-        "a lock of hair tied with red string",
-        "a silver bell that makes no sound",
-        "a wax-sealed black envelope",
-        "a bronze key-shaped brooch",
-    ]
-
-    key_ids: List[str] = []
+    item_ids: List[str] = []
     for i in range(num_keys):
         key_id = f"key_{i}"
-        key_ids.append(key_id)
+        item_ids.append(key_id)
         items[key_id] = {
             "name": f"Strange Key #{i + 1}",
             "description": "a heavy iron key with jagged teeth",
@@ -270,7 +217,8 @@ def generate_world_definition(
 
     for j in range(num_generic):
         item_id = f"item_{j}"
-        desc = generic_item_descriptions[j % len(generic_item_descriptions)]
+        item_ids.append(item_id)
+        desc = GENERIC_ITEM_DESCRIPTIONS[j % len(GENERIC_ITEM_DESCRIPTIONS)]
         items[item_id] = {
             "name": desc,
             "description": desc,
@@ -278,46 +226,184 @@ def generate_world_definition(
             "keyId": None,
         }
 
-    rng.shuffle(room_ids)
-    index = 0
-
-    for key_id in key_ids:
-        if index >= len(room_ids):
-            break
-        rid = room_ids[index]
-        index += 1
-        ri = room_index_by_id[rid]
-        rooms[ri]["items"].append(key_id)
-
-    for j in range(num_generic):
-        if index >= len(room_ids):
-            break
-        rid = room_ids[index]
-        index += 1
-        item_id = f"item_{j}"
-        ri = room_index_by_id[rid]
-        rooms[ri]["items"].append(item_id)
-
-    ghost_descriptions = [
-        "a translucent knight with empty, burning eyes",
-        "a tattered-robed specter that drips shadow",
-        "a towering phantom crowned in jagged bone",
-        "a drifting child-ghost humming a tuneless song",
-    ]
+    # One item per room, keys first, in distinct random rooms.
+    spots = rng.sample(range(room_count), min(room_count, len(item_ids)))
+    items_by_room: Dict[int, List[str]] = {}
+    for room_idx, item_id in zip(spots, item_ids):
+        items_by_room.setdefault(room_idx, []).append(item_id)
 
     ghosts: Dict[str, Dict[str, object]] = {}
     ghost_count = min(3, max(1, room_count // 30))
     for i in range(ghost_count):
-        rid = rng.choice(room_ids)
-        desc = ghost_descriptions[i % len(ghost_descriptions)]
-        ghost_id = f"ghost_{i}"
-        ghosts[ghost_id] = {"roomId": rid, "description": desc}
+        ghosts[f"ghost_{i}"] = {
+            "roomId": f"room_{rng.randrange(room_count)}",
+            "description": GHOST_DESCRIPTIONS[i % len(GHOST_DESCRIPTIONS)],
+        }
+
+    return WorldPlan(
+        seed=seed,
+        room_count=room_count,
+        exit_offsets=exit_offsets,
+        exit_targets=exit_targets,
+        exit_directions=exit_directions,
+        exit_keys=exit_keys,
+        items=items,
+        items_by_room=items_by_room,
+        ghosts=ghosts,
+    )
+
+
+def region_tasks(
+    plan: WorldPlan, coins: CoinSettings, region_size: int = REGION_SIZE
+) -> Iterator[RegionTask]:
+    buckets: Dict[int, Dict[int, List[str]]] = {}
+    for room_idx, room_items in plan.items_by_room.items():
+        buckets.setdefault(room_idx // region_size, {})[room_idx] = room_items
+    for index, start in enumerate(range(0, plan.room_count, region_size)):
+        end = min(start + region_size, plan.room_count)
+        first_slot = plan.exit_offsets[start]
+        last_slot = plan.exit_offsets[end]
+        yield RegionTask(
+            seed=plan.seed,
+            index=index,
+            start=start,
+            exit_offsets=plan.exit_offsets[start : end + 1],
+            exit_targets=plan.exit_targets[first_slot:last_slot],
+            exit_directions=bytes(plan.exit_directions[first_slot:last_slot]),
+            exit_keys=plan.exit_keys[first_slot:last_slot],
+            items_by_room=buckets.get(index, {}),
+            coins=coins,
+        )
+
+
+def build_region(task: RegionTask) -> List[Dict[str, object]]:
+    """Build the rooms of one region; depends only on the seed and region index."""
+    rng = _rng(task.seed, f"region:{task.index}")
+    coins = task.coins
+    appearance = {
+        "coinsTemplate": "You see {coinCount} gold coin(s) scattered about.",
+        "emptyCoinsTemplate": "You see no coins here.",
+        "charactersTemplate": "{names} are here.",
+    }
+    offsets = task.exit_offsets
+    base = offsets[0]
+    rooms: List[Dict[str, object]] = []
+    for offset in range(len(offsets) - 1):
+        idx = task.start + offset
+        exits: Dict[str, Dict[str, object]] = {}
+        for slot in range(offsets[offset] - base, offsets[offset + 1] - base):
+            key = task.exit_keys[slot]
+            # A later door reusing a direction replaces the earlier one.
+            exits[DIRECTIONS[task.exit_directions[slot]]] = {
+                "target": f"room_{task.exit_targets[slot]}",
+                "locked": key >= 0,
+                "keyId": f"key_{key}" if key >= 0 else None,
+            }
+        adj = ROOM_ADJECTIVES[idx % len(ROOM_ADJECTIVES)]
+        noun = ROOM_NOUNS[idx % len(ROOM_NOUNS)]
+        coins_initial = int(round(rng.gauss(coins.mean, coins.std)))
+        coins_initial = min(max(coins_initial, coins.minimum), coins.maximum)
+        rooms.append(
+            {
+                "id": f"room_{idx}",
+                "name": f"{adj} {noun}",
+                "description": (
+                    f"A {adj.lower()} {noun.lower()} carved from damp stone. "
+                    "Faint echoes hint at unseen passages."
+                ),
+                "exits": exits,
+                "coins": {
+                    "initial": coins_initial,
+                    "respawn": {"enabled": False},
+                },
+                "objects": [],
+                "appearance": dict(appearance),
+                "items": list(task.items_by_room.get(idx, [])),
+            }
+        )
+    return rooms
+
+
+def render_region(task: RegionTask) -> str:
+    """Build one region and serialise it as a chunk of the ``rooms`` array."""
+    # One room per line: readable, and it keeps json on its C encoder, which
+    # any ``indent`` would turn off.
+    return ",\n".join("    " + json.dumps(room) for room in build_region(task))
+
+
+def _iter_rendered(tasks: Iterator[RegionTask], workers: int) -> Iterator[str]:
+    if workers <= 1:
+        for task in tasks:
+            yield render_region(task)
+        return
+    # Keep only a few regions in flight so memory stays flat.
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending: Deque[Future[str]] = deque()
+        for task in tasks:
+            pending.append(pool.submit(render_region, task))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _write_member(
+    out: IO[str], name: str, value: Dict[str, Dict[str, object]], last: bool
+) -> None:
+    out.write(f'  "{name}": {{')
+    for idx, (key, entry) in enumerate(value.items()):
+        out.write(",\n    " if idx else "\n    ")
+        out.write(f"{json.dumps(key)}: {json.dumps(entry)}")
+    out.write("\n  }" if value else "}")
+    out.write("\n" if last else ",\n")
+
+
+def write_world(
+    out: IO[str],
+    room_count: int,
+    seed: int,
+    workers: int = 1,
+    coins: Optional[CoinSettings] = None,
+    region_size: int = REGION_SIZE,
+) -> None:
+    """
+    Stream a generated world to ``out`` region by region.
+
+    Only a few regions are held in memory at a time. The text depends only
+    on ``room_count`` and ``seed``, never on ``workers``, and parses to
+    ``generate_world_definition`` with the same arguments.
+    """
+    plan = plan_world(room_count, seed)
+    tasks = region_tasks(plan, coins or CoinSettings(), region_size)
+    out.write('{\n  "worldName": "The Jungeon",\n  "rooms": [\n')
+    first = True
+    for chunk in _iter_rendered(tasks, workers):
+        if not first:
+            out.write(",\n")
+        out.write(chunk)
+        first = False
+    out.write("\n  ],\n")
+    _write_member(out, "items", plan.items, last=False)
+    _write_member(out, "ghosts", plan.ghosts, last=True)
+    out.write("}")
+
 
+def generate_world_definition(
+    room_count: int,
+    seed: int,
+    coins: Optional[CoinSettings] = None,
+    region_size: int = REGION_SIZE,
+) -> Dict[str, object]:
+    """Generate a complete world definition as a JSON-serialisable dict."""
+    plan = plan_world(room_count, seed)
+    rooms: List[Dict[str, object]] = []
+    for task in region_tasks(plan, coins or CoinSettings(), region_size):
+        rooms.extend(build_region(task))
     return {
         "worldName": "The Jungeon",
         "rooms": rooms,
-        "items": items,
-        "ghosts": ghosts,
+        "items": plan.items,
+        "ghosts": plan.ghosts,
     }
 
 
@@ -329,20 +415,39 @@ def main() -> None:
         default=100,
         help="Number of rooms to generate (default: 100)",
     )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="Seed for a reproducible world (default: random, printed at the end)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processes used to build regions; never changes the output (default: 1)",
+    )
     args = parser.parse_args()
+    if args.room_count < 1:
+        parser.error("--room-count must be at least 1")
+    seed = args.seed if args.seed is not None else random.SystemRandom().randrange(2**32)
 
-    world_def = generate_world_definition(args.room_count)
     DATA_DIR.mkdir(parents=True, exist_ok=True)
     with open(WORLD_FILE, "w", encoding="utf-8") as f:
-        json.dump(world_def, f, indent=2)
+        write_world(f, args.room_count, seed, workers=args.workers)
 
     # Reset dynamic state whenever a new world is generated.
-    if SAVE_FILE.exists():
-        SAVE_FILE.unlink()
+    for path in (
+        SAVE_FILE,
+        JOURNAL_FILE,
+        *DATA_DIR.glob(SAVE_FILE.name + ".*"),
+        *DATA_DIR.glob(SQLITE_FILE.name + "*"),
+    ):
+        if path.exists():
+            path.unlink()
 
-    print(f"Generated world with {args.room_count} rooms at {WORLD_FILE}")
+    print(f"Generated world with {args.room_count} rooms (seed {seed}) at {WORLD_FILE}")
 
 
 if __name__ == "__main__":
     main()
-
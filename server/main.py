@@ -1,7 +1,6 @@
 from __future__ import annotations
 
-import asyncio
-import random
+import os
 from pathlib import Path
 from typing import Any
 
@@ -16,13 +15,24 @@ from .schemas import ServerMessage
 from .services.connection_manager import ConnectionManager
 from .services.game_service import GameService
 from .services.persistence import PersistenceWorker
+from .services.presence import PresenceService
 from .sessions import SessionManager
-from .world import WorldEngine, WorldLoader, WorldRepository
+from .world import (
+    BaseWorldRepository,
+    SqliteWorldRepository,
+    TickScheduler,
+    WorldEngine,
+    WorldLoader,
+    WorldRepository,
+)
 
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 CLIENT_DIR = BASE_DIR / "client"
 DATA_DIR = BASE_DIR / "data"
+TICK_INTERVAL = 0.25
+# How long a dropped connection keeps its character before logging out.
+SESSION_GRACE_PERIOD = 30.0
 
 app = FastAPI(title="Jungeon MUD")
 
@@ -34,17 +44,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-loader = WorldLoader(DATA_DIR)
-repository = WorldRepository(DATA_DIR / "savegame.json")
+loader = WorldLoader(DATA_DIR, paged=os.environ.get("JUNGEON_PAGED_WORLD") == "1")
+repository: BaseWorldRepository
+if os.environ.get("JUNGEON_SAVE_BACKEND", "json") == "sqlite":
+    repository = SqliteWorldRepository(DATA_DIR / "savegame.sqlite3")
+else:
+    repository = WorldRepository(DATA_DIR / "savegame.json")
 persistence = PersistenceWorker(repository)
-world = WorldEngine(loader, repository, persistence)
+world = WorldEngine(
+    loader,
+    repository,
+    persistence,
+    vectorized_npcs=os.environ.get("JUNGEON_NPC_ENGINE", "python") == "numpy",
+)
 sessions = SessionManager()
 connections = ConnectionManager()
-game_service = GameService(world, sessions)
+presence = PresenceService(connections, debounce=None)
+game_service = GameService(world, sessions, grace_period=SESSION_GRACE_PERIOD)
 
 app.include_router(create_http_router(game_service))
 
-websocket_endpoint = create_websocket_endpoint(game_service, world, connections)
+websocket_endpoint = create_websocket_endpoint(
+    game_service, world, connections, presence
+)
 app.websocket("/ws")(websocket_endpoint)
 
 
@@ -60,23 +82,35 @@ app.mount(
 )
 
 
+async def move_ghosts() -> None:
+    events = world.move_ghosts_unlocked()
+    for pid, texts in events.items():
+        for text in texts:
+            await connections.send(
+                pid,
+                ServerMessage(
+                    type="event",
+                    data={"text": text},
+                ).model_dump(),
+            )
+
+
+scheduler = TickScheduler(world.lock, interval=TICK_INTERVAL)
+scheduler.register("ghosts", move_ghosts, every=12.0, exclusive=True)
+scheduler.register("coins", world.respawn_coins_unlocked, every=1.0, exclusive=True)
+scheduler.register("autosave", world.autosave_unlocked, every=60.0, exclusive=True)
+scheduler.register("presence", presence.flush, every=TICK_INTERVAL)
+
+
 @app.on_event("startup")
 async def start_background_tasks() -> None:
-    async def ghost_worker() -> None:
-        await asyncio.sleep(3)
-        while True:
-            await asyncio.sleep(random.uniform(8, 20))
-            events = await world.move_ghosts_and_collect_events()
-            if not events:
-                continue
-            for pid, texts in events.items():
-                for text in texts:
-                    await connections.send(
-                        pid,
-                        ServerMessage(
-                            type="event",
-                            data={"text": text},
-                        ).model_dump(),
-                    )
-
-    asyncio.create_task(ghost_worker())
+    scheduler.start()
+
+
+@app.on_event("shutdown")
+async def flush_persistence() -> None:
+    await scheduler.stop()
+    async with world.lock:
+        world.persist_moved_ghosts_unlocked()
+    await persistence.flush()
+    repository.close()
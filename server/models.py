@@ -1,10 +1,24 @@
 from __future__ import annotations
 
+from array import array
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Set
+from typing import (
+    AbstractSet,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+)
 
+# Shared by every room nobody is in, so empty rooms cost no set of their own.
+NOBODY: AbstractSet[str] = frozenset()
 
-@dataclass
+
+@dataclass(slots=True)
 class CharacterTemplate:
     id: str
     name: str
@@ -14,7 +28,7 @@ class CharacterTemplate:
     appearance_in_room: str
 
 
-@dataclass
+@dataclass(slots=True)
 class ItemDefinition:
     id: str
     name: str
@@ -23,15 +37,180 @@ class ItemDefinition:
     key_id: Optional[str] = None
 
 
-@dataclass
 class ExitDefinition:
-    direction: str
-    target_room_id: str
-    locked: bool = False
-    key_id: Optional[str] = None
+    """
+    One exit, read from and written back to its world's ``ExitTable``.
+
+    Exits are not stored as objects; this is a short-lived handle on one
+    slot of the table, so setting ``locked`` changes the world itself.
+    """
+
+    __slots__ = ("table", "slot")
+
+    def __init__(self, table: "ExitTable", slot: int) -> None:
+        self.table = table
+        self.slot = slot
+
+    @property
+    def direction(self) -> str:
+        return self.table.directions[self.table.direction_codes[self.slot]]
+
+    @property
+    def target(self) -> int:
+        return self.table.targets[self.slot]
+
+    @property
+    def target_room_id(self) -> str:
+        return self.table.room_ids[self.table.targets[self.slot]]
+
+    @property
+    def locked(self) -> bool:
+        return bool(self.table.locked[self.slot])
+
+    @locked.setter
+    def locked(self, value: bool) -> None:
+        self.table.locked[self.slot] = 1 if value else 0
+
+    @property
+    def key_id(self) -> Optional[str]:
+        return self.table.key_ids.get(self.slot)
+
+    def _values(self) -> Tuple[str, str, bool, Optional[str]]:
+        return (self.direction, self.target_room_id, self.locked, self.key_id)
 
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, ExitDefinition):
+            return NotImplemented
+        return self._values() == other._values()
+
+    def __repr__(self) -> str:
+        direction, target_room_id, locked, key_id = self._values()
+        return (
+            f"ExitDefinition(direction={direction!r}, target_room_id={target_room_id!r}, "
+            f"locked={locked!r}, key_id={key_id!r})"
+        )
+
+
+ExitSpec = Tuple[str, str, bool, Optional[str]]
+
+
+class ExitTable:
+    """
+    Every exit of a world in flat arrays, grouped by room.
+
+    Rooms are numbered in world order (``room_ids`` and ``room_index`` map
+    between ids and numbers). The exits of room ``n`` occupy slots
+    ``offsets[n]`` up to ``offsets[n + 1]`` of the parallel
+    ``direction_codes``, ``targets`` and ``locked`` arrays; the few keyed
+    doors keep their key id in ``key_ids`` by slot. An exit costs about ten
+    bytes this way instead of an object, a dict entry and its own copy of
+    the target id.
+    """
+
+    __slots__ = (
+        "room_ids",
+        "room_index",
+        "directions",
+        "_direction_codes",
+        "offsets",
+        "direction_codes",
+        "targets",
+        "locked",
+        "key_ids",
+    )
+
+    def __init__(self, room_ids: Iterable[str]) -> None:
+        self.room_ids: List[str] = list(room_ids)
+        self.room_index: Dict[str, int] = {
+            room_id: index for index, room_id in enumerate(self.room_ids)
+        }
+        if len(self.room_index) != len(self.room_ids):
+            raise ValueError("Room ids must be unique.")
+        self.directions: List[str] = []
+        self._direction_codes: Dict[str, int] = {}
+        self.offsets = array("i", [0])
+        self.direction_codes = array("B")
+        self.targets = array("i")
+        self.locked = bytearray()
+        self.key_ids: Dict[int, str] = {}
+
+    def add_room(self, exits: Iterable[ExitSpec]) -> "RoomExits":
+        """
+        Append the exits of the next room in ``room_ids`` order.
+
+        ``exits`` are ``(direction, target_room_id, locked, key_id)`` tuples.
+        """
+        room = len(self.offsets) - 1
+        if room >= len(self.room_ids):
+            raise ValueError("More rooms added than room ids given.")
+        for direction, target_room_id, locked, key_id in exits:
+            target = self.room_index.get(target_room_id)
+            if target is None:
+                raise ValueError(
+                    f"Exit {direction!r} of {self.room_ids[room]!r} leads to "
+                    f"unknown room {target_room_id!r}."
+                )
+            if key_id is not None:
+                self.key_ids[len(self.targets)] = key_id
+            self.direction_codes.append(self._direction_code(direction))
+            self.targets.append(target)
+            self.locked.append(1 if locked else 0)
+        self.offsets.append(len(self.targets))
+        return RoomExits(self, room)
 
-@dataclass
+    def _direction_code(self, direction: str) -> int:
+        code = self._direction_codes.get(direction)
+        if code is None:
+            code = len(self.directions)
+            if code > 255:
+                raise ValueError("A world can use at most 256 exit directions.")
+            self._direction_codes[direction] = code
+            self.directions.append(direction)
+        return code
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, ExitTable):
+            return NotImplemented
+        return all(
+            getattr(self, name) == getattr(other, name) for name in self.__slots__
+        )
+
+
+class RoomExits(Mapping[str, ExitDefinition]):
+    """The exits of one room, by direction, as stored in an ``ExitTable``."""
+
+    __slots__ = ("table", "room")
+
+    def __init__(self, table: ExitTable, room: int) -> None:
+        self.table = table
+        self.room = room
+
+    def _slots(self) -> range:
+        offsets = self.table.offsets
+        return range(offsets[self.room], offsets[self.room + 1])
+
+    def __getitem__(self, direction: str) -> ExitDefinition:
+        table = self.table
+        code = table._direction_codes.get(direction)
+        if code is not None:
+            for slot in self._slots():
+                if table.direction_codes[slot] == code:
+                    return ExitDefinition(table, slot)
+        raise KeyError(direction)
+
+    def __iter__(self) -> Iterator[str]:
+        table = self.table
+        for slot in self._slots():
+            yield table.directions[table.direction_codes[slot]]
+
+    def __len__(self) -> int:
+        return len(self._slots())
+
+    def __repr__(self) -> str:
+        return f"RoomExits({dict(self)!r})"
+
+
+@dataclass(slots=True)
 class RoomObject:
     id: str
     name: str
@@ -40,28 +219,65 @@ class RoomObject:
     state: str = "idle"
 
 
-@dataclass
+@dataclass(slots=True)
 class RoomDefinition:
     id: str
     name: str
     description: str
-    exits: Dict[str, ExitDefinition]
+    exits: Mapping[str, ExitDefinition]
     coins_initial: int
     coins_respawn: Dict[str, object]
     objects: List[RoomObject]
     appearance: Dict[str, str]
 
 
-@dataclass
+@dataclass(slots=True)
 class RoomState:
     id: str
     coins: int
-    players: Set[str] = field(default_factory=set)
+    players: AbstractSet[str] = NOBODY
     objects_state: Dict[str, str] = field(default_factory=dict)
     items: List[str] = field(default_factory=list)
+    version: int = 0
+    # Ghost ids currently here; kept in sync by the engine, not persisted.
+    ghosts: AbstractSet[str] = NOBODY
+
+    def touch(self) -> None:
+        """Record a change to coins, items or occupants; invalidates cached views."""
+        self.version += 1
+
+    # Most rooms are empty most of the time, so occupant sets are only
+    # allocated while someone is there.
+
+    def add_player(self, player_id: str) -> None:
+        self.players = _with(self.players, player_id)
+
+    def remove_player(self, player_id: str) -> None:
+        self.players = _without(self.players, player_id)
+
+    def add_ghost(self, ghost_id: str) -> None:
+        self.ghosts = _with(self.ghosts, ghost_id)
+
+    def remove_ghost(self, ghost_id: str) -> None:
+        self.ghosts = _without(self.ghosts, ghost_id)
+
+
+def _with(members: AbstractSet[str], member: str) -> AbstractSet[str]:
+    if isinstance(members, set):
+        members.add(member)
+        return members
+    return {member}
+
+
+def _without(members: AbstractSet[str], member: str) -> AbstractSet[str]:
+    if isinstance(members, set):
+        members.discard(member)
+        if members:
+            return members
+    return NOBODY
 
 
-@dataclass
+@dataclass(slots=True)
 class PlayerState:
     player_id: str
     character_id: str
@@ -80,14 +296,14 @@ class PlayerState:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class GhostState:
     id: str
     room_id: str
     description: str
 
 
-@dataclass
+@dataclass(slots=True)
 class CharacterSave:
     character_id: str
     room_id: str
@@ -95,16 +311,17 @@ class CharacterSave:
     items: List[str]
 
 
-@dataclass
+@dataclass(slots=True)
 class WorldConfig:
-    rooms: Dict[str, RoomDefinition]
+    rooms: Mapping[str, RoomDefinition]
     characters: Dict[str, CharacterTemplate]
     items: Dict[str, ItemDefinition]
     emotes: Dict[str, str]
     allowed_object_verbs: List[str]
+    exits: Optional[ExitTable] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class WorldState:
     config: WorldConfig
     rooms_state: Dict[str, RoomState]
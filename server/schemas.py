@@ -25,9 +25,16 @@ class LoginResponse(BaseModel):
     characterId: str
 
 
+class BatchedCommand(BaseModel):
+    seq: int
+    input: str
+
+
 class CommandMessage(BaseModel):
     type: str
     input: Optional[str] = None
+    # For ``type == "batch"``: commands run in order, answered in one frame.
+    commands: Optional[List[BatchedCommand]] = None
 
 
 class ServerMessage(BaseModel):
@@ -0,0 +1,279 @@
+from __future__ import annotations
+
+import struct
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Wire tags for message types; index == tag. Append only, never reorder:
+# clients map tags back to names with the same table.
+MESSAGE_TYPES = (
+    "roomState",
+    "roomDelta",
+    "inventory",
+    "event",
+    "error",
+    "onlinePlayers",
+    "playerJoined",
+    "playerLeft",
+    "batchResult",
+    "command",
+    "batch",
+    "resync",
+)
+TYPE_TAGS = {name: tag for tag, name in enumerate(MESSAGE_TYPES)}
+
+JSON_SUBPROTOCOL = "jungeon.json"
+MSGPACK_SUBPROTOCOL = "jungeon.msgpack"
+
+# Deepest array/map nesting ``unpack`` accepts; client frames are two levels.
+MAX_DEPTH = 32
+
+
+def pack(value: Any) -> bytes:
+    """Encode ``value`` as MessagePack (nil, bool, int, float, str, list, dict)."""
+    out = bytearray()
+    _pack_into(out, value)
+    return bytes(out)
+
+
+def _pack_into(out: bytearray, value: Any) -> None:
+    if value is None:
+        out.append(0xC0)
+    elif value is True:
+        out.append(0xC3)
+    elif value is False:
+        out.append(0xC2)
+    elif isinstance(value, int):
+        _pack_int(out, value)
+    elif isinstance(value, float):
+        out.append(0xCB)
+        out += struct.pack(">d", value)
+    elif isinstance(value, str):
+        data = value.encode("utf-8")
+        size = len(data)
+        if size < 32:
+            out.append(0xA0 | size)
+        elif size < 0x100:
+            out += struct.pack(">BB", 0xD9, size)
+        elif size < 0x10000:
+            out += struct.pack(">BH", 0xDA, size)
+        else:
+            out += struct.pack(">BI", 0xDB, size)
+        out += data
+    elif isinstance(value, (list, tuple)):
+        _pack_header(out, len(value), 0x90, 0xDC, 0xDD)
+        for item in value:
+            _pack_into(out, item)
+    elif isinstance(value, dict):
+        _pack_header(out, len(value), 0x80, 0xDE, 0xDF)
+        for key, item in value.items():
+            _pack_into(out, key)
+            _pack_into(out, item)
+    else:
+        raise TypeError(f"Cannot encode {type(value).__name__} as MessagePack.")
+
+
+# Integer encodings from narrowest to widest: (code, struct format, bound).
+_UINTS = ((0xCC, ">BB", 1 << 8), (0xCD, ">BH", 1 << 16), (0xCE, ">BI", 1 << 32))
+_INTS = ((0xD0, ">Bb", 1 << 7), (0xD1, ">Bh", 1 << 15), (0xD2, ">Bi", 1 << 31))
+
+
+def _pack_int(out: bytearray, value: int) -> None:
+    if 0 <= value < 0x80:
+        out.append(value)
+        return
+    if -32 <= value < 0:
+        out.append(value & 0xFF)
+        return
+    if not -(1 << 63) <= value < 1 << 64:
+        raise ValueError(f"Integer {value} does not fit in 64 bits.")
+    if value >= 0:
+        for code, fmt, bound in _UINTS:
+            if value < bound:
+                out += struct.pack(fmt, code, value)
+                return
+        out += struct.pack(">BQ", 0xCF, value)
+        return
+    for code, fmt, bound in _INTS:
+        if value >= -bound:
+            out += struct.pack(fmt, code, value)
+            return
+    out += struct.pack(">Bq", 0xD3, value)
+
+
+def _pack_header(out: bytearray, size: int, fix: int, code16: int, code32: int) -> None:
+    if size < 16:
+        out.append(fix | size)
+    elif size < 0x10000:
+        out += struct.pack(">BH", code16, size)
+    else:
+        out += struct.pack(">BI", code32, size)
+
+
+# Fixed-width MessagePack types: code -> (struct format, size).
+_FIXED = {
+    0xCA: (">f", 4),
+    0xCB: (">d", 8),
+    0xCC: (">B", 1),
+    0xCD: (">H", 2),
+    0xCE: (">I", 4),
+    0xCF: (">Q", 8),
+    0xD0: (">b", 1),
+    0xD1: (">h", 2),
+    0xD2: (">i", 4),
+    0xD3: (">q", 8),
+}
+# Length-prefixed strings, arrays and maps: code -> (length format, size).
+_SIZED = {
+    0xD9: (">B", 1),
+    0xDA: (">H", 2),
+    0xDB: (">I", 4),
+    0xDC: (">H", 2),
+    0xDD: (">I", 4),
+    0xDE: (">H", 2),
+    0xDF: (">I", 4),
+}
+
+
+def unpack(frame: bytes) -> Any:
+    """
+    Decode one MessagePack value; the inverse of ``pack``.
+
+    Any malformed input raises ``ValueError``: truncated data, unsupported
+    types, map keys other than str or int, or nesting deeper than
+    ``MAX_DEPTH``.
+    """
+    try:
+        value, offset = _unpack_from(frame, 0, 0)
+    except (struct.error, TypeError, IndexError, RecursionError) as exc:
+        raise ValueError("Malformed MessagePack value.") from exc
+    if offset != len(frame):
+        raise ValueError("Trailing bytes after MessagePack value.")
+    return value
+
+
+def _unpack_from(frame: bytes, offset: int, depth: int) -> Tuple[Any, int]:
+    if offset >= len(frame):
+        raise ValueError("Truncated MessagePack value.")
+    code = frame[offset]
+    offset += 1
+    if code < 0x80:
+        return code, offset
+    if code >= 0xE0:
+        return code - 0x100, offset
+    if code == 0xC0:
+        return None, offset
+    if code in (0xC2, 0xC3):
+        return code == 0xC3, offset
+    if code in _FIXED:
+        fmt, size = _FIXED[code]
+        (value,) = struct.unpack_from(fmt, frame, offset)
+        return value, offset + size
+    if 0xA0 <= code < 0xC0:
+        return _unpack_str(frame, offset, code & 0x1F)
+    if 0x90 <= code < 0xA0:
+        return _unpack_array(frame, offset, code & 0x0F, depth)
+    if 0x80 <= code < 0x90:
+        return _unpack_map(frame, offset, code & 0x0F, depth)
+    if code in _SIZED:
+        fmt, size = _SIZED[code]
+        (length,) = struct.unpack_from(fmt, frame, offset)
+        offset += size
+        if code <= 0xDB:
+            return _unpack_str(frame, offset, length)
+        if code <= 0xDD:
+            return _unpack_array(frame, offset, length, depth)
+        return _unpack_map(frame, offset, length, depth)
+    raise ValueError(f"Unsupported MessagePack type 0x{code:02x}.")
+
+
+def _unpack_str(frame: bytes, offset: int, size: int) -> Tuple[str, int]:
+    end = offset + size
+    if end > len(frame):
+        raise ValueError("Truncated MessagePack value.")
+    return frame[offset:end].decode("utf-8"), end
+
+
+def _nested(depth: int) -> int:
+    if depth >= MAX_DEPTH:
+        raise ValueError("MessagePack value is nested too deeply.")
+    return depth + 1
+
+
+def _unpack_array(
+    frame: bytes, offset: int, size: int, depth: int
+) -> Tuple[List[Any], int]:
+    depth = _nested(depth)
+    items = []
+    for _ in range(size):
+        item, offset = _unpack_from(frame, offset, depth)
+        items.append(item)
+    return items, offset
+
+
+def _unpack_map(
+    frame: bytes, offset: int, size: int, depth: int
+) -> Tuple[Dict[Any, Any], int]:
+    depth = _nested(depth)
+    result = {}
+    for _ in range(size):
+        key, offset = _unpack_from(frame, offset, depth)
+        if not isinstance(key, (str, int)) or isinstance(key, bool):
+            raise ValueError("MessagePack map keys must be strings or integers.")
+        result[key], offset = _unpack_from(frame, offset, depth)
+    return result, offset
+
+
+class MessagePackCodec:
+    """
+    Binary frames for the ``jungeon.msgpack`` subprotocol.
+
+    Every frame is a MessagePack array ``[tag, body]`` where ``tag`` is the
+    message type's index in ``MESSAGE_TYPES`` (or the type name itself for
+    types missing from the table). Server messages carry their ``data`` as
+    the body, plus a third ``seq`` element on resumable connections; client
+    messages carry their remaining fields as a map.
+    """
+
+    subprotocol = MSGPACK_SUBPROTOCOL
+
+    def encode(self, message: Dict[str, Any]) -> bytes:
+        message_type = message["type"]
+        return pack([TYPE_TAGS.get(message_type, message_type), message["data"]])
+
+    def stamp(self, frame: bytes, seq: int) -> bytes:
+        """Turn an encoded ``[tag, body]`` into ``[tag, body, seq]`` in place."""
+        return b"\x93" + frame[1:] + pack(seq)
+
+    def decode(self, frame: bytes) -> Dict[str, Any]:
+        value = unpack(frame)
+        if not isinstance(value, list) or len(value) != 2:
+            raise ValueError("Expected a [tag, body] frame.")
+        tag, body = value
+        if isinstance(tag, int):
+            if not 0 <= tag < len(MESSAGE_TYPES):
+                raise ValueError(f"Unknown message tag {tag}.")
+            tag = MESSAGE_TYPES[tag]
+        if not isinstance(body, dict):
+            raise ValueError("Expected a map as the message body.")
+        return {**body, "type": tag}
+
+
+MSGPACK = MessagePackCodec()
+
+
+def negotiate(
+    offered: Iterable[str], requested: Optional[str]
+) -> Tuple[Optional[str], Optional[MessagePackCodec]]:
+    """
+    Pick a connection's codec; ``None`` means JSON text frames.
+
+    A ``Sec-WebSocket-Protocol`` offer wins and the chosen name is returned
+    so it can be echoed back on accept. Otherwise the ``codec`` query
+    parameter decides, and anything but ``msgpack`` stays on JSON.
+    """
+    for name in offered:
+        if name == MSGPACK_SUBPROTOCOL:
+            return name, MSGPACK
+        if name == JSON_SUBPROTOCOL:
+            return name, None
+    return None, MSGPACK if requested == "msgpack" else None
@@ -1,11 +1,29 @@
 from __future__ import annotations
 
+import asyncio
+import json
+from collections import deque
 from dataclasses import dataclass
-from typing import Dict
+from typing import Deque, Dict, Iterable, List, Literal, Optional, Tuple, Union
 
 from fastapi import WebSocket
 
 from ..world.engine import WorldEngine
+from .codec import MessagePackCodec
+
+OverflowPolicy = Literal["drop_oldest", "disconnect"]
+# JSON text or binary (MessagePack) websocket frame.
+Frame = Union[str, bytes]
+
+
+def encode_message(message: Dict[str, object]) -> str:
+    """Encode a message exactly like ``WebSocket.send_json`` would."""
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+
+def stamp_message(frame: str, seq: int) -> str:
+    """Add a leading ``seq`` field to an encoded JSON message."""
+    return f'{{"seq":{seq},{frame[1:]}'
 
 
 @dataclass
@@ -13,57 +31,289 @@ class BroadcastEvent:
     player_id: str
     text: str
     include_self: bool = False
+    # Room the event happened in; when unset, the player's current room.
+    room_id: Optional[str] = None
+
+
+class ClientConnection:
+    """
+    One attached websocket plus its bounded outbound queue.
+
+    Frames are queued pre-encoded (JSON text, or binary when the connection
+    negotiated a ``codec``) without awaiting the socket; a writer task
+    started on demand drains the queue in order and exits once it is empty,
+    so a slow client only ever delays its own messages.
+    """
+
+    def __init__(
+        self,
+        ws: WebSocket,
+        max_queue: int,
+        codec: Optional[MessagePackCodec] = None,
+    ) -> None:
+        self.ws = ws
+        self.max_queue = max_queue
+        self.codec = codec
+        self.dropped = 0
+        self.closed = False
+        self._queue: Deque[Frame] = deque()
+        self._task: Optional[asyncio.Task[None]] = None
+
+    @property
+    def depth(self) -> int:
+        return len(self._queue)
+
+    def is_full(self) -> bool:
+        return len(self._queue) >= self.max_queue
+
+    def drop_oldest(self) -> None:
+        self._queue.popleft()
+        self.dropped += 1
+
+    def encode(self, message: Dict[str, object]) -> Frame:
+        if self.codec:
+            return self.codec.encode(message)
+        return encode_message(message)
+
+    def stamp(self, frame: Frame, seq: int) -> Frame:
+        if isinstance(frame, bytes) and self.codec:
+            return self.codec.stamp(frame, seq)
+        return stamp_message(str(frame), seq)
+
+    def enqueue(self, frame: Frame) -> None:
+        if self.closed:
+            return
+        self._queue.append(frame)
+        if not self._task or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._drain_queue())
+
+    async def _drain_queue(self) -> None:
+        while self._queue:
+            frame = self._queue.popleft()
+            try:
+                if isinstance(frame, bytes):
+                    await self.ws.send_bytes(frame)
+                else:
+                    await self.ws.send_text(frame)
+            except Exception:
+                # The socket is gone; cleanup happens on disconnect.
+                self._queue.clear()
+                return
+
+    async def flush(self) -> None:
+        """Wait until everything queued so far has been written."""
+        if self._task and not self._task.done():
+            await self._task
+
+    async def close(self, code: int) -> None:
+        self.closed = True
+        self._queue.clear()
+        if self._task and not self._task.done():
+            self._task.cancel()
+        try:
+            await self.ws.close(code=code)
+        except Exception:
+            pass
+
+
+class ReplayBuffer:
+    """The last ``size`` messages sent to one player, numbered from 1."""
+
+    def __init__(self, size: int) -> None:
+        self.seq = 0
+        self._messages: Deque[Tuple[int, Dict[str, object]]] = deque(maxlen=size)
+
+    def record(self, message: Dict[str, object]) -> int:
+        self.seq += 1
+        self._messages.append((self.seq, message))
+        return self.seq
+
+    def since(self, last_seq: int) -> Optional[List[Tuple[int, Dict[str, object]]]]:
+        """Messages after ``last_seq``, or None if some have been evicted."""
+        oldest = self._messages[0][0] if self._messages else self.seq + 1
+        if not oldest - 1 <= last_seq <= self.seq:
+            return None
+        return [(seq, message) for seq, message in self._messages if seq > last_seq]
 
 
 class ConnectionManager:
-    """Track active websocket connections per player."""
+    """
+    Track active websocket connections per player.
 
-    def __init__(self) -> None:
-        self._connections: Dict[str, WebSocket] = {}
+    Each connection gets its own outbound queue of at most ``max_queue``
+    messages. When a client falls behind, ``overflow`` decides what happens:
+    ``"drop_oldest"`` discards its oldest queued message, ``"disconnect"``
+    closes the slow connection.
 
-    def attach(self, player_id: str, ws: WebSocket) -> None:
-        self._connections[player_id] = ws
+    Resumable connections also number every message they are sent and keep
+    the last ``replay_size`` in a ``ReplayBuffer`` that outlives the socket,
+    so messages sent while the player is away can be replayed when they
+    come back. ``forget`` drops the buffer once the session ends.
+    """
 
-    def detach(self, player_id: str) -> None:
-        self._connections.pop(player_id, None)
+    SLOW_CONSUMER_CLOSE_CODE = 1008
+    REPLACED_CLOSE_CODE = 4001
+
+    def __init__(
+        self,
+        max_queue: int = 256,
+        overflow: OverflowPolicy = "drop_oldest",
+        replay_size: int = 256,
+    ) -> None:
+        if overflow not in ("drop_oldest", "disconnect"):
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        self.max_queue = max_queue
+        self.overflow = overflow
+        self.replay_size = replay_size
+        self._connections: Dict[str, ClientConnection] = {}
+        self._replay: Dict[str, ReplayBuffer] = {}
+
+    def attach(
+        self,
+        player_id: str,
+        ws: WebSocket,
+        codec: Optional[MessagePackCodec] = None,
+        resumable: bool = False,
+    ) -> None:
+        """
+        Track ``ws``; ``codec`` picks binary frames, JSON text otherwise.
+
+        A socket already attached for the player is closed: only the newest
+        connection of a session stays live.
+        """
+        previous = self._connections.get(player_id)
+        self._connections[player_id] = ClientConnection(ws, self.max_queue, codec)
+        if previous and previous.ws is not ws:
+            previous.closed = True
+            asyncio.get_running_loop().create_task(
+                previous.close(code=self.REPLACED_CLOSE_CODE)
+            )
+        if not resumable:
+            self._replay.pop(player_id, None)
+        elif player_id not in self._replay:
+            self._replay[player_id] = ReplayBuffer(self.replay_size)
+
+    def detach(self, player_id: str, ws: Optional[WebSocket] = None) -> None:
+        """Stop sending to the player; with ``ws``, only if it is still theirs."""
+        conn = self._connections.get(player_id)
+        if not conn or (ws is not None and conn.ws is not ws):
+            return
+        del self._connections[player_id]
+        conn.closed = True
+
+    def forget(self, player_id: str) -> None:
+        """Detach the player and drop their replay buffer."""
+        self.detach(player_id)
+        self._replay.pop(player_id, None)
+
+    def replay(self, player_id: str, last_seq: int) -> bool:
+        """
+        Resend everything after ``last_seq`` on the player's new connection.
+
+        Returns False, sending nothing, when the buffer no longer reaches
+        back that far; the caller then has to send the full state instead.
+        """
+        buffer = self._replay.get(player_id)
+        conn = self._connections.get(player_id)
+        missed = buffer.since(last_seq) if buffer else None
+        if missed is None or conn is None:
+            return False
+        for seq, message in missed:
+            self._enqueue(player_id, conn.stamp(conn.encode(message), seq))
+        return True
 
     def get(self, player_id: str) -> WebSocket | None:
-        return self._connections.get(player_id)
+        conn = self._connections.get(player_id)
+        return conn.ws if conn else None
 
     def get_all_connected_player_ids(self) -> list[str]:
         """Return a list of all currently connected player IDs."""
         return list(self._connections.keys())
 
+    def queue_depth(self, player_id: str) -> int:
+        conn = self._connections.get(player_id)
+        return conn.depth if conn else 0
+
+    def queue_depths(self) -> Dict[str, int]:
+        return {pid: conn.depth for pid, conn in self._connections.items()}
+
     async def send(self, player_id: str, message: Dict[str, object]) -> None:
-        ws = self._connections.get(player_id)
-        if not ws:
+        """Queue ``message`` for ``player_id`` without waiting for the socket."""
+        await self.send_many((player_id,), message)
+
+    async def send_many(
+        self, player_ids: Iterable[str], message: Dict[str, object]
+    ) -> None:
+        """
+        Encode ``message`` once per codec and queue it for every player.
+
+        Players with a replay buffer get it recorded there, and numbered,
+        even while they have no connection.
+        """
+        frames: Dict[Optional[MessagePackCodec], Frame] = {}
+        for player_id in player_ids:
+            buffer = self._replay.get(player_id)
+            seq = buffer.record(message) if buffer else None
+            conn = self._connections.get(player_id)
+            if not conn:
+                continue
+            frame = frames.get(conn.codec)
+            if frame is None:
+                frame = frames[conn.codec] = conn.encode(message)
+            if seq is not None:
+                frame = conn.stamp(frame, seq)
+            self._enqueue(player_id, frame)
+
+    def _enqueue(self, player_id: str, frame: Frame) -> None:
+        conn = self._connections.get(player_id)
+        if not conn:
             return
-        try:
-            await ws.send_json(message)
-        except RuntimeError:
-            # Connection cleanup happens on disconnect.
-            pass
+        if conn.is_full():
+            if self.overflow == "disconnect":
+                self._disconnect_slow_consumer(player_id, conn)
+                return
+            conn.drop_oldest()
+        conn.enqueue(frame)
+
+    def _disconnect_slow_consumer(self, player_id: str, conn: ClientConnection) -> None:
+        # Closing the socket makes the websocket endpoint run its usual
+        # disconnect cleanup (release player, presence update).
+        self.detach(player_id)
+        asyncio.get_running_loop().create_task(
+            conn.close(code=self.SLOW_CONSUMER_CLOSE_CODE)
+        )
 
     async def send_to_all(self, message: Dict[str, object]) -> None:
-        """Send a message to all connected players."""
-        for player_id in self._connections.keys():
-            await self.send(player_id, message)
+        """Send a message to all connected (or resumable) players."""
+        player_ids = list(self._connections)
+        player_ids += [pid for pid in self._replay if pid not in self._connections]
+        await self.send_many(player_ids, message)
+
+    async def flush(self, player_id: Optional[str] = None) -> None:
+        """Wait for queued messages to be written, for one player or everyone."""
+        if player_id is not None:
+            conn = self._connections.get(player_id)
+            if conn:
+                await conn.flush()
+            return
+        await asyncio.gather(*(conn.flush() for conn in list(self._connections.values())))
 
     async def broadcast_room_event(
         self, world: WorldEngine, event: BroadcastEvent
     ) -> None:
-        player = await world.get_player(event.player_id)
-        if not player:
-            return
-        player_ids = await world.get_room_player_ids(player.room_id)
+        room_id = event.room_id
+        if room_id is None:
+            player = await world.get_player(event.player_id)
+            if not player:
+                return
+            room_id = player.room_id
+        player_ids = await world.get_room_player_ids(room_id)
         payload = {"type": "event", "data": {"text": event.text}}
-        for pid in player_ids:
-            if not event.include_self and pid == event.player_id:
-                continue
-            ws = self._connections.get(pid)
-            if not ws:
-                continue
-            try:
-                await ws.send_json(payload)
-            except RuntimeError:
-                continue
+        await self.send_many(
+            (
+                pid
+                for pid in player_ids
+                if event.include_self or pid != event.player_id
+            ),
+            payload,
+        )
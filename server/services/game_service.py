@@ -1,7 +1,8 @@
 from __future__ import annotations
 
+import asyncio
 import uuid
-from typing import Optional, Tuple
+from typing import Awaitable, Callable, Dict, Optional, Tuple
 
 from ..models import PlayerState
 from ..sessions import Session, SessionManager
@@ -9,11 +10,24 @@ from ..world.engine import WorldEngine
 
 
 class GameService:
-    """High-level facade exposing operations used by HTTP and websocket layers."""
+    """
+    High-level facade exposing operations used by HTTP and websocket layers.
 
-    def __init__(self, world: WorldEngine, sessions: SessionManager) -> None:
+    A session whose socket drops is ``suspend``ed rather than ended: its
+    player stays allocated for ``grace_period`` seconds so a reconnect can
+    ``resume`` it without a logout/login round trip.
+    """
+
+    def __init__(
+        self,
+        world: WorldEngine,
+        sessions: SessionManager,
+        grace_period: float = 0.0,
+    ) -> None:
         self.world = world
         self.sessions = sessions
+        self.grace_period = grace_period
+        self._expiring: Dict[str, asyncio.Task[None]] = {}
 
     async def list_available_characters(self):
         return await self.world.get_available_characters()
@@ -30,6 +44,33 @@ class GameService:
     def remove_session(self, session_id: str) -> None:
         self.sessions.remove_session(session_id)
 
+    async def suspend(
+        self, session_id: str, on_expire: Callable[[], Awaitable[None]]
+    ) -> None:
+        """Run ``on_expire`` unless the session is resumed within the grace period."""
+        self.resume(session_id)
+        if self.grace_period <= 0:
+            await on_expire()
+            return
+        self._expiring[session_id] = asyncio.get_running_loop().create_task(
+            self._expire_later(session_id, on_expire)
+        )
+
+    def resume(self, session_id: str) -> bool:
+        """Cancel a pending expiry; True if the session was suspended."""
+        task = self._expiring.pop(session_id, None)
+        if task is None:
+            return False
+        task.cancel()
+        return True
+
+    async def _expire_later(
+        self, session_id: str, on_expire: Callable[[], Awaitable[None]]
+    ) -> None:
+        await asyncio.sleep(self.grace_period)
+        del self._expiring[session_id]
+        await on_expire()
+
     async def release_player(self, player_id: str) -> None:
         await self.world.release_player(player_id)
 
@@ -38,12 +79,3 @@ class GameService:
 
     async def get_inventory(self, player_id: str):
         return await self.world.get_inventory(player_id)
-
-    async def get_online_player_names(self, player_ids: list[str]) -> list[dict[str, str]]:
-        """Get names for a list of player IDs. Returns list of dicts with 'playerId' and 'name'."""
-        result = []
-        for pid in player_ids:
-            player = await self.world.get_player(pid)
-            if player:
-                result.append({"playerId": pid, "name": player.name})
-        return result
@@ -1,35 +1,153 @@
 from __future__ import annotations
 
 import asyncio
-from typing import Dict, Optional
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
 
-from ..world.repository import WorldRepository
+from ..world.repository import BaseWorldRepository, merge_payloads
+
+SnapshotBuilder = Callable[[], Dict[str, object]]
+
+
+@dataclass
+class PersistenceStats:
+    scheduled: int = 0
+    written: int = 0
+    coalesced: int = 0
 
 
 class PersistenceWorker:
-    """Background task that writes save payloads without blocking the game loop."""
+    """
+    Background task that writes save payloads without blocking the game loop.
 
-    def __init__(self, repository: WorldRepository) -> None:
+    Pending work is collapsed latest-wins: deltas scheduled while a write is
+    pending are merged into it, and a snapshot replaces everything queued
+    before it. Snapshots are queued as builders and assembled in the writer
+    thread. A write is debounced until ``min_interval`` seconds have passed
+    since both the last write and the last change, but pending work is never
+    held longer than ``max_staleness`` seconds after it was first queued; the
+    staleness cap wins when it is the shorter of the two.
+    """
+
+    def __init__(
+        self,
+        repository: BaseWorldRepository,
+        min_interval: float = 1.0,
+        max_staleness: float = 5.0,
+    ) -> None:
         self.repository = repository
-        self._queue: asyncio.Queue[Dict[str, object]] = asyncio.Queue()
+        self.min_interval = min_interval
+        self.max_staleness = max_staleness
+        self.stats = PersistenceStats()
+        self._pending_snapshot: Optional[SnapshotBuilder] = None
+        self._pending_delta: Optional[Dict[str, object]] = None
+        self._pending_since = 0.0
+        self._last_change = 0.0
+        self._last_write = float("-inf")
+        self._flush_requested = False
+        self._wakeup = asyncio.Event()
         self._task: Optional[asyncio.Task[None]] = None
 
     def schedule_save(self, payload: Dict[str, object]) -> None:
+        """Queue a full snapshot write."""
+        self.schedule_snapshot(lambda: payload)
+
+    def schedule_snapshot(self, build: Callable[[], Dict[str, object]]) -> None:
+        """
+        Queue a full snapshot whose payload ``build`` produces at write time.
+
+        ``build`` runs in the writer thread, so a whole-world payload is never
+        assembled on the event loop; deltas queued after it are merged on top
+        of what it returns.
+        """
+        self._schedule(build, None)
+
+    def schedule_delta(self, payload: Dict[str, object]) -> None:
+        """Queue a journal append holding only changed entities."""
+        self._schedule(None, payload)
+
+    def _schedule(
+        self, build: Optional[SnapshotBuilder], delta: Optional[Dict[str, object]]
+    ) -> None:
+        self.stats.scheduled += 1
         try:
             loop = asyncio.get_running_loop()
         except RuntimeError:
             # Called outside the event loop (e.g., during startup); write synchronously.
-            self.repository.write_save(payload)
+            self._write(build, delta)
             return
 
-        self._queue.put_nowait(payload)
+        self._last_change = loop.time()
+        if self._pending_snapshot is None and self._pending_delta is None:
+            self._pending_since = self._last_change
+        else:
+            self.stats.coalesced += 1
+
+        if build is not None:
+            # A snapshot already contains every change queued before it.
+            self._pending_snapshot = build
+            self._pending_delta = None
+        elif self._pending_delta is not None and delta is not None:
+            merge_payloads(self._pending_delta, delta)
+        else:
+            self._pending_delta = delta
+
         if not self._task or self._task.done():
-            self._task = loop.create_task(self._drain_queue())
-
-    async def _drain_queue(self) -> None:
-        while not self._queue.empty():
-            payload = await self._queue.get()
-            try:
-                await asyncio.to_thread(self.repository.write_save, payload)
-            finally:
-                self._queue.task_done()
+            self._task = loop.create_task(self._drain_pending())
+
+    def _take_pending(
+        self,
+    ) -> Optional[Tuple[Optional[SnapshotBuilder], Optional[Dict[str, object]]]]:
+        if self._pending_snapshot is None and self._pending_delta is None:
+            return None
+        pending = (self._pending_snapshot, self._pending_delta)
+        self._pending_snapshot = None
+        self._pending_delta = None
+        return pending
+
+    def _write(
+        self, build: Optional[SnapshotBuilder], delta: Optional[Dict[str, object]]
+    ) -> None:
+        if build is not None:
+            payload = build()
+            if delta is not None:
+                merge_payloads(payload, delta)
+            self.repository.write_save(payload)
+        elif delta is not None:
+            self.repository.write_delta(delta)
+        self.stats.written += 1
+
+    async def _drain_pending(self) -> None:
+        loop = asyncio.get_running_loop()
+        while self._pending_snapshot is not None or self._pending_delta is not None:
+            quiet_since = max(self._last_write, self._last_change)
+            due = min(
+                quiet_since + self.min_interval,
+                self._pending_since + self.max_staleness,
+            )
+            delay = due - loop.time()
+            if delay > 0 and not self._flush_requested:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            pending = self._take_pending()
+            if pending is None:
+                break
+            await asyncio.to_thread(self._write, *pending)
+            self._last_write = loop.time()
+
+    async def flush(self) -> None:
+        """Write anything pending right away, e.g. on shutdown."""
+        self._flush_requested = True
+        try:
+            self._wakeup.set()
+            if self._task and not self._task.done():
+                await self._task
+            pending = self._take_pending()
+            if pending is not None:
+                await asyncio.to_thread(self._write, *pending)
+        finally:
+            self._flush_requested = False
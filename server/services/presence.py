@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Dict, List, Optional, Set
+
+from ..schemas import ServerMessage
+from .connection_manager import ConnectionManager
+
+
+class PresenceService:
+    """
+    Maintain the roster of online players and broadcast changes as deltas.
+
+    A player gets the full roster once, when they attach. After that everyone
+    only receives ``playerJoined``/``playerLeft`` deltas. Changes are
+    collected for ``debounce`` seconds so a join storm becomes one batched
+    frame. That frame is encoded once for all recipients, so a recipient can
+    see themselves in it. The initial roster carries ``selfId`` so the client
+    can skip its own entry.
+
+    With ``debounce=None`` no timer is started and ``flush`` is expected to
+    be driven externally, e.g. by the world tick scheduler.
+    """
+
+    def __init__(
+        self, connections: ConnectionManager, debounce: Optional[float] = 0.25
+    ) -> None:
+        self.connections = connections
+        self.debounce = debounce
+        self._roster: Dict[str, str] = {}
+        self._pending_joined: Dict[str, str] = {}
+        self._pending_left: Set[str] = set()
+        self._task: Optional[asyncio.Task[None]] = None
+
+    def online_players(self) -> List[Dict[str, str]]:
+        return [
+            {"playerId": pid, "name": name} for pid, name in self._roster.items()
+        ]
+
+    async def join(self, player_id: str, name: str) -> None:
+        """Add a player and send them the current roster (without themselves)."""
+        self._roster[player_id] = name
+        await self.send_roster(player_id)
+        if player_id in self._pending_left:
+            # Left and came back within one window; others never saw the gap.
+            self._pending_left.discard(player_id)
+            return
+        self._pending_joined[player_id] = name
+        self._schedule_flush()
+
+    async def send_roster(self, player_id: str) -> None:
+        """Send ``player_id`` the full roster again, e.g. after a reconnect."""
+        others = [p for p in self.online_players() if p["playerId"] != player_id]
+        await self.connections.send(
+            player_id,
+            ServerMessage(
+                type="onlinePlayers",
+                data={"players": others, "selfId": player_id},
+            ).model_dump(),
+        )
+
+    def leave(self, player_id: str) -> None:
+        if self._roster.pop(player_id, None) is None:
+            return
+        if self._pending_joined.pop(player_id, None) is not None:
+            # Joined and left within one window; nobody needs to hear about it.
+            return
+        self._pending_left.add(player_id)
+        self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        if self.debounce is None:
+            return
+        if self._task and not self._task.done():
+            return
+        self._task = asyncio.get_running_loop().create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.debounce or 0)
+        await self.flush()
+
+    async def flush(self) -> None:
+        """Broadcast pending joins and leaves as one frame each."""
+        if self._task and self._task is not asyncio.current_task():
+            self._task.cancel()
+        joined, self._pending_joined = self._pending_joined, {}
+        left, self._pending_left = self._pending_left, set()
+        recipients = list(self._roster.keys())
+        if joined:
+            await self.connections.send_many(
+                recipients,
+                ServerMessage(
+                    type="playerJoined",
+                    data={
+                        "players": [
+                            {"playerId": pid, "name": name}
+                            for pid, name in joined.items()
+                        ]
+                    },
+                ).model_dump(),
+            )
+        if left:
+            await self.connections.send_many(
+                recipients,
+                ServerMessage(
+                    type="playerLeft", data={"playerIds": list(left)}
+                ).model_dump(),
+            )
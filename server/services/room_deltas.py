@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Optional
+
+
+class RoomStateDeltas:
+    """
+    Turn one client's ``roomState`` messages into versioned deltas.
+
+    Every room view sent gets the next ``version``. The first view, and the
+    first one after a room change or a ``forget``, goes out in full as
+    ``roomState``; after that only the fields that changed since the last
+    view are sent, as a ``roomDelta`` naming the ``baseVersion`` it applies
+    to. A client holding a different version (e.g. because a frame was
+    dropped from its queue) asks for a resync instead of applying it.
+    """
+
+    def __init__(self) -> None:
+        self.version = 0
+        self._last: Optional[Dict[str, Any]] = None
+
+    def encode(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        if message.get("type") != "roomState":
+            return message
+        room: Dict[str, Any] = message["data"]
+        base = self._last
+        self.version += 1
+        self._last = dict(room)
+        if base is None or base.get("roomId") != room.get("roomId"):
+            return {"type": "roomState", "data": {**room, "version": self.version}}
+        changed = {key: value for key, value in room.items() if base.get(key) != value}
+        return {
+            "type": "roomDelta",
+            "data": {
+                **changed,
+                "version": self.version,
+                "baseVersion": self.version - 1,
+            },
+        }
+
+    def forget(self) -> None:
+        """Send the next view in full."""
+        self._last = None
@@ -1,5 +1,14 @@
 from .engine import WorldEngine
 from .loader import WorldLoader
-from .repository import WorldRepository
+from .repository import BaseWorldRepository, WorldRepository
+from .sqlite_repository import SqliteWorldRepository
+from .ticks import TickScheduler
 
-__all__ = ["WorldEngine", "WorldLoader", "WorldRepository"]
+__all__ = [
+    "BaseWorldRepository",
+    "SqliteWorldRepository",
+    "TickScheduler",
+    "WorldEngine",
+    "WorldLoader",
+    "WorldRepository",
+]
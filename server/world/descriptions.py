@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from ..models import (
+    PlayerState,
+    RoomDefinition,
+    RoomState,
+    WorldConfig,
+    compose_room_description,
+)
+
+
+class RoomDescriptionCache:
+    """
+    Memoise ``compose_room_description`` per room and viewer.
+
+    A description only depends on the room's coins, items and occupants, all
+    of which bump ``RoomState.version``. Entries are keyed by the room and
+    the viewer excluded from the occupant list, and remember the version they
+    were built for, so a stale entry is simply rebuilt in place. The least
+    recently used entries are evicted beyond ``max_entries``.
+    """
+
+    def __init__(self, config: WorldConfig, max_entries: int = 10_000) -> None:
+        self.config = config
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[str, Optional[str]], Tuple[int, str]]" = (
+            OrderedDict()
+        )
+
+    def describe(
+        self,
+        room_def: RoomDefinition,
+        room_state: RoomState,
+        players: Dict[str, PlayerState],
+        viewer_id: Optional[str],
+    ) -> str:
+        if viewer_id not in room_state.players:
+            viewer_id = None
+        key = (room_state.id, viewer_id)
+        cached = self._entries.get(key)
+        if cached is not None and cached[0] == room_state.version:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return cached[1]
+
+        self.misses += 1
+        player_states = [
+            players[pid] for pid in room_state.players if pid != viewer_id
+        ]
+        description = compose_room_description(
+            room_def, room_state, player_states, self.config
+        )
+        self._entries[key] = (room_state.version, description)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return description
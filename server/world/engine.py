@@ -3,51 +3,267 @@ from __future__ import annotations
 import asyncio
 import random
 import uuid
-from typing import TYPE_CHECKING, Dict, List, Optional
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import (
+    TYPE_CHECKING,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
 
 if TYPE_CHECKING:
     from ..services.connection_manager import ConnectionManager
 
 from ..models import (
+    NOBODY,
     CharacterTemplate,
     GhostState,
     PlayerState,
     RoomDefinition,
     RoomState,
     WorldState,
-    compose_room_description,
 )
 from ..services.persistence import PersistenceWorker
+from .descriptions import RoomDescriptionCache
 from .loader import WorldLoader
-from .repository import WorldRepository
+from .locks import RoomLockManager
+from .minimap import MinimapRenderer
+from .names import NameIndex
+from .npcs import VectorizedNpcEngine
+from .paging import PagedRoomStore
+from .repository import BaseWorldRepository
+from .respawn import CoinRespawner
+
+# Rooms whose exit targets are kept for ghost moves, least recently used first.
+EXIT_TARGETS_CACHE_SIZE = 10_000
 
 
 class WorldEngine:
-    """Gameplay logic built on top of loaded world data."""
+    """
+    Gameplay logic built on top of loaded world data.
+
+    Locking is split in two levels:
+    - ``lock`` guards the player registry (allocating and releasing
+      characters, ghost ticks and cross-player bookkeeping).
+    - ``room_locks`` hands out one lock per room; room-local commands only
+      hold the lock of the room they touch, and ``move_player`` takes both
+      rooms in a fixed order.
+    When both are needed the registry lock is always taken first.
+    Plain reads of the registry never await, so they are atomic on the event
+    loop and take no lock at all.
+    """
 
     def __init__(
         self,
         loader: WorldLoader,
-        repository: WorldRepository,
+        repository: BaseWorldRepository,
         persistence: Optional[PersistenceWorker] = None,
+        rng: Optional[random.Random] = None,
+        vectorized_npcs: bool = False,
     ) -> None:
         self.lock = asyncio.Lock()
+        self.room_locks = RoomLockManager()
         self.repository = repository
         self.persistence = persistence
         config, rooms_state, ghosts = loader.load()
         self.state = WorldState(config=config, rooms_state=rooms_state, ghosts=ghosts)
         self.repository.restore_state(self.state)
+        self._index_ghosts()
+        self._moved_ghosts: Set[str] = set()
+        self._exit_targets_cache: "OrderedDict[str, Tuple[str, ...]]" = OrderedDict()
+        self.rng = rng or random.Random()
+        self.npcs: Optional[VectorizedNpcEngine] = None
+        if vectorized_npcs:
+            self.npcs = VectorizedNpcEngine(
+                config.rooms,
+                self.state.ghosts,
+                seed=self.rng.getrandbits(64),
+                exits=config.exits,
+            )
+            for room_state in self.state.rooms_state.values():
+                room_state.ghosts = NOBODY
+        self.descriptions = RoomDescriptionCache(config)
+        self.minimap = MinimapRenderer()
+        self.names = NameIndex()
+        self.respawn = CoinRespawner(
+            config.rooms,
+            # Avoid paging in every room just to find the few with a rule.
+            candidates=(
+                config.rooms.respawn_room_ids
+                if isinstance(config.rooms, PagedRoomStore)
+                else None
+            ),
+        )
+        self._paged_rooms: Optional[PagedRoomStore] = None
+        if isinstance(config.rooms, PagedRoomStore):
+            self._paged_rooms = config.rooms
+            for ghost in self.state.ghosts.values():
+                self._refresh_pin(ghost.room_id)
+        self._schedule_restored_respawns()
+        self._deltas_since_snapshot = self.repository.journal_entries
+
+    def _schedule_persist_unlocked(
+        self,
+        room_ids: Iterable[str] = (),
+        character_ids: Iterable[str] = (),
+        ghost_ids: Iterable[str] = (),
+    ) -> None:
+        """
+        Persist the listed entities, folding the journal into a snapshot periodically.
 
-    def _schedule_persist_unlocked(self) -> None:
-        payload = self.repository.build_save_payload(self.state)
+        Ghosts moved by ticks since the last write ride along in the same
+        delta instead of costing a journal entry of their own.
+        """
+        self._deltas_since_snapshot += 1
+        compact_every = self.repository.compact_every
+        if compact_every and self._deltas_since_snapshot >= compact_every:
+            self._write_snapshot_unlocked()
+            return
+
+        if self._moved_ghosts:
+            ghost_ids = self._moved_ghosts.union(ghost_ids)
+            self._moved_ghosts = set()
+        delta = self.repository.build_delta_payload(
+            self.state,
+            room_ids=room_ids,
+            character_ids=character_ids,
+            ghost_ids=ghost_ids,
+        )
         if self.persistence:
-            self.persistence.schedule_save(payload)
+            self.persistence.schedule_delta(delta)
         else:
-            self.repository.write_save(payload)
+            self.repository.write_delta(delta)
+
+    def _write_snapshot_unlocked(self) -> None:
+        self._deltas_since_snapshot = 0
+        self._moved_ghosts = set()
+        if self.persistence:
+            # Built in the worker's thread, not here on the event loop.
+            self.persistence.schedule_snapshot(
+                partial(self.repository.build_save_payload, self.state)
+            )
+        else:
+            self.repository.write_save(self.repository.build_save_payload(self.state))
+
+    def autosave_unlocked(self) -> None:
+        """
+        Fold the journal into a full snapshot if deltas were written since the last one.
+
+        Ghost moves alone do not count, so an empty server writes nothing.
+        Only meaningful for repositories that compact (the JSON journal); the
+        caller must hold ``lock``.
+        """
+        if self.repository.compact_every and self._deltas_since_snapshot:
+            self._write_snapshot_unlocked()
+
+    def persist_moved_ghosts_unlocked(self) -> None:
+        """Write ghost moves not yet carried by a delta, e.g. on shutdown."""
+        if self._moved_ghosts:
+            self._schedule_persist_unlocked()
+
+    def _schedule_restored_respawns(self) -> None:
+        # Rooms emptied before a restart would otherwise never refill.
+        for room_id in self.respawn.room_ids:
+            room_state = self.state.rooms_state.get(room_id)
+            rule = self.respawn.rule_for(room_id)
+            if room_state and rule and room_state.coins < rule.amount:
+                self.respawn.schedule(room_id)
+                self._refresh_pin(room_id)
+
+    def _room_in_use(self, room_id: str) -> bool:
+        """
+        Whether a paged world must keep ``room_id``'s definition in memory.
+
+        Occupied rooms and rooms waiting for a respawn are about to be read
+        again. Door state lives in the resident exit table, not the page.
+        """
+        if self.respawn.is_scheduled(room_id):
+            return True
+        room_state = self.state.rooms_state.get(room_id)
+        return bool(room_state and (room_state.players or room_state.ghosts))
+
+    def _refresh_pin(self, room_id: str) -> None:
+        """Re-pin ``room_id``'s page in a paged world after its use changed."""
+        if self._paged_rooms is not None:
+            self._paged_rooms.set_pinned(room_id, self._room_in_use(room_id))
+
+    def respawn_coins_unlocked(self, now: Optional[float] = None) -> List[str]:
+        """
+        Refill emptied rooms whose respawn delay has passed.
+
+        Rooms are topped up to their configured amount (never reduced) and
+        persisted together as one delta. A room whose lock a command holds
+        is left alone and retried on the next call, so a command never sees
+        its coins change mid-transaction; the caller must hold ``lock``.
+        Returns the ids of the rooms that changed.
+        """
+        held = self.room_locks.held_rooms()
+        refilled: List[str] = []
+        for room_id, rule in self.respawn.due(now):
+            if room_id in held:
+                self.respawn.retry(room_id)
+                continue
+            self._refresh_pin(room_id)
+            room_state = self.state.rooms_state.get(room_id)
+            if not room_state or room_state.coins >= rule.amount:
+                continue
+            room_state.coins = rule.amount
+            room_state.touch()
+            refilled.append(room_id)
+        if refilled:
+            self._schedule_persist_unlocked(room_ids=refilled)
+        return refilled
 
     def _update_character_save_unlocked(self, player: PlayerState) -> None:
         self.state.character_saves[player.character_id] = player.create_save()
 
+    @asynccontextmanager
+    async def lock_player_room(
+        self, player_id: str, *directions: str
+    ) -> AsyncIterator[PlayerState]:
+        """
+        Hold the lock of the room ``player_id`` is standing in.
+
+        Every room the player could reach by trying ``directions`` in order
+        is locked too, in the same acquisition, so a whole command (a move
+        and the room payload that follows) or a batch of them runs under one
+        lock round trip. A move may fail and leave the player where they
+        are, so each step keeps the rooms already reached. The
+        ``*_unlocked`` methods below may be called while this is held.
+        """
+        while True:
+            player = self.state.players.get(player_id)
+            if player is None:
+                raise ValueError("You are not a valid player.")
+            room_id = player.room_id
+            async with self.room_locks.acquire(
+                *self._reachable_rooms(room_id, directions)
+            ):
+                # The player may have moved, or been released, while we
+                # waited for the lock.
+                current = self.state.players.get(player_id)
+                if current is player and player.room_id == room_id:
+                    yield player
+                    return
+
+    def _reachable_rooms(self, room_id: str, directions: Iterable[str]) -> Set[str]:
+        rooms = self.state.config.rooms
+        reached = {room_id}
+        for direction in directions:
+            dir_key = direction.lower()
+            reached |= {
+                exit_def.target_room_id
+                for exit_def in (rooms[source].exits.get(dir_key) for source in reached)
+                if exit_def
+            }
+        return reached
+
     async def allocate_player(self, character_id: str) -> PlayerState:
         async with self.lock:
             available = [
@@ -88,268 +304,245 @@ class WorldEngine:
                 coins=coins,
                 items=list(items),
             )
-            self.state.players[player_id] = player
-            self.state.active_characters.add(target.id)
-            room_state = self.state.rooms_state[player.room_id]
-            room_state.players.add(player_id)
-            self._update_character_save_unlocked(player)
-            self._schedule_persist_unlocked()
+            async with self.room_locks.acquire(room_id):
+                self.state.players[player_id] = player
+                self.state.active_characters.add(target.id)
+                self.names.add(player_id, player.name)
+                room_state = self.state.rooms_state[player.room_id]
+                room_state.add_player(player_id)
+                room_state.touch()
+                self._refresh_pin(player.room_id)
+                self._update_character_save_unlocked(player)
+                self._schedule_persist_unlocked(character_ids=[target.id])
             return player
 
     async def release_player(self, player_id: str) -> None:
         async with self.lock:
-            player = self.state.players.pop(player_id, None)
-            if not player:
+            if player_id not in self.state.players:
                 return
-            self.state.active_characters.discard(player.character_id)
-            room_state = self.state.rooms_state.get(player.room_id)
-            if room_state:
-                room_state.players.discard(player_id)
-            self._schedule_persist_unlocked()
+            async with self.lock_player_room(player_id) as player:
+                self.state.players.pop(player_id, None)
+                self.state.active_characters.discard(player.character_id)
+                self.names.remove(player_id, player.name)
+                room_state = self.state.rooms_state.get(player.room_id)
+                if room_state:
+                    room_state.remove_player(player_id)
+                    room_state.touch()
+                    self._refresh_pin(player.room_id)
+                self._schedule_persist_unlocked(character_ids=[player.character_id])
 
     async def get_available_characters(self) -> List[CharacterTemplate]:
-        async with self.lock:
-            return [
-                c
-                for c in self.state.config.characters.values()
-                if c.id not in self.state.active_characters
-            ]
+        return [
+            c
+            for c in self.state.config.characters.values()
+            if c.id not in self.state.active_characters
+        ]
 
     async def get_player(self, player_id: str) -> Optional[PlayerState]:
-        async with self.lock:
-            return self.state.players.get(player_id)
+        return self.state.players.get(player_id)
 
     async def resolve_character_name(
         self, name_query: str, connections: "ConnectionManager"
-    ) -> Optional[str]:
+    ) -> Optional[PlayerState]:
         """
-        Resolve a character name query to a player_id.
+        Resolve a character name query to an online player.
         Supports case-insensitive and partial matching.
         Returns None if no match or ambiguous match.
         """
-        query_lower = name_query.lower().strip()
-        if not query_lower:
-            return None
-
-        # Get all online players
-        online_player_ids = connections.get_all_connected_player_ids()
-        matches: List[tuple[str, str]] = []  # (player_id, full_name)
-
-        async with self.lock:
-            for player_id in online_player_ids:
-                player = self.state.players.get(player_id)
-                if not player:
-                    continue
-                full_name = player.name
-                first_name = full_name.split()[0] if full_name else ""
-
-                # Check exact match (case-insensitive)
-                if full_name.lower() == query_lower or first_name.lower() == query_lower:
-                    matches.append((player_id, full_name))
-                # Check partial match (case-insensitive)
-                elif first_name.lower().startswith(query_lower):
-                    matches.append((player_id, full_name))
-
-        # If exactly one match, return it
-        if len(matches) == 1:
-            return matches[0][0]
-        # If multiple matches, check if any is exact
-        elif len(matches) > 1:
-            exact_matches = [
-                pid for pid, name in matches
-                if name.lower() == query_lower or name.split()[0].lower() == query_lower
-            ]
-            if len(exact_matches) == 1:
-                return exact_matches[0]
-        return None
+        player_id = self.names.resolve(
+            name_query, lambda player_id: connections.get(player_id) is not None
+        )
+        return self.state.players.get(player_id) if player_id else None
 
     async def get_room_player_ids(self, room_id: str) -> List[str]:
-        async with self.lock:
-            room = self.state.rooms_state.get(room_id)
-            if not room:
-                return []
-            return list(room.players)
-
-    async def describe_room_for_player(self, player_id: str) -> Dict[str, object]:
-        async with self.lock:
-            player = self.state.players[player_id]
-            room_def = self.state.config.rooms[player.room_id]
-            room_state = self.state.rooms_state[player.room_id]
-            player_states = [
-                self.state.players[pid]
+        room = self.state.rooms_state.get(room_id)
+        if not room:
+            return []
+        return list(room.players)
+
+    def room_payload_unlocked(self, player_id: str) -> Dict[str, object]:
+        player = self.state.players[player_id]
+        room_def = self.state.config.rooms[player.room_id]
+        room_state = self.state.rooms_state[player.room_id]
+        description = self.descriptions.describe(
+            room_def, room_state, self.state.players, player_id
+        )
+        minimap = self._build_minimap_for_player(player_id)
+        return {
+            "roomId": room_def.id,
+            "name": room_def.name,
+            "description": description,
+            "exits": list(room_def.exits.keys()),
+            "coins": room_state.coins,
+            "minimap": minimap,
+            "characters": [
+                {
+                    "name": self.state.players[pid].name,
+                    "characterId": self.state.players[pid].character_id,
+                }
                 for pid in room_state.players
                 if pid != player_id
-            ]
-            description = compose_room_description(
-                room_def, room_state, player_states, self.state.config
-            )
-            minimap = self._build_minimap_for_player(player_id)
-            return {
-                "roomId": room_def.id,
-                "name": room_def.name,
-                "description": description,
-                "exits": list(room_def.exits.keys()),
-                "coins": room_state.coins,
-                "minimap": minimap,
-                "characters": [
-                    {
-                        "name": self.state.players[pid].name,
-                        "characterId": self.state.players[pid].character_id,
-                    }
-                    for pid in room_state.players
-                    if pid != player_id
-                ],
-            }
+            ],
+        }
+
+    async def describe_room_for_player(self, player_id: str) -> Dict[str, object]:
+        async with self.lock_player_room(player_id):
+            return self.room_payload_unlocked(player_id)
 
     async def move_player(self, player_id: str, direction: str) -> Dict[str, object]:
-        async with self.lock:
-            player = self.state.players[player_id]
-            room_def = self.state.config.rooms[player.room_id]
-            dir_key = direction.lower()
-            exit_def = room_def.exits.get(dir_key)
-            if not exit_def:
-                raise ValueError("You cannot go that way.")
-            target_room_id = exit_def.target_room_id
-
-            if exit_def.locked:
-                has_key = False
-                key_id = exit_def.key_id
-                if key_id:
-                    for item_id in player.items:
-                        item = self.state.config.items.get(item_id)
-                        if item and item.is_key and item.key_id == key_id:
-                            has_key = True
-                            break
-                if not has_key:
-                    raise ValueError("The door is locked. You need a key.")
-                exit_def.locked = False
-                new_room_for_lock = self.state.config.rooms[target_room_id]
-                for back_dir, back_exit in new_room_for_lock.exits.items():
-                    if (
-                        back_exit.target_room_id == room_def.id
-                        and back_exit.key_id == key_id
-                    ):
-                        back_exit.locked = False
-
-            old_room_state = self.state.rooms_state[player.room_id]
-            new_room_def = self.state.config.rooms[target_room_id]
-            new_room_state = self.state.rooms_state[target_room_id]
-
-            old_room_state.players.discard(player_id)
-            new_room_state.players.add(player_id)
-            player.room_id = target_room_id
-
-            player_states = [
-                self.state.players[pid]
-                for pid in new_room_state.players
-                if pid != player_id
-            ]
-            description = compose_room_description(
-                new_room_def, new_room_state, player_states, self.state.config
-            )
-            minimap = self._build_minimap_for_player(player_id)
-            return {
-                "roomId": new_room_def.id,
-                "name": new_room_def.name,
-                "description": description,
-                "exits": list(new_room_def.exits.keys()),
-                "coins": new_room_state.coins,
-                "minimap": minimap,
-                "characters": [
-                    {
-                        "name": self.state.players[pid].name,
-                        "characterId": self.state.players[pid].character_id,
-                    }
-                    for pid in new_room_state.players
-                    if pid != player_id
-                ],
-            }
+        async with self.lock_player_room(player_id, direction) as player:
+            return self.move_player_unlocked(player, direction)
+
+    def move_player_unlocked(
+        self, player: PlayerState, direction: str
+    ) -> Dict[str, object]:
+        """Move ``player``; needs both rooms locked (``lock_player_room`` with ``direction``)."""
+        dir_key = direction.lower()
+        if dir_key not in self.state.config.rooms[player.room_id].exits:
+            raise ValueError("You cannot go that way.")
+        self._move_player_unlocked(player, dir_key)
+        return self.room_payload_unlocked(player.player_id)
+
+    def _move_player_unlocked(self, player: PlayerState, dir_key: str) -> None:
+        room_def = self.state.config.rooms[player.room_id]
+        exit_def = room_def.exits[dir_key]
+        target_room_id = exit_def.target_room_id
+
+        if exit_def.locked:
+            has_key = False
+            key_id = exit_def.key_id
+            if key_id:
+                for item_id in player.items:
+                    item = self.state.config.items.get(item_id)
+                    if item and item.is_key and item.key_id == key_id:
+                        has_key = True
+                        break
+            if not has_key:
+                raise ValueError("The door is locked. You need a key.")
+            exit_def.locked = False
+            new_room_for_lock = self.state.config.rooms[target_room_id]
+            for back_dir, back_exit in new_room_for_lock.exits.items():
+                if (
+                    back_exit.target_room_id == room_def.id
+                    and back_exit.key_id == key_id
+                ):
+                    back_exit.locked = False
+
+        old_room_state = self.state.rooms_state[player.room_id]
+        new_room_state = self.state.rooms_state[target_room_id]
+
+        old_room_state.remove_player(player.player_id)
+        new_room_state.add_player(player.player_id)
+        old_room_state.touch()
+        new_room_state.touch()
+        self._refresh_pin(player.room_id)
+        player.room_id = target_room_id
+        self._refresh_pin(target_room_id)
 
     async def collect_coins(self, player_id: str) -> Dict[str, int]:
-        async with self.lock:
-            player = self.state.players[player_id]
-            room_state = self.state.rooms_state[player.room_id]
-            if room_state.coins <= 0:
-                raise ValueError("There are no coins to collect.")
-            amount = room_state.coins
-            room_state.coins = 0
-            player.coins += amount
-            self._update_character_save_unlocked(player)
-            self._schedule_persist_unlocked()
-            return {"collected": amount, "playerCoins": player.coins}
+        async with self.lock_player_room(player_id) as player:
+            return self.collect_coins_unlocked(player)
+
+    def collect_coins_unlocked(self, player: PlayerState) -> Dict[str, int]:
+        room_state = self.state.rooms_state[player.room_id]
+        if room_state.coins <= 0:
+            raise ValueError("There are no coins to collect.")
+        amount = room_state.coins
+        room_state.coins = 0
+        room_state.touch()
+        if self.respawn.schedule(player.room_id):
+            self._refresh_pin(player.room_id)
+        player.coins += amount
+        self._update_character_save_unlocked(player)
+        self._schedule_persist_unlocked(
+            room_ids=[player.room_id], character_ids=[player.character_id]
+        )
+        return {"collected": amount, "playerCoins": player.coins}
 
     async def drop_coins(self, player_id: str) -> Dict[str, int]:
-        async with self.lock:
-            player = self.state.players[player_id]
-            if player.coins <= 0:
-                raise ValueError("You have no coins to drop.")
-            amount = player.coins
-            player.coins = 0
-            room_state = self.state.rooms_state[player.room_id]
-            room_state.coins += amount
-            self._update_character_save_unlocked(player)
-            self._schedule_persist_unlocked()
-            return {"dropped": amount, "roomCoins": room_state.coins}
+        async with self.lock_player_room(player_id) as player:
+            return self.drop_coins_unlocked(player)
+
+    def drop_coins_unlocked(self, player: PlayerState) -> Dict[str, int]:
+        if player.coins <= 0:
+            raise ValueError("You have no coins to drop.")
+        amount = player.coins
+        player.coins = 0
+        room_state = self.state.rooms_state[player.room_id]
+        room_state.coins += amount
+        room_state.touch()
+        self._update_character_save_unlocked(player)
+        self._schedule_persist_unlocked(
+            room_ids=[player.room_id], character_ids=[player.character_id]
+        )
+        return {"dropped": amount, "roomCoins": room_state.coins}
 
     async def take_items(
         self, player_id: str, item_query: Optional[str]
     ) -> Dict[str, object]:
-        async with self.lock:
-            player = self.state.players[player_id]
-            room_state = self.state.rooms_state[player.room_id]
-            if not room_state.items:
-                raise ValueError("There are no items to take.")
+        async with self.lock_player_room(player_id) as player:
+            return self.take_items_unlocked(player, item_query)
 
-            taken_ids: List[str] = []
-            query = (item_query or "").strip().lower()
-
-            if not query or query == "all":
-                taken_ids = list(room_state.items)
-                room_state.items.clear()
-            else:
-                target_id: Optional[str] = None
-                for item_id in room_state.items:
-                    item = self.state.config.items.get(item_id)
-                    if item and query in item.name.lower():
-                        target_id = item_id
-                        break
-                if not target_id:
-                    raise ValueError("You don't see that here.")
-                room_state.items.remove(target_id)
-                taken_ids.append(target_id)
+    def take_items_unlocked(
+        self, player: PlayerState, item_query: Optional[str]
+    ) -> Dict[str, object]:
+        room_state = self.state.rooms_state[player.room_id]
+        if not room_state.items:
+            raise ValueError("There are no items to take.")
 
-            for item_id in taken_ids:
-                player.items.append(item_id)
+        taken_ids: List[str] = []
+        query = (item_query or "").strip().lower()
 
-            taken_names: List[str] = []
-            for item_id in taken_ids:
+        if not query or query == "all":
+            taken_ids = list(room_state.items)
+            room_state.items.clear()
+        else:
+            target_id: Optional[str] = None
+            for item_id in room_state.items:
                 item = self.state.config.items.get(item_id)
-                if item:
-                    taken_names.append(item.name)
-
-            self._update_character_save_unlocked(player)
-            self._schedule_persist_unlocked()
-            return {"taken": taken_names, "count": len(taken_ids)}
+                if item and query in item.name.lower():
+                    target_id = item_id
+                    break
+            if not target_id:
+                raise ValueError("You don't see that here.")
+            room_state.items.remove(target_id)
+            taken_ids.append(target_id)
+
+        room_state.touch()
+        for item_id in taken_ids:
+            player.items.append(item_id)
+
+        taken_names: List[str] = []
+        for item_id in taken_ids:
+            item = self.state.config.items.get(item_id)
+            if item:
+                taken_names.append(item.name)
+
+        self._update_character_save_unlocked(player)
+        self._schedule_persist_unlocked(
+            room_ids=[player.room_id], character_ids=[player.character_id]
+        )
+        return {"taken": taken_names, "count": len(taken_ids)}
 
     async def get_inventory(self, player_id: str) -> Dict[str, object]:
-        async with self.lock:
-            player = self.state.players[player_id]
-            items = []
-            for item_id in player.items:
-                item = self.state.config.items.get(item_id)
-                if item:
-                    items.append({"id": item_id, "name": item.name})
-            return {"coins": player.coins, "items": items}
+        return self.inventory_unlocked(self.state.players[player_id])
+
+    def inventory_unlocked(self, player: PlayerState) -> Dict[str, object]:
+        items = []
+        for item_id in player.items:
+            item = self.state.config.items.get(item_id)
+            if item:
+                items.append({"id": item_id, "name": item.name})
+        return {"coins": player.coins, "items": items}
 
     async def get_emote_message(self, player_id: str, verb: str) -> Optional[str]:
-        async with self.lock:
-            player = self.state.players.get(player_id)
-            if not player:
-                return None
-            template = self.state.config.emotes.get(verb.lower())
-            if not template:
-                return None
-            return f"{player.name} {template}"
+        player = self.state.players.get(player_id)
+        if not player:
+            return None
+        template = self.state.config.emotes.get(verb.lower())
+        if not template:
+            return None
+        return f"{player.name} {template}"
 
     def _build_minimap_for_player(self, player_id: str) -> str:
         player = self.state.players.get(player_id)
@@ -360,89 +553,99 @@ class WorldEngine:
         room_state = self.state.rooms_state.get(player.room_id)
         if not room_def or not room_state:
             return ""
+        return self.minimap.render(room_def, self.state.rooms_state, player_id)
 
-        width = 15
-        height = 15
-        grid: List[List[str]] = [[" " for _ in range(width)] for _ in range(height)]
-
-        center_x = width // 2
-        center_y = height // 2
-        step = 4
-
-        def draw_room_block(cx: int, cy: int, has_self: bool, has_other: bool) -> None:
-            for dy in (-1, 0):
-                for dx in (-1, 0):
-                    x = cx + dx
-                    y = cy + dy
-                    if 0 <= x < width and 0 <= y < height:
-                        if has_self:
-                            ch = "*"
-                        elif has_other:
-                            ch = "P"
-                        else:
-                            ch = "."
-                        grid[y][x] = ch
-
-        players_here = room_state.players
-        has_self = player_id in players_here
-        has_other = any(pid != player_id for pid in players_here)
-
-        draw_room_block(center_x, center_y, has_self=True, has_other=has_other)
-
-        offsets = {
-            "north": (0, -1),
-            "south": (0, 1),
-            "west": (-1, 0),
-            "east": (1, 0),
-        }
-
-        for direction, exit_def in room_def.exits.items():
-            offset = offsets.get(direction)
-            if not offset:
+    def _index_ghosts(self) -> None:
+        for room_state in self.state.rooms_state.values():
+            room_state.ghosts = NOBODY
+        for ghost in self.state.ghosts.values():
+            room_state = self.state.rooms_state.get(ghost.room_id)
+            if room_state:
+                room_state.add_ghost(ghost.id)
+
+    def _exit_targets(self, room_def: RoomDefinition) -> Tuple[str, ...]:
+        cache = self._exit_targets_cache
+        targets = cache.get(room_def.id)
+        if targets is not None:
+            cache.move_to_end(room_def.id)
+            return targets
+        targets = tuple(e.target_room_id for e in room_def.exits.values())
+        cache[room_def.id] = targets
+        if len(cache) > EXIT_TARGETS_CACHE_SIZE:
+            cache.popitem(last=False)
+        return targets
+
+    def _relocate_ghost(self, ghost: GhostState, target_id: str) -> None:
+        source_state = self.state.rooms_state.get(ghost.room_id)
+        if source_state:
+            source_state.remove_ghost(ghost.id)
+        target_state = self.state.rooms_state.get(target_id)
+        if target_state:
+            target_state.add_ghost(ghost.id)
+        self._refresh_pin(ghost.room_id)
+        ghost.room_id = target_id
+        self._refresh_pin(target_id)
+
+    def _step_ghosts_unlocked(self, held: Set[str]) -> List[str]:
+        moved: List[str] = []
+        rooms = self.state.config.rooms
+        for ghost in self.state.ghosts.values():
+            room_def = rooms.get(ghost.room_id)
+            if not room_def or not room_def.exits:
                 continue
-            dx, dy = offset
-            neighbour_id = exit_def.target_room_id
-            neighbour_state = self.state.rooms_state.get(neighbour_id)
-            cx = center_x + dx * step
-            cy = center_y + dy * step
-
-            if neighbour_state:
-                neighbour_players = neighbour_state.players
-                neighbour_has_other = any(pid != player_id for pid in neighbour_players)
-                draw_room_block(cx, cy, has_self=False, has_other=neighbour_has_other)
-
-            if dx == 0:
-                link_x = center_x
-                link_y = center_y + (dy * (step // 2))
-                if 0 <= link_x < width and 0 <= link_y < height:
-                    grid[link_y][link_x] = "|"
-            else:
-                link_x = center_x + (dx * (step // 2))
-                link_y = center_y
-                if 0 <= link_x < width and 0 <= link_y < height:
-                    grid[link_y][link_x] = "-"
-
-        return "\n".join("".join(row) for row in grid)
+            target_id = self.rng.choice(self._exit_targets(room_def))
+            if target_id == ghost.room_id:
+                continue
+            if ghost.room_id in held or target_id in held:
+                continue
+            self._relocate_ghost(ghost, target_id)
+            moved.append(ghost.id)
+        return moved
 
     async def move_ghosts_and_collect_events(self) -> Dict[str, List[str]]:
         async with self.lock:
-            if not self.state.ghosts:
-                return {}
-            rng = random.Random()
-            events: Dict[str, List[str]] = {}
-            for ghost in self.state.ghosts.values():
-                room_def = self.state.config.rooms.get(ghost.room_id)
-                if not room_def or not room_def.exits:
-                    continue
-                exit_defs = list(room_def.exits.values())
-                target_exit = rng.choice(exit_defs)
-                ghost.room_id = target_exit.target_room_id
+            return self.move_ghosts_unlocked()
 
-            for ghost in self.state.ghosts.values():
-                for player in self.state.players.values():
-                    if player.room_id == ghost.room_id:
-                        msg = (
-                            f"A ghost passes through the room: {ghost.description}."
-                        )
-                        events.setdefault(player.player_id, []).append(msg)
-            return events
+    def move_ghosts_unlocked(self) -> Dict[str, List[str]]:
+        """
+        Move every ghost one random step and report who saw one.
+
+        Rooms keep the set of ghosts inside them, so encounters are found by
+        visiting only the rooms that hold players instead of checking every
+        ghost against every player. With ``vectorized_npcs`` the walk and the
+        encounter join run on NumPy arrays instead. Ghosts never enter or
+        leave a room whose lock a command holds. The caller must hold
+        ``lock``.
+        """
+        if not self.state.ghosts:
+            return {}
+        # Rooms a command has locked keep their ghosts until the next tick.
+        held = self.room_locks.held_rooms()
+        if self.npcs:
+            moved = self.npcs.step(held)
+        else:
+            moved = self._step_ghosts_unlocked(held)
+        # Saved with the next delta or snapshot rather than one write per tick.
+        self._moved_ghosts.update(moved)
+
+        rooms_state = self.state.rooms_state
+        occupied = {player.room_id for player in self.state.players.values()}
+        if self.npcs:
+            sightings = self.npcs.encounters(occupied)
+        else:
+            sightings = [
+                (ghost_id, room_id)
+                for room_id in occupied
+                if room_id in rooms_state
+                for ghost_id in rooms_state[room_id].ghosts
+            ]
+
+        events: Dict[str, List[str]] = {}
+        for ghost_id, room_id in sightings:
+            msg = (
+                "A ghost passes through the room: "
+                f"{self.state.ghosts[ghost_id].description}."
+            )
+            for pid in rooms_state[room_id].players:
+                events.setdefault(pid, []).append(msg)
+        return events
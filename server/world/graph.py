@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import random
+from typing import Iterable, List, Set, Tuple
+
+Edge = Tuple[int, int]
+
+
+class UnionFind:
+    """Disjoint sets over ``0..size-1`` with path halving and union by size."""
+
+    def __init__(self, size: int) -> None:
+        self.parent = list(range(size))
+        self.size = [1] * size
+        self.components = size
+
+    def find(self, node: int) -> int:
+        parent = self.parent
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    def union(self, a: int, b: int) -> bool:
+        root_a = self.find(a)
+        root_b = self.find(b)
+        if root_a == root_b:
+            return False
+        if self.size[root_a] < self.size[root_b]:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        self.size[root_a] += self.size[root_b]
+        self.components -= 1
+        return True
+
+
+def is_connected(room_count: int, edges: Iterable[Edge]) -> bool:
+    if room_count == 0:
+        return True
+    sets = UnionFind(room_count)
+    for u, v in edges:
+        sets.union(u, v)
+    return sets.components == 1
+
+
+def _decode_prufer(sequence: List[int], node_count: int) -> List[Edge]:
+    """Linear-time Prüfer decoding; node ``i`` ends with degree ``count(i) + 1``."""
+    degree = [1] * node_count
+    for node in sequence:
+        degree[node] += 1
+    ptr = 0
+    while degree[ptr] != 1:
+        ptr += 1
+    leaf = ptr
+    edges: List[Edge] = []
+    for node in sequence:
+        edges.append((leaf, node))
+        degree[node] -= 1
+        if degree[node] == 1 and node < ptr:
+            leaf = node
+        else:
+            ptr += 1
+            while degree[ptr] != 1:
+                ptr += 1
+            leaf = ptr
+    edges.append((leaf, node_count - 1))
+    return edges
+
+
+def build_random_graph(
+    room_count: int, degrees: List[int], rng: random.Random, repair_rounds: int = 8
+) -> List[Edge]:
+    """
+    Build a connected random graph whose degrees follow ``degrees``, in O(n).
+
+    Every room gets one stub for a spanning tree; the remaining stubs
+    (``degree - 1`` per room) are shuffled, the first ``n - 2`` form a Prüfer
+    sequence that decodes into a random tree with matching degrees, and the
+    leftovers are paired configuration-model style into extra edges. Pairs
+    that would form a self-loop or duplicate are re-matched among themselves
+    for a few rounds and dropped if still invalid, which costs those rooms
+    one door each. If the sequence has too few stubs for a spanning tree,
+    rooms below three doors gain one until it does.
+
+    The tree makes the result connected by construction. Edges are returned
+    as ``(low, high)`` pairs in a deterministic order for a given ``rng``.
+    """
+    if room_count <= 1:
+        return []
+
+    extra: List[int] = [
+        node for node, degree in enumerate(degrees) for _ in range(max(0, degree - 1))
+    ]
+    if len(extra) < room_count - 2:
+        # Not enough doors to connect every room; add some where there is room.
+        growable = [node for node, degree in enumerate(degrees) if degree < 3]
+        rng.shuffle(growable)
+        for node in growable[: room_count - 2 - len(extra)]:
+            extra.append(node)
+        while len(extra) < room_count - 2:
+            extra.append(rng.randrange(room_count))
+    rng.shuffle(extra)
+
+    tree = _decode_prufer(extra[: room_count - 2], room_count)
+    edges: List[Edge] = []
+    seen: Set[Edge] = set()
+    for u, v in tree:
+        edge = (u, v) if u < v else (v, u)
+        seen.add(edge)
+        edges.append(edge)
+
+    stubs = extra[room_count - 2 :]
+    if len(stubs) % 2:
+        stubs.pop()
+    for _ in range(repair_rounds):
+        rejected: List[int] = []
+        for idx in range(0, len(stubs) - 1, 2):
+            u, v = stubs[idx], stubs[idx + 1]
+            edge = (u, v) if u < v else (v, u)
+            if u == v or edge in seen:
+                rejected.extend((u, v))
+                continue
+            seen.add(edge)
+            edges.append(edge)
+        if not rejected:
+            break
+        rng.shuffle(rejected)
+        stubs = rejected
+    return edges
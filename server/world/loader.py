@@ -1,6 +1,11 @@
 from __future__ import annotations
 
+import gc
+import hashlib
 import json
+import logging
+import os
+import pickle
 import random
 from pathlib import Path
 from typing import Dict, List, Optional, Set, Tuple
@@ -8,6 +13,8 @@ from typing import Dict, List, Optional, Set, Tuple
 from ..models import (
     CharacterTemplate,
     ExitDefinition,
+    ExitSpec,
+    ExitTable,
     GhostState,
     ItemDefinition,
     RoomDefinition,
@@ -15,15 +22,163 @@ from ..models import (
     RoomState,
     WorldConfig,
 )
+from .graph import build_random_graph
+from .paging import PagedRoomStore
+
+logger = logging.getLogger(__name__)
+
+
+SOURCE_FILES = ("world.json", "characters.json", "verbs.json")
+
+# Bump whenever the models or the pickled layout change.
+CACHE_FORMAT = 3
+
+LoadedWorld = Tuple[WorldConfig, Dict[str, RoomState], Dict[str, GhostState]]
+
+
+def _share_duplicates(config: WorldConfig) -> None:
+    """
+    Make equal room strings and templates the same objects.
+
+    Generated rooms repeat a handful of names, descriptions and appearance
+    templates, so sharing them shrinks the world in memory. Pickle writes an
+    object it has already seen as a back-reference, so the cache and the
+    worlds loaded from it shrink too.
+    """
+    strings: Dict[str, str] = {room_id: room_id for room_id in config.rooms}
+    templates: Dict[object, Dict[str, object]] = {}
+
+    def share(value: str) -> str:
+        return strings.setdefault(value, value)
+
+    def share_template(template: Dict[str, object]) -> Dict[str, object]:
+        try:
+            key = json.dumps(template, sort_keys=True)
+        except (TypeError, ValueError):
+            return template
+        return templates.setdefault(key, template)
+
+    for room_def in config.rooms.values():
+        room_def.name = share(room_def.name)
+        room_def.description = share(room_def.description)
+        room_def.appearance = share_template(room_def.appearance)
+        room_def.coins_respawn = share_template(room_def.coins_respawn)
 
 
 class WorldLoader:
-    """Load world configuration and initial runtime state from disk."""
+    """
+    Load world configuration and initial runtime state from disk.
+
+    Parsing the JSON sources and building every dataclass is slow for big
+    worlds, so the result is also pickled to ``world.cache`` together with a
+    SHA-256 of the source files. The next load with unchanged sources
+    unpickles that in one go instead; any edit (or a new ``CACHE_FORMAT``)
+    rebuilds it. Procedural worlds are cached too, so a restart keeps the
+    same map instead of generating a new one. The cache is only ever
+    written by the server itself and lives next to the save files.
 
-    def __init__(self, data_dir: Path) -> None:
+    ``paged`` keeps room definitions out of memory; see ``PagedRoomStore``.
+    """
+
+    def __init__(
+        self,
+        data_dir: Path,
+        use_cache: bool = True,
+        paged: bool = False,
+        page_size: int = 1024,
+        max_pages: int = 256,
+    ) -> None:
         self.data_dir = data_dir
+        self.use_cache = use_cache
+        self.paged = paged
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.cache_file = data_dir / "world.cache"
+        self.pages_file = data_dir / "world.pages"
+        self.loaded_from_cache = False
+
+    def source_hash(self) -> str:
+        digest = hashlib.sha256()
+        for name in SOURCE_FILES:
+            digest.update(name.encode("utf-8"))
+            with open(self.data_dir / name, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(block)
+        return digest.hexdigest()
+
+    def load(self) -> LoadedWorld:
+        """
+        Return the world config, initial room states and ghosts.
+
+        With ``paged`` the rooms come back as a ``PagedRoomStore`` over
+        ``world.pages`` instead of a dict, which needs the cache files, so
+        ``use_cache`` is implied.
+        """
+        self.loaded_from_cache = False
+        if not (self.use_cache or self.paged):
+            return self._load_sources()
+        key = self.source_hash()
+        cached = self._read_cache(key)
+        if cached is not None:
+            self.loaded_from_cache = True
+            return cached
+        world = self._load_sources()
+        if self.paged:
+            world[0].rooms = PagedRoomStore.build(
+                self.pages_file,
+                key,
+                world[0].rooms,
+                world[0].exits,
+                page_size=self.page_size,
+                max_pages=self.max_pages,
+            )
+        self._write_cache(key, world)
+        return world
+
+    def _read_cache(self, key: str) -> Optional[LoadedWorld]:
+        if not self.cache_file.exists():
+            return None
+        gc_was_enabled = gc.isenabled()
+        try:
+            with open(self.cache_file, "rb") as f:
+                # The header is a separate pickle so a stale cache is
+                # rejected without unpickling the whole world.
+                header = pickle.load(f)
+                if header != (CACHE_FORMAT, key, self.paged):
+                    return None
+                # Millions of fresh objects would trigger pointless GC passes.
+                gc.disable()
+                world: LoadedWorld = pickle.load(f)
+            rooms = world[0].rooms
+            if isinstance(rooms, PagedRoomStore):
+                rooms.max_pages = self.max_pages
+                rooms.open()
+            return world
+        except Exception:
+            logger.warning(
+                "Ignoring unreadable world cache %s", self.cache_file, exc_info=True
+            )
+            return None
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+    def _write_cache(self, key: str, world: LoadedWorld) -> None:
+        tmp = self.cache_file.with_suffix(".cache.tmp")
+        try:
+            with open(tmp, "wb") as f:
+                pickle.dump(
+                    (CACHE_FORMAT, key, self.paged), f, protocol=pickle.HIGHEST_PROTOCOL
+                )
+                pickle.dump(world, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self.cache_file)
+        except OSError:
+            # A missing cache only costs startup time.
+            logger.warning(
+                "Could not write world cache %s", self.cache_file, exc_info=True
+            )
 
-    def load(self) -> Tuple[WorldConfig, Dict[str, RoomState], Dict[str, GhostState]]:
+    def _load_sources(self) -> LoadedWorld:
         with open(self.data_dir / "world.json", "r", encoding="utf-8") as f:
             world_data = json.load(f)
         with open(self.data_dir / "characters.json", "r", encoding="utf-8") as f:
@@ -43,13 +198,15 @@ class WorldLoader:
             )
 
         if world_data.get("procedural"):
-            rooms, rooms_state, items, ghosts = self._generate_procedural_world(
-                world_data
+            rooms, exits, rooms_state, items, ghosts = (
+                self._generate_procedural_world(world_data)
             )
             world_name = world_data.get("worldName") or "The Jungeon"
             self._write_world_definition(world_name, rooms, rooms_state, items, ghosts)
         else:
-            rooms, rooms_state, items, ghosts = self._load_rooms_from_json(world_data)
+            rooms, exits, rooms_state, items, ghosts = self._load_rooms_from_json(
+                world_data
+            )
 
         emotes = verbs_data.get("emotes", {})
         allowed_object_verbs = verbs_data.get("objectVerbs", [])
@@ -60,7 +217,9 @@ class WorldLoader:
             items=items,
             emotes=emotes,
             allowed_object_verbs=allowed_object_verbs,
+            exits=exits,
         )
+        _share_duplicates(config)
 
         return config, rooms_state, ghosts
 
@@ -68,6 +227,7 @@ class WorldLoader:
         self, world_data: Dict[str, object]
     ) -> Tuple[
         Dict[str, RoomDefinition],
+        ExitTable,
         Dict[str, RoomState],
         Dict[str, ItemDefinition],
         Dict[str, GhostState],
@@ -76,6 +236,8 @@ class WorldLoader:
         rooms_state: Dict[str, RoomState] = {}
         items: Dict[str, ItemDefinition] = {}
         ghosts: Dict[str, GhostState] = {}
+        rooms_data = world_data.get("rooms", [])
+        exit_table = ExitTable(r["id"] for r in rooms_data)
 
         items_data = world_data.get("items", {})
         for item_id, raw in items_data.items():
@@ -87,7 +249,7 @@ class WorldLoader:
                 key_id=raw.get("keyId"),
             )
 
-        for r in world_data.get("rooms", []):
+        for r in rooms_data:
             objects: List[RoomObject] = []
             for o in r.get("objects", []):
                 objects.append(
@@ -101,28 +263,25 @@ class WorldLoader:
                 )
 
             exits_raw = r.get("exits", {})
-            exits: Dict[str, ExitDefinition] = {}
+            exits: List[ExitSpec] = []
             for direction, value in exits_raw.items():
                 if isinstance(value, str):
-                    exits[direction] = ExitDefinition(
-                        direction=direction,
-                        target_room_id=value,
-                        locked=False,
-                        key_id=None,
-                    )
+                    exits.append((direction, value, False, None))
                 elif isinstance(value, dict):
-                    exits[direction] = ExitDefinition(
-                        direction=direction,
-                        target_room_id=value.get("target", ""),
-                        locked=bool(value.get("locked", False)),
-                        key_id=value.get("keyId"),
+                    exits.append(
+                        (
+                            direction,
+                            value.get("target", ""),
+                            bool(value.get("locked", False)),
+                            value.get("keyId"),
+                        )
                     )
 
             room_def = RoomDefinition(
                 id=r["id"],
                 name=r["name"],
                 description=r["description"],
-                exits=exits,
+                exits=exit_table.add_room(exits),
                 coins_initial=r.get("coins", {}).get("initial", 0),
                 coins_respawn=r.get("coins", {}).get("respawn", {}),
                 objects=objects,
@@ -147,12 +306,13 @@ class WorldLoader:
                     description=raw.get("description", ""),
                 )
 
-        return rooms, rooms_state, items, ghosts
+        return rooms, exit_table, rooms_state, items, ghosts
 
     def _generate_procedural_world(
         self, world_data: Dict[str, object]
     ) -> Tuple[
         Dict[str, RoomDefinition],
+        ExitTable,
         Dict[str, RoomState],
         Dict[str, ItemDefinition],
         Dict[str, GhostState],
@@ -161,7 +321,8 @@ class WorldLoader:
         if room_count < 1:
             room_count = 1
 
-        rng = random.Random()
+        # An optional "seed" makes the generated world reproducible.
+        rng = random.Random(world_data.get("seed"))
 
         num_two = int(room_count * 0.8)
         num_one = int(room_count * 0.1)
@@ -180,7 +341,7 @@ class WorldLoader:
                     degrees[i] = d + 1
                     break
 
-        edges = self._build_random_graph(room_count, degrees, rng)
+        edges = build_random_graph(room_count, degrees, rng)
 
         locked_doors_target = max(1, room_count // 10)
         all_edges = list(edges)
@@ -192,7 +353,8 @@ class WorldLoader:
             key_id = f"key_{idx}"
             locked_edge_keys[edge] = key_id
 
-        exits_by_index: List[Dict[str, ExitDefinition]] = [{} for _ in range(room_count)]
+        exits_by_index: List[List[ExitSpec]] = [[] for _ in range(room_count)]
+        room_ids = [f"room_{idx}" for idx in range(room_count)]
         used_dirs: List[Set[str]] = [set() for _ in range(room_count)]
         dir_pairs = [
             ("north", "south"),
@@ -219,18 +381,8 @@ class WorldLoader:
             key_id = locked_edge_keys.get(edge_key)
             locked = key_id is not None
 
-            exits_by_index[u][d1] = ExitDefinition(
-                direction=d1,
-                target_room_id=f"room_{v}",
-                locked=locked,
-                key_id=key_id,
-            )
-            exits_by_index[v][d2] = ExitDefinition(
-                direction=d2,
-                target_room_id=f"room_{u}",
-                locked=locked,
-                key_id=key_id,
-            )
+            exits_by_index[u].append((d1, room_ids[v], locked, key_id))
+            exits_by_index[v].append((d2, room_ids[u], locked, key_id))
 
         coins_cfg = world_data.get("coins", {})
         mean = float(coins_cfg.get("mean", 4.0))
@@ -280,8 +432,9 @@ class WorldLoader:
             "Guardroom",
         ]
 
-        for idx in range(room_count):
-            room_id = f"room_{idx}"
+        exit_table = ExitTable(room_ids)
+        no_respawn: Dict[str, object] = {"enabled": False}
+        for idx, room_id in enumerate(room_ids):
             adj = room_adjectives[idx % len(room_adjectives)]
             noun = room_nouns[idx % len(room_nouns)]
             name = f"{adj} {noun}"
@@ -295,9 +448,9 @@ class WorldLoader:
                 id=room_id,
                 name=name,
                 description=description,
-                exits=exits_by_index[idx],
+                exits=exit_table.add_room(exits_by_index[idx]),
                 coins_initial=coins_initial,
-                coins_respawn={"enabled": False},
+                coins_respawn=no_respawn,
                 objects=[],
                 appearance=base_appearance,
             )
@@ -393,7 +546,7 @@ class WorldLoader:
                 description=desc,
             )
 
-        return rooms, rooms_state, items, ghosts
+        return rooms, exit_table, rooms_state, items, ghosts
 
     def _write_world_definition(
         self,
@@ -465,65 +618,3 @@ class WorldLoader:
             "locked": exit_def.locked,
             "keyId": exit_def.key_id,
         }
-
-    def _build_random_graph(
-        self, room_count: int, degrees: List[int], rng: random.Random
-    ) -> Set[Tuple[int, int]]:
-        if room_count <= 1:
-            return set()
-
-        max_attempts = 64
-        for _ in range(max_attempts):
-            remaining = list(degrees)
-            edges: Set[Tuple[int, int]] = set()
-            adjacency: List[Set[int]] = [set() for _ in range(room_count)]
-
-            candidates = [i for i, d in enumerate(remaining) if d > 0]
-            failed = False
-
-            while candidates:
-                u = rng.choice(candidates)
-                possible = [v for v in candidates if v != u and v not in adjacency[u]]
-                if not possible:
-                    failed = True
-                    break
-                v = rng.choice(possible)
-                edge = (u, v) if u < v else (v, u)
-                edges.add(edge)
-                adjacency[u].add(v)
-                adjacency[v].add(u)
-                remaining[u] -= 1
-                remaining[v] -= 1
-                if remaining[u] < 0 or remaining[v] < 0:
-                    failed = True
-                    break
-                candidates = [i for i, d in enumerate(remaining) if d > 0]
-
-            if failed:
-                continue
-            if any(d != 0 for d in remaining):
-                continue
-            if self._is_connected(room_count, edges):
-                return edges
-
-        fallback_edges: Set[Tuple[int, int]] = set()
-        for i in range(room_count - 1):
-            fallback_edges.add((i, i + 1))
-        return fallback_edges
-
-    def _is_connected(self, room_count: int, edges: Set[Tuple[int, int]]) -> bool:
-        if room_count == 0:
-            return True
-        adjacency: Dict[int, Set[int]] = {i: set() for i in range(room_count)}
-        for u, v in edges:
-            adjacency[u].add(v)
-            adjacency[v].add(u)
-        visited: Set[int] = set()
-        stack: List[int] = [0]
-        while stack:
-            node = stack.pop()
-            if node in visited:
-                continue
-            visited.add(node)
-            stack.extend(adjacency[node] - visited)
-        return len(visited) == room_count
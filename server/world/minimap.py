@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from ..models import RoomDefinition, RoomState
+
+WIDTH = 15
+HEIGHT = 15
+STEP = 4
+CENTER_X = WIDTH // 2
+CENTER_Y = HEIGHT // 2
+
+OFFSETS = {
+    "north": (0, -1),
+    "south": (0, 1),
+    "west": (-1, 0),
+    "east": (1, 0),
+}
+
+
+@dataclass(frozen=True)
+class MinimapLayout:
+    """The fixed part of one room's minimap: base grid plus neighbour slots."""
+
+    base: Tuple[Tuple[str, ...], ...]
+    # (neighbour room id, block centre x, block centre y) per drawn neighbour.
+    neighbours: Tuple[Tuple[str, int, int], ...]
+
+
+def _draw_block(grid: List[List[str]], cx: int, cy: int, ch: str) -> None:
+    for dy in (-1, 0):
+        for dx in (-1, 0):
+            x = cx + dx
+            y = cy + dy
+            if 0 <= x < WIDTH and 0 <= y < HEIGHT:
+                grid[y][x] = ch
+
+
+class MinimapRenderer:
+    """
+    Render the 15x15 minimap around a room.
+
+    Room topology never changes, so each room's layout (centre block, links
+    and empty neighbour blocks) is computed once. The only varying input is
+    which neighbours hold other players; finished strings are cached per
+    (room, occupancy bitmask), so a call is usually a handful of set checks
+    and a dict hit. Both caches are LRU-bounded, layouts by ``max_layouts``
+    and strings by ``max_entries``, so a paged world is not pinned in memory
+    one layout at a time.
+    """
+
+    def __init__(self, max_entries: int = 10_000, max_layouts: int = 10_000) -> None:
+        self.max_entries = max_entries
+        self.max_layouts = max_layouts
+        self.hits = 0
+        self.misses = 0
+        self._layouts: "OrderedDict[str, MinimapLayout]" = OrderedDict()
+        self._rendered: "OrderedDict[Tuple[str, int], str]" = OrderedDict()
+
+    def layout(
+        self, room_def: RoomDefinition, rooms_state: Dict[str, RoomState]
+    ) -> MinimapLayout:
+        layout = self._layouts.get(room_def.id)
+        if layout is not None:
+            self._layouts.move_to_end(room_def.id)
+            return layout
+
+        grid: List[List[str]] = [[" " for _ in range(WIDTH)] for _ in range(HEIGHT)]
+        _draw_block(grid, CENTER_X, CENTER_Y, "*")
+        neighbours: List[Tuple[str, int, int]] = []
+        for direction, exit_def in room_def.exits.items():
+            offset = OFFSETS.get(direction)
+            if not offset:
+                continue
+            dx, dy = offset
+            cx = CENTER_X + dx * STEP
+            cy = CENTER_Y + dy * STEP
+            if exit_def.target_room_id in rooms_state:
+                _draw_block(grid, cx, cy, ".")
+                neighbours.append((exit_def.target_room_id, cx, cy))
+            if dx == 0:
+                grid[CENTER_Y + dy * (STEP // 2)][CENTER_X] = "|"
+            else:
+                grid[CENTER_Y][CENTER_X + dx * (STEP // 2)] = "-"
+
+        layout = MinimapLayout(
+            base=tuple(tuple(row) for row in grid),
+            neighbours=tuple(neighbours),
+        )
+        self._layouts[room_def.id] = layout
+        if len(self._layouts) > self.max_layouts:
+            self._layouts.popitem(last=False)
+        return layout
+
+    def render(
+        self,
+        room_def: RoomDefinition,
+        rooms_state: Dict[str, RoomState],
+        viewer_id: Optional[str],
+    ) -> str:
+        layout = self.layout(room_def, rooms_state)
+        mask = 0
+        for bit, (neighbour_id, _, _) in enumerate(layout.neighbours):
+            players = rooms_state[neighbour_id].players
+            if any(pid != viewer_id for pid in players):
+                mask |= 1 << bit
+
+        key = (room_def.id, mask)
+        cached = self._rendered.get(key)
+        if cached is not None:
+            self._rendered.move_to_end(key)
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        grid = [list(row) for row in layout.base]
+        for bit, (_, cx, cy) in enumerate(layout.neighbours):
+            if mask & (1 << bit):
+                _draw_block(grid, cx, cy, "P")
+        rendered = "\n".join("".join(row) for row in grid)
+        self._rendered[key] = rendered
+        if len(self._rendered) > self.max_entries:
+            self._rendered.popitem(last=False)
+        return rendered
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+
+class _TrieNode:
+    __slots__ = ("children", "player_ids")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, _TrieNode] = {}
+        # Players whose lowercased first name starts with the path to here.
+        self.player_ids: Set[str] = set()
+
+
+class NameIndex:
+    """
+    Player names indexed for /tell, /yell and /reply target lookups.
+
+    A trie over lowercased first names answers prefix queries by walking
+    ``len(query)`` nodes; exact first and full names are kept in plain
+    dicts. The engine updates it when players are allocated and released,
+    so a lookup never scans or re-splits the names of everyone online.
+    """
+
+    def __init__(self) -> None:
+        self._root = _TrieNode()
+        self._by_first: Dict[str, Set[str]] = {}
+        self._by_full: Dict[str, Set[str]] = {}
+
+    @staticmethod
+    def _keys(name: str) -> Tuple[str, str]:
+        parts = name.split()
+        return name.lower(), parts[0].lower() if parts else ""
+
+    def add(self, player_id: str, name: str) -> None:
+        full, first = self._keys(name)
+        self._by_full.setdefault(full, set()).add(player_id)
+        self._by_first.setdefault(first, set()).add(player_id)
+        node = self._root
+        node.player_ids.add(player_id)
+        for char in first:
+            node = node.children.setdefault(char, _TrieNode())
+            node.player_ids.add(player_id)
+
+    def remove(self, player_id: str, name: str) -> None:
+        full, first = self._keys(name)
+        _discard(self._by_full, full, player_id)
+        _discard(self._by_first, first, player_id)
+        node = self._root
+        node.player_ids.discard(player_id)
+        for char in first:
+            child = node.children.get(char)
+            if child is None:
+                return
+            child.player_ids.discard(player_id)
+            if not child.player_ids:
+                # Nothing below an empty node is used by anyone either.
+                del node.children[char]
+                return
+            node = child
+
+    def _with_prefix(self, prefix: str) -> Set[str]:
+        node = self._root
+        for char in prefix:
+            child = node.children.get(char)
+            if child is None:
+                return set()
+            node = child
+        return node.player_ids
+
+    def resolve(
+        self, name_query: str, is_online: Callable[[str], bool]
+    ) -> Optional[str]:
+        """
+        Resolve a name query to a single online player id.
+
+        A player matches if the query (case-insensitive) is their full name
+        or a prefix of their first name. One match wins; among several, a
+        single player whose first or full name equals the query wins.
+        Anything else is ambiguous and returns None.
+        """
+        query = name_query.lower().strip()
+        if not query:
+            return None
+
+        full_matches = self._by_full.get(query, ())
+        matches = _first_online(
+            _chain(self._with_prefix(query), full_matches), is_online, limit=2
+        )
+        if len(matches) == 1:
+            return matches[0]
+        if not matches:
+            return None
+        exact = _first_online(
+            _chain(self._by_first.get(query, ()), full_matches), is_online, limit=2
+        )
+        if len(exact) == 1:
+            return exact[0]
+        return None
+
+
+def _discard(index: Dict[str, Set[str]], key: str, player_id: str) -> None:
+    ids = index.get(key)
+    if ids is not None:
+        ids.discard(player_id)
+        if not ids:
+            del index[key]
+
+
+def _chain(*groups: Iterable[str]) -> Iterator[str]:
+    seen: Set[str] = set()
+    for group in groups:
+        for player_id in group:
+            if player_id not in seen:
+                seen.add(player_id)
+                yield player_id
+
+
+def _first_online(
+    player_ids: Iterable[str], is_online: Callable[[str], bool], limit: int
+) -> List[str]:
+    found: List[str] = []
+    for player_id in player_ids:
+        if is_online(player_id):
+            found.append(player_id)
+            if len(found) == limit:
+                break
+    return found
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+from typing import Iterable, List, Mapping, Optional, Tuple
+
+from ..models import ExitTable, GhostState, RoomDefinition
+
+try:  # NumPy is optional; only the vectorized NPC engine needs it.
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+NUMPY_AVAILABLE = np is not None
+
+
+class VectorizedNpcEngine:
+    """
+    Array-backed random walk for large NPC populations.
+
+    Rooms are numbered once and their exits stored as a CSR adjacency
+    (``indptr``/``indices``), NPC positions live in one int array, and a tick
+    is a handful of array operations regardless of how many NPCs there are.
+    Encounters come from joining positions against the indices of rooms that
+    hold players. New positions are mirrored onto the ``GhostState`` objects
+    so persistence keeps working unchanged; the per-room ghost index on
+    ``RoomState`` is not maintained in this mode. Requires NumPy.
+
+    Given the world's ``ExitTable`` the CSR is copied straight out of its
+    arrays, so building it never touches room definitions (and never pages
+    them in); ``rooms`` is only walked when there is no table.
+    """
+
+    def __init__(
+        self,
+        rooms: Mapping[str, RoomDefinition],
+        npcs: Mapping[str, GhostState],
+        seed: Optional[int] = None,
+        exits: Optional[ExitTable] = None,
+    ) -> None:
+        if np is None:
+            raise RuntimeError(
+                "The vectorized NPC engine requires NumPy (pip install numpy)."
+            )
+        if exits is not None:
+            self.room_ids: List[str] = exits.room_ids
+            self.room_index = exits.room_index
+            self.indptr = np.asarray(exits.offsets, dtype=np.int64)
+            self.indices = np.array(exits.targets, dtype=np.int32)
+        else:
+            self.room_ids = list(rooms.keys())
+            self.room_index = {
+                room_id: idx for idx, room_id in enumerate(self.room_ids)
+            }
+            indptr = [0]
+            indices: List[int] = []
+            for room_id in self.room_ids:
+                for exit_def in rooms[room_id].exits.values():
+                    target = self.room_index.get(exit_def.target_room_id)
+                    if target is not None:
+                        indices.append(target)
+                indptr.append(len(indices))
+            self.indptr = np.asarray(indptr, dtype=np.int64)
+            self.indices = np.asarray(indices, dtype=np.int32)
+        self.degree = np.diff(self.indptr)
+
+        self.npcs: List[GhostState] = []
+        positions: List[int] = []
+        for npc in npcs.values():
+            idx = self.room_index.get(npc.room_id)
+            if idx is None:
+                continue
+            self.npcs.append(npc)
+            positions.append(idx)
+        self.positions = np.asarray(positions, dtype=np.int32)
+        self.rng = np.random.default_rng(seed)
+
+    def step(self, frozen_room_ids: Iterable[str] = ()) -> List[str]:
+        """
+        Move every NPC along one random exit; return the ids of those that moved.
+
+        NPCs neither leave nor enter the rooms in ``frozen_room_ids``.
+        """
+        if not len(self.positions):
+            return []
+        degree = self.degree[self.positions]
+        movable = np.nonzero(degree > 0)[0]
+        if not len(movable):
+            return []
+        current = self.positions[movable]
+        choice = (self.rng.random(len(movable)) * degree[movable]).astype(np.int64)
+        target = self.indices[self.indptr[current] + choice]
+        changed = target != current
+        frozen = self._indices_of(frozen_room_ids)
+        if len(frozen):
+            changed &= ~(np.isin(current, frozen) | np.isin(target, frozen))
+        moved = movable[changed]
+        self.positions[moved] = target[changed]
+
+        npcs = self.npcs
+        room_ids = self.room_ids
+        moved_ids: List[str] = []
+        for idx, room_idx in zip(moved.tolist(), target[changed].tolist()):
+            npc = npcs[idx]
+            npc.room_id = room_ids[room_idx]
+            moved_ids.append(npc.id)
+        return moved_ids
+
+    def encounters(self, occupied_room_ids: Iterable[str]) -> List[Tuple[str, str]]:
+        """Return ``(npc_id, room_id)`` for every NPC standing in an occupied room."""
+        occupied = self._indices_of(occupied_room_ids)
+        if not len(occupied) or not len(self.positions):
+            return []
+        hits = np.nonzero(np.isin(self.positions, occupied))[0]
+        return [(self.npcs[idx].id, self.npcs[idx].room_id) for idx in hits.tolist()]
+
+    def _indices_of(self, room_ids: Iterable[str]) -> "np.ndarray":
+        return np.fromiter(
+            (
+                self.room_index[room_id]
+                for room_id in set(room_ids)
+                if room_id in self.room_index
+            ),
+            dtype=np.int32,
+        )
@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import io
+import pickle
+from collections import OrderedDict
+from pathlib import Path
+from typing import (
+    BinaryIO,
+    Dict,
+    FrozenSet,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from ..models import ExitTable, RoomDefinition
+from .respawn import respawn_rule
+
+
+class PagedRoomStore(Mapping[str, RoomDefinition]):
+    """
+    Room definitions read on demand from an indexed page file.
+
+    Rooms are stored in pages of ``page_size`` pickled definitions; only the
+    small id -> page index stays in memory. At most ``max_pages`` pages are
+    kept, evicting the least recently used page none of whose rooms is
+    pinned. The engine pins rooms with players, ghosts or pending respawns
+    through ``set_pinned`` as they change, and pins are kept per page, so
+    checking an eviction candidate is a single lookup. If every loaded page
+    is pinned the store grows past ``max_pages`` rather than drop one.
+
+    It behaves like the plain ``Dict[str, RoomDefinition]`` it replaces, so
+    the engine does not care which one it has; only iterating over values
+    pulls every page through memory. The world's ``ExitTable`` stays
+    resident and is shared by every page rather than copied into each, so
+    doors unlocked in a page that is later evicted stay unlocked.
+    """
+
+    def __init__(
+        self,
+        pages_file: Path,
+        key: str,
+        page_of: Dict[str, int],
+        offsets: List[Tuple[int, int]],
+        respawn_room_ids: FrozenSet[str],
+        exits: Optional[ExitTable],
+        max_pages: int = 256,
+    ) -> None:
+        self.pages_file = pages_file
+        self.key = key
+        self.page_of = page_of
+        self.offsets = offsets
+        self.exits = exits
+        self.respawn_room_ids = respawn_room_ids
+        self.max_pages = max_pages
+        self.page_loads = 0
+        self.evictions = 0
+        self._pages: "OrderedDict[int, Dict[str, RoomDefinition]]" = OrderedDict()
+        self._file: Optional[BinaryIO] = None
+        # Page number -> its pinned rooms; pages without any are absent.
+        self._pinned: Dict[int, Set[str]] = {}
+
+    @classmethod
+    def build(
+        cls,
+        pages_file: Path,
+        key: str,
+        rooms: Mapping[str, RoomDefinition],
+        exits: Optional[ExitTable],
+        page_size: int = 1024,
+        max_pages: int = 256,
+    ) -> "PagedRoomStore":
+        """Write ``rooms`` to ``pages_file`` and return a store reading from it."""
+        page_of: Dict[str, int] = {}
+        offsets: List[Tuple[int, int]] = []
+        respawn_room_ids = frozenset(
+            room_id for room_id, room_def in rooms.items() if respawn_rule(room_def)
+        )
+        room_ids = list(rooms.keys())
+        tmp = pages_file.with_suffix(pages_file.suffix + ".tmp")
+        with open(tmp, "wb") as f:
+            pickle.dump(key, f, protocol=pickle.HIGHEST_PROTOCOL)
+            for page_no, start in enumerate(range(0, len(room_ids), page_size)):
+                page = {
+                    room_id: rooms[room_id]
+                    for room_id in room_ids[start : start + page_size]
+                }
+                for room_id in page:
+                    page_of[room_id] = page_no
+                buffer = io.BytesIO()
+                _PagePickler(buffer, exits).dump(page)
+                offsets.append((f.tell(), buffer.tell()))
+                f.write(buffer.getbuffer())
+        tmp.replace(pages_file)
+        return cls(
+            pages_file, key, page_of, offsets, respawn_room_ids, exits, max_pages
+        )
+
+    def open(self) -> BinaryIO:
+        """Open the page file, checking it belongs to the same source hash."""
+        if self._file:
+            return self._file
+        f = open(self.pages_file, "rb")
+        try:
+            if pickle.load(f) != self.key:
+                raise ValueError(f"{self.pages_file} does not match the world index")
+        except Exception:
+            f.close()
+            raise
+        self._file = f
+        return f
+
+    def close(self) -> None:
+        if self._file:
+            self._file.close()
+            self._file = None
+        self._pages.clear()
+
+    @property
+    def loaded_pages(self) -> int:
+        return len(self._pages)
+
+    def set_pinned(self, room_id: str, pinned: bool) -> None:
+        """Keep ``room_id``'s page loaded while ``pinned``, e.g. while occupied."""
+        page_no = self.page_of.get(room_id)
+        if page_no is None:
+            return
+        rooms = self._pinned.get(page_no)
+        if pinned:
+            if rooms is None:
+                self._pinned[page_no] = {room_id}
+            else:
+                rooms.add(room_id)
+        elif rooms is not None:
+            rooms.discard(room_id)
+            if not rooms:
+                del self._pinned[page_no]
+
+    def __getstate__(self) -> Dict[str, object]:
+        state = self.__dict__.copy()
+        state["_pages"] = OrderedDict()
+        state["_file"] = None
+        state["_pinned"] = {}
+        return state
+
+    def __getitem__(self, room_id: str) -> RoomDefinition:
+        return self._page(self.page_of[room_id])[room_id]
+
+    def __contains__(self, room_id: object) -> bool:
+        return room_id in self.page_of
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.page_of)
+
+    def __len__(self) -> int:
+        return len(self.page_of)
+
+    def _page(self, page_no: int) -> Dict[str, RoomDefinition]:
+        page = self._pages.get(page_no)
+        if page is not None:
+            self._pages.move_to_end(page_no)
+            return page
+        f = self.open()
+        offset, length = self.offsets[page_no]
+        f.seek(offset)
+        page = _PageUnpickler(io.BytesIO(f.read(length)), self.exits).load()
+        self.page_loads += 1
+        self._pages[page_no] = page
+        self._evict(keep=page_no)
+        return page
+
+    def _evict(self, keep: int) -> None:
+        while len(self._pages) > self.max_pages:
+            for page_no in self._pages:
+                if page_no != keep and page_no not in self._pinned:
+                    del self._pages[page_no]
+                    self.evictions += 1
+                    break
+            else:
+                return
+
+
+class _PagePickler(pickle.Pickler):
+    """Pickle a page with the shared exit table left out, by reference."""
+
+    def __init__(self, file: BinaryIO, exits: Optional[ExitTable]) -> None:
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.exits = exits
+
+    def persistent_id(self, obj: object) -> Optional[str]:
+        if obj is not None and obj is self.exits:
+            return "exits"
+        return None
+
+
+class _PageUnpickler(pickle.Unpickler):
+    def __init__(self, file: BinaryIO, exits: Optional[ExitTable]) -> None:
+        super().__init__(file)
+        self.exits = exits
+
+    def persistent_load(self, pid: object) -> ExitTable:
+        if pid != "exits" or self.exits is None:
+            raise pickle.UnpicklingError(f"Unknown page reference {pid!r}")
+        return self.exits
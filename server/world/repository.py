@@ -1,28 +1,51 @@
 from __future__ import annotations
 
 import json
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterable, List, Literal, Optional
 
 from ..models import CharacterSave, WorldState
 
+logger = logging.getLogger(__name__)
 
-class WorldRepository:
-    """Persist and restore dynamic world state."""
+FsyncPolicy = Literal["always", "interval", "never"]
 
-    def __init__(self, save_file: Path) -> None:
-        self.save_file = save_file
 
+class BaseWorldRepository(ABC):
+    """
+    Interface for persisting and restoring dynamic world state.
+
+    Payloads are plain dicts with ``rooms``, ``characters`` and ``ghosts``
+    sections keyed by entity id. A full snapshot and a delta share that
+    shape; a delta simply lists fewer entities. Backends that cannot cheaply
+    absorb an unbounded stream of deltas set ``compact_every`` so the engine
+    periodically hands them a full snapshot instead.
+    """
+
+    compact_every: Optional[int] = None
+    journal_entries: int = 0
+
+    @abstractmethod
     def restore_state(self, state: WorldState) -> None:
         """Populate runtime state with data from disk if available."""
-        if not self.save_file.exists():
-            return
-        try:
-            with open(self.save_file, "r", encoding="utf-8") as f:
-                data = json.load(f)
-        except Exception:
-            return
 
+    @abstractmethod
+    def write_save(self, payload: Dict[str, object]) -> None:
+        """Persist a full snapshot."""
+
+    @abstractmethod
+    def write_delta(self, payload: Dict[str, object]) -> None:
+        """Persist only the entities listed in ``payload``."""
+
+    def close(self) -> None:
+        """Release any handles held by the backend."""
+
+    def apply_payload(self, state: WorldState, data: Dict[str, object]) -> None:
+        """Apply a snapshot or journal entry on top of ``state``."""
         rooms_data: Dict[str, Dict[str, object]] = data.get("rooms", {})
         for room_id, raw in rooms_data.items():
             room_state = state.rooms_state.get(room_id)
@@ -36,6 +59,7 @@ class WorldRepository:
                 room_state.items = [
                     item_id for item_id in items if item_id in state.config.items
                 ]
+            room_state.touch()
 
         characters_data = data.get("characters", {})
         for char_id, raw in characters_data.items():
@@ -65,32 +89,242 @@ class WorldRepository:
                 ghost_state.room_id = room_id
 
     def build_save_payload(self, state: WorldState) -> Dict[str, object]:
-        return {
-            "rooms": {
-                room_id: {
+        """
+        Build a full snapshot of ``state``.
+
+        May run in the persistence worker's thread while the game keeps
+        going, so the id lists are copied up front (``list`` of a dict is
+        atomic) rather than iterated live. An entity changed mid-build is
+        also in a delta queued after this snapshot, which restores it.
+        """
+        return self.build_delta_payload(
+            state,
+            room_ids=list(state.rooms_state),
+            character_ids=list(state.character_saves),
+            ghost_ids=list(state.ghosts),
+        )
+
+    def build_delta_payload(
+        self,
+        state: WorldState,
+        room_ids: Iterable[str] = (),
+        character_ids: Iterable[str] = (),
+        ghost_ids: Iterable[str] = (),
+    ) -> Dict[str, object]:
+        """Build a payload holding only the listed entities."""
+        rooms: Dict[str, object] = {}
+        for room_id in room_ids:
+            room_state = state.rooms_state.get(room_id)
+            if room_state:
+                rooms[room_id] = {
                     "coins": room_state.coins,
                     "items": list(room_state.items),
                 }
-                for room_id, room_state in state.rooms_state.items()
-            },
-            "characters": {
-                char_id: {
+        characters: Dict[str, object] = {}
+        for char_id in character_ids:
+            cs = state.character_saves.get(char_id)
+            if cs:
+                characters[char_id] = {
                     "roomId": cs.room_id,
                     "coins": cs.coins,
                     "items": list(cs.items),
                 }
-                for char_id, cs in state.character_saves.items()
-            },
-            "ghosts": {
-                ghost_id: {"roomId": ghost.room_id}
-                for ghost_id, ghost in state.ghosts.items()
-            },
-        }
+        ghosts: Dict[str, object] = {}
+        for ghost_id in ghost_ids:
+            ghost = state.ghosts.get(ghost_id)
+            if ghost:
+                ghosts[ghost_id] = {"roomId": ghost.room_id}
+        return {"rooms": rooms, "characters": characters, "ghosts": ghosts}
+
+
+class WorldRepository(BaseWorldRepository):
+    """
+    Persist and restore dynamic world state as JSON files.
+
+    State lives in two files: a compacted snapshot (``savegame.json``) and an
+    append-only journal next to it (``savegame.journal``). Each mutation
+    appends one line holding only the entities it changed; the snapshot is
+    rewritten every ``compact_every`` journal entries, which truncates the
+    journal. Snapshots and journal entries share the same shape, and every
+    entry stores absolute values, so replaying an entry twice is harmless.
+
+    Each snapshot carries a ``generation`` number and every journal line the
+    generation of the snapshot it follows. A crash after a new snapshot is
+    renamed into place but before the journal is truncated leaves older
+    lines behind; ``restore_state`` skips those instead of rolling the newer
+    snapshot back.
+
+    Snapshots are written to a temp file and renamed into place, keeping
+    ``backup_count`` older generations (``savegame.json.1``, ``.2``, ...)
+    that ``restore_state`` falls back through if the newest one is
+    unreadable. ``fsync`` controls durability: ``"always"`` syncs every
+    write, ``"interval"`` syncs at most every ``fsync_interval`` seconds and
+    ``"never"`` leaves flushing to the OS.
+    """
+
+    def __init__(
+        self,
+        save_file: Path,
+        compact_every: int = 500,
+        fsync: FsyncPolicy = "interval",
+        fsync_interval: float = 1.0,
+        backup_count: int = 3,
+    ) -> None:
+        if fsync not in ("always", "interval", "never"):
+            raise ValueError(f"Unknown fsync policy: {fsync}")
+        self.save_file = save_file
+        self.journal_file = save_file.with_suffix(".journal")
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.backup_count = backup_count
+        self.journal_entries = 0
+        self.generation = 0
+        self._last_fsync = float("-inf")
+
+    def backup_files(self) -> List[Path]:
+        return [
+            self.save_file.with_name(f"{self.save_file.name}.{generation}")
+            for generation in range(1, self.backup_count + 1)
+        ]
+
+    def restore_state(self, state: WorldState) -> None:
+        """Load the newest readable snapshot, then replay the journal after it."""
+        snapshot_generation = 0
+        for path in [self.save_file, *self.backup_files()]:
+            data = self._read_snapshot(path)
+            if data is not None:
+                if path != self.save_file:
+                    logger.warning("Restored world state from backup %s", path)
+                self.apply_payload(state, data)
+                snapshot_generation = _generation(data)
+                break
+
+        self.generation = snapshot_generation
+        self.journal_entries = 0
+        if not self.journal_file.exists():
+            return
+        with open(self.journal_file, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    delta = json.loads(line)
+                except ValueError:
+                    # A crash mid-append leaves a torn final line; skip it.
+                    continue
+                if not isinstance(delta, dict):
+                    continue
+                generation = _generation(delta)
+                if generation < snapshot_generation:
+                    # Left over from before the snapshot; already in it.
+                    continue
+                self.apply_payload(state, delta)
+                self.generation = max(self.generation, generation)
+                self.journal_entries += 1
+
+    def _read_snapshot(self, path: Path) -> Optional[Dict[str, object]]:
+        if not path.exists():
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception:
+            logger.warning("Could not read save file %s", path, exc_info=True)
+            return None
+        if not isinstance(data, dict):
+            logger.warning("Ignoring malformed save file %s", path)
+            return None
+        return data
 
     def write_save(self, payload: Dict[str, object]) -> None:
+        """Atomically replace the snapshot, rotate backups and start a fresh journal."""
+        tmp_file = self.save_file.with_name(self.save_file.name + ".tmp")
+        generation = self.generation + 1
         try:
-            with open(self.save_file, "w", encoding="utf-8") as f:
-                json.dump(payload, f, indent=2)
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(
+                    {**payload, "generation": generation}, f, separators=(",", ":")
+                )
+                if self.fsync != "never":
+                    # Snapshots are rare; sync them regardless of the interval
+                    # so the rename below never exposes a half-written file.
+                    f.flush()
+                    os.fsync(f.fileno())
+            self._rotate_backups()
+            os.replace(tmp_file, self.save_file)
+            self.generation = generation
+            if self._fsync_due():
+                self._fsync_directory()
+            with open(self.journal_file, "w", encoding="utf-8"):
+                pass
+            self.journal_entries = 0
         except Exception:
             # Persistence errors should not break gameplay.
+            logger.exception("Failed to write save file %s", self.save_file)
+            return
+
+    def write_delta(self, payload: Dict[str, object]) -> None:
+        """Append one journal entry."""
+        entry: Dict[str, object] = {
+            section: values for section, values in payload.items() if values
+        }
+        if not entry:
+            return
+        entry["generation"] = self.generation
+        try:
+            with open(self.journal_file, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+                if self._fsync_due():
+                    f.flush()
+                    os.fsync(f.fileno())
+            self.journal_entries += 1
+        except Exception:
+            logger.exception("Failed to append to journal %s", self.journal_file)
+            return
+
+    def _rotate_backups(self) -> None:
+        if not self.save_file.exists() or self.backup_count < 1:
+            return
+        backups = self.backup_files()
+        for older, newer in zip(reversed(backups), reversed(backups[:-1])):
+            if newer.exists():
+                os.replace(newer, older)
+        os.replace(self.save_file, backups[0])
+
+    def _fsync_due(self) -> bool:
+        if self.fsync == "always":
+            return True
+        if self.fsync == "never":
+            return False
+        now = time.monotonic()
+        if now - self._last_fsync < self.fsync_interval:
+            return False
+        self._last_fsync = now
+        return True
+
+    def _fsync_directory(self) -> None:
+        # Make the rename itself durable; directories can't be opened on Windows.
+        if os.name != "posix":
             return
+        fd = os.open(self.save_file.parent, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def _generation(data: Dict[str, object]) -> int:
+    # Saves written before generations existed count as generation 0.
+    generation = data.get("generation", 0)
+    return generation if isinstance(generation, int) else 0
+
+
+def merge_payloads(target: Dict[str, object], update: Dict[str, object]) -> None:
+    """Fold ``update`` into ``target`` in place; later entities win."""
+    for section, values in update.items():
+        if not values:
+            continue
+        existing = target.get(section)
+        if isinstance(existing, dict):
+            existing.update(values)
+        else:
+            target[section] = dict(values)
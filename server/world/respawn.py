@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import heapq
+import time
+from dataclasses import dataclass
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    KeysView,
+    List,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from ..models import RoomDefinition
+
+DEFAULT_RESPAWN_SECONDS = 300.0
+
+
+@dataclass(frozen=True)
+class RespawnRule:
+    interval: float
+    amount: int
+
+
+def respawn_rule(room_def: RoomDefinition) -> Optional[RespawnRule]:
+    """
+    Parse a room's ``coins.respawn`` config.
+
+    ``{"enabled": true, "intervalSeconds": 120, "amount": 4}`` refills the
+    room to 4 coins two minutes after it was emptied. ``amount`` defaults to
+    the room's initial coins and ``intervalSeconds`` to five minutes.
+    """
+    config = room_def.coins_respawn or {}
+    if not config.get("enabled"):
+        return None
+    amount = int(config.get("amount", room_def.coins_initial))
+    interval = float(config.get("intervalSeconds", DEFAULT_RESPAWN_SECONDS))
+    if amount <= 0:
+        return None
+    return RespawnRule(interval=max(0.0, interval), amount=amount)
+
+
+class CoinRespawner:
+    """
+    Track emptied rooms and hand them back once their respawn delay passed.
+
+    Only rooms that were actually emptied are scheduled, in a heap ordered
+    by due time, so checking for work costs nothing while no room is due no
+    matter how large the world is. ``due`` returns at most ``batch_size``
+    rooms per call; the rest stay queued for the next call.
+
+    Rules are parsed once up front and kept only for rooms that have one;
+    ``candidates`` narrows that scan to the given room ids, e.g. so a paged
+    world does not load every room to find the few that respawn.
+    """
+
+    def __init__(
+        self,
+        rooms: Mapping[str, RoomDefinition],
+        clock: Callable[[], float] = time.monotonic,
+        batch_size: int = 500,
+        candidates: Optional[Iterable[str]] = None,
+    ) -> None:
+        self.rooms = rooms
+        self.clock = clock
+        self.batch_size = batch_size
+        self._rules: Dict[str, RespawnRule] = {}
+        for room_id in rooms if candidates is None else candidates:
+            rule = respawn_rule(rooms[room_id])
+            if rule:
+                self._rules[room_id] = rule
+        self._heap: List[Tuple[float, str]] = []
+        self._scheduled: Set[str] = set()
+
+    @property
+    def room_ids(self) -> KeysView[str]:
+        """Ids of the rooms that have a respawn rule."""
+        return self._rules.keys()
+
+    def rule_for(self, room_id: str) -> Optional[RespawnRule]:
+        return self._rules.get(room_id)
+
+    @property
+    def pending(self) -> int:
+        return len(self._scheduled)
+
+    def is_scheduled(self, room_id: str) -> bool:
+        return room_id in self._scheduled
+
+    def schedule(self, room_id: str) -> bool:
+        """Queue ``room_id`` for a refill; a room already queued keeps its slot."""
+        if room_id in self._scheduled:
+            return False
+        rule = self.rule_for(room_id)
+        if not rule:
+            return False
+        heapq.heappush(self._heap, (self.clock() + rule.interval, room_id))
+        self._scheduled.add(room_id)
+        return True
+
+    def retry(self, room_id: str) -> None:
+        """Queue ``room_id`` again as due now, for a refill that had to wait."""
+        if room_id in self._scheduled:
+            return
+        heapq.heappush(self._heap, (self.clock(), room_id))
+        self._scheduled.add(room_id)
+
+    def due(self, now: Optional[float] = None) -> List[Tuple[str, RespawnRule]]:
+        """Pop the rooms whose delay has passed, oldest first."""
+        if now is None:
+            now = self.clock()
+        ready: List[Tuple[str, RespawnRule]] = []
+        while self._heap and self._heap[0][0] <= now and len(ready) < self.batch_size:
+            _, room_id = heapq.heappop(self._heap)
+            self._scheduled.discard(room_id)
+            rule = self.rule_for(room_id)
+            if rule:
+                ready.append((room_id, rule))
+        return ready
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from ..models import WorldState
+from .repository import BaseWorldRepository
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rooms (
+    id TEXT PRIMARY KEY,
+    coins INTEGER NOT NULL,
+    items TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS characters (
+    id TEXT PRIMARY KEY,
+    room_id TEXT NOT NULL,
+    coins INTEGER NOT NULL,
+    items TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS ghosts (
+    id TEXT PRIMARY KEY,
+    room_id TEXT NOT NULL
+);
+"""
+
+_UPSERT_ROOM = (
+    "INSERT INTO rooms (id, coins, items) VALUES (?, ?, ?) "
+    "ON CONFLICT(id) DO UPDATE SET coins = excluded.coins, items = excluded.items"
+)
+_UPSERT_CHARACTER = (
+    "INSERT INTO characters (id, room_id, coins, items) VALUES (?, ?, ?, ?) "
+    "ON CONFLICT(id) DO UPDATE SET room_id = excluded.room_id, "
+    "coins = excluded.coins, items = excluded.items"
+)
+_UPSERT_GHOST = (
+    "INSERT INTO ghosts (id, room_id) VALUES (?, ?) "
+    "ON CONFLICT(id) DO UPDATE SET room_id = excluded.room_id"
+)
+
+
+class SqliteWorldRepository(BaseWorldRepository):
+    """
+    Persist dynamic world state as rows in a SQLite database.
+
+    Every room, character save and ghost is one row, so a delta becomes a
+    handful of upserts committed in a single transaction and snapshots are
+    never needed. The database runs in WAL mode; writes arrive from the
+    persistence worker's thread and are serialised by an internal lock.
+    """
+
+    compact_every = None
+
+    def __init__(self, db_file: Path) -> None:
+        self.db_file = db_file
+        self.journal_entries = 0
+        self._write_lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(db_file), check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def restore_state(self, state: WorldState) -> None:
+        """Bulk-load every row and apply it like a snapshot."""
+        data: Dict[str, Dict[str, object]] = {
+            "rooms": {},
+            "characters": {},
+            "ghosts": {},
+        }
+        try:
+            for room_id, coins, items in self._conn.execute(
+                "SELECT id, coins, items FROM rooms"
+            ):
+                data["rooms"][room_id] = {"coins": coins, "items": json.loads(items)}
+            for char_id, room_id, coins, items in self._conn.execute(
+                "SELECT id, room_id, coins, items FROM characters"
+            ):
+                data["characters"][char_id] = {
+                    "roomId": room_id,
+                    "coins": coins,
+                    "items": json.loads(items),
+                }
+            for ghost_id, room_id in self._conn.execute(
+                "SELECT id, room_id FROM ghosts"
+            ):
+                data["ghosts"][ghost_id] = {"roomId": room_id}
+        except (sqlite3.Error, ValueError):
+            logger.warning("Could not read save database %s", self.db_file, exc_info=True)
+            return
+        self.apply_payload(state, data)
+
+    def write_save(self, payload: Dict[str, object]) -> None:
+        # Rows are upserted individually, so a snapshot is just a large delta.
+        self.write_delta(payload)
+
+    def write_delta(self, payload: Dict[str, object]) -> None:
+        rooms: List[Tuple[object, ...]] = [
+            (room_id, raw["coins"], json.dumps(raw["items"]))
+            for room_id, raw in (payload.get("rooms") or {}).items()
+        ]
+        characters: List[Tuple[object, ...]] = [
+            (char_id, raw["roomId"], raw["coins"], json.dumps(raw["items"]))
+            for char_id, raw in (payload.get("characters") or {}).items()
+        ]
+        ghosts: List[Tuple[object, ...]] = [
+            (ghost_id, raw["roomId"])
+            for ghost_id, raw in (payload.get("ghosts") or {}).items()
+        ]
+        if not (rooms or characters or ghosts):
+            return
+        with self._write_lock:
+            try:
+                self._conn.execute("BEGIN")
+                if rooms:
+                    self._conn.executemany(_UPSERT_ROOM, rooms)
+                if characters:
+                    self._conn.executemany(_UPSERT_CHARACTER, characters)
+                if ghosts:
+                    self._conn.executemany(_UPSERT_GHOST, ghosts)
+                self._conn.execute("COMMIT")
+            except sqlite3.Error:
+                # Persistence errors should not break gameplay.
+                logger.exception("Failed to write save database %s", self.db_file)
+                if self._conn.in_transaction:
+                    self._conn.execute("ROLLBACK")
+
+    def close(self) -> None:
+        with self._write_lock:
+            self._conn.close()
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import asyncio
+import inspect
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+SystemCallback = Callable[[], Union[None, Awaitable[None]]]
+
+
+@dataclass
+class SystemStats:
+    runs: int = 0
+    errors: int = 0
+    overruns: int = 0
+    total_time: float = 0.0
+    max_time: float = 0.0
+    last_time: float = 0.0
+
+    @property
+    def mean_time(self) -> float:
+        return self.total_time / self.runs if self.runs else 0.0
+
+
+@dataclass
+class TickSystem:
+    name: str
+    callback: SystemCallback
+    every_ticks: int
+    exclusive: bool
+    stats: SystemStats = field(default_factory=SystemStats)
+
+
+class TickScheduler:
+    """
+    Run periodic world systems on one fixed-timestep clock.
+
+    Each registered system runs every ``every`` seconds, rounded to whole
+    ticks of ``interval`` seconds. Systems registered as ``exclusive`` run
+    together under a single acquisition of ``lock`` (the world registry
+    lock), so they must not block while holding it; the rest run afterwards
+    without the lock.
+
+    A system that takes longer than one tick counts as an overrun. When a
+    whole tick falls behind, the missed ticks are skipped (and counted in
+    ``skipped_ticks``) instead of being replayed in a burst. A failing
+    system is logged and does not stop the others.
+    """
+
+    def __init__(self, lock: asyncio.Lock, interval: float = 0.25) -> None:
+        if interval <= 0:
+            raise ValueError("Tick interval must be positive")
+        self.lock = lock
+        self.interval = interval
+        self.tick_count = 0
+        self.overruns = 0
+        self.skipped_ticks = 0
+        self._systems: List[TickSystem] = []
+        self._task: Optional[asyncio.Task[None]] = None
+
+    def register(
+        self, name: str, callback: SystemCallback, every: float, exclusive: bool = False
+    ) -> TickSystem:
+        if any(system.name == name for system in self._systems):
+            raise ValueError(f"System already registered: {name}")
+        every_ticks = max(1, round(every / self.interval))
+        system = TickSystem(name, callback, every_ticks, exclusive)
+        self._systems.append(system)
+        return system
+
+    def stats(self) -> Dict[str, SystemStats]:
+        return {system.name: system.stats for system in self._systems}
+
+    async def run_tick(self) -> None:
+        """Run every system due on the current tick, then advance the clock."""
+        self.tick_count += 1
+        due = [s for s in self._systems if self.tick_count % s.every_ticks == 0]
+        exclusive = [s for s in due if s.exclusive]
+        if exclusive:
+            async with self.lock:
+                for system in exclusive:
+                    await self._run_system(system)
+        for system in due:
+            if not system.exclusive:
+                await self._run_system(system)
+
+    async def _run_system(self, system: TickSystem) -> None:
+        stats = system.stats
+        start = time.perf_counter()
+        try:
+            result = system.callback()
+            if inspect.isawaitable(result):
+                await result
+        except Exception:
+            stats.errors += 1
+            logger.exception("Tick system %s failed", system.name)
+        elapsed = time.perf_counter() - start
+        stats.runs += 1
+        stats.total_time += elapsed
+        stats.last_time = elapsed
+        stats.max_time = max(stats.max_time, elapsed)
+        if elapsed > self.interval:
+            stats.overruns += 1
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.interval
+        while True:
+            await asyncio.sleep(max(0.0, deadline - loop.time()))
+            await self.run_tick()
+            deadline += self.interval
+            now = loop.time()
+            if now > deadline:
+                self.overruns += 1
+                behind = int((now - deadline) // self.interval) + 1
+                self.skipped_ticks += behind
+                deadline += behind * self.interval
+
+    def start(self) -> None:
+        if self._task and not self._task.done():
+            return
+        self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self) -> None:
+        if not self._task:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
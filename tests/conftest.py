@@ -1,8 +1,11 @@
 import asyncio
 import inspect
+import json
 import sys
 from pathlib import Path
 
+import pytest
+
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
@@ -18,9 +21,84 @@ def pytest_configure(config):
 def pytest_pyfunc_call(pyfuncitem):
     if inspect.iscoroutinefunction(pyfuncitem.obj):
         loop = asyncio.new_event_loop()
+        argnames = pyfuncitem._fixtureinfo.argnames
+        kwargs = {name: pyfuncitem.funcargs[name] for name in argnames}
         try:
-            loop.run_until_complete(pyfuncitem.obj(**pyfuncitem.funcargs))
+            loop.run_until_complete(pyfuncitem.obj(**kwargs))
         finally:
             loop.close()
         return True
     return None
+
+
+SMALL_WORLD = {
+    "worldName": "Test Jungeon",
+    "rooms": [
+        {
+            "id": "room_0",
+            "name": "Hall",
+            "description": "A hall.",
+            "exits": {"east": "room_1", "south": "room_2"},
+            "coins": {"initial": 3},
+            "appearance": {
+                "coinsTemplate": "You see {coinCount} gold coin(s).",
+                "emptyCoinsTemplate": "You see no coins here.",
+            },
+            "items": ["ring"],
+        },
+        {
+            "id": "room_1",
+            "name": "Cellar",
+            "description": "A cellar.",
+            "exits": {"west": "room_0"},
+            "coins": {
+                "initial": 5,
+                "respawn": {"enabled": True, "intervalSeconds": 30},
+            },
+        },
+        {
+            "id": "room_2",
+            "name": "Vault",
+            "description": "A vault.",
+            "exits": {"north": "room_0"},
+            "coins": {"initial": 0},
+        },
+    ],
+    "items": {"ring": {"name": "a silver ring", "description": "shiny"}},
+    "ghosts": {"ghost_0": {"roomId": "room_1", "description": "a pale knight"}},
+}
+
+SMALL_CHARACTERS = {
+    "characters": [
+        {
+            "id": "bob",
+            "name": "Bob the Brave",
+            "shortDescription": "brave",
+            "longDescription": "very brave",
+            "startingRoom": "room_0",
+            "appearanceInRoom": "{name} stands tall.",
+        },
+        {
+            "id": "lina",
+            "name": "Lina the Quiet",
+            "shortDescription": "quiet",
+            "longDescription": "very quiet",
+            "startingRoom": "room_1",
+            "appearanceInRoom": "{name} lurks.",
+        },
+    ]
+}
+
+
+@pytest.fixture
+def world_data_dir(tmp_path):
+    """A tiny three-room world written to a temporary data directory."""
+    (tmp_path / "world.json").write_text(json.dumps(SMALL_WORLD), encoding="utf-8")
+    (tmp_path / "characters.json").write_text(
+        json.dumps(SMALL_CHARACTERS), encoding="utf-8"
+    )
+    (tmp_path / "verbs.json").write_text(
+        json.dumps({"emotes": {"dance": "dances."}, "objectVerbs": []}),
+        encoding="utf-8",
+    )
+    return tmp_path
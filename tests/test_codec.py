@@ -0,0 +1,133 @@
+import json
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from server.services.codec import (
+    MAX_DEPTH,
+    MESSAGE_TYPES,
+    MSGPACK,
+    TYPE_TAGS,
+    negotiate,
+    pack,
+    unpack,
+)
+from server.services.connection_manager import ConnectionManager
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        None,
+        True,
+        False,
+        0,
+        127,
+        128,
+        255,
+        256,
+        65536,
+        2**32,
+        2**63 - 1,
+        -1,
+        -32,
+        -33,
+        -129,
+        -32769,
+        -(2**31) - 1,
+        -(2**63),
+        1.5,
+        "",
+        "é" * 40,
+        "x" * 300,
+        "y" * 70000,
+        list(range(20)),
+        {str(n): [n, None] for n in range(20)},
+    ],
+)
+def test_pack_round_trip(value):
+    assert unpack(pack(value)) == value
+
+
+def test_pack_matches_messagepack_spec():
+    assert pack({"a": [1, -1, True]}) == b"\x81\xa1a\x93\x01\xff\xc3"
+    assert pack(300) == b"\xcd\x01\x2c"
+    assert pack(-100) == b"\xd0\x9c"
+
+
+def test_unpack_rejects_bad_frames():
+    for frame in (b"", b"\x92\x01", b"\xcd\x01", b"\x01\x02", b"\xc1"):
+        with pytest.raises(ValueError):
+            unpack(frame)
+
+
+def test_unpack_rejects_unhashable_keys_and_deep_nesting():
+    with pytest.raises(ValueError):
+        MSGPACK.decode(bytes([0x92, 9, 0x81, 0x91, 1, 1]))
+    with pytest.raises(ValueError):
+        unpack(b"\x91" * 100_000 + b"\x01")
+    with pytest.raises(ValueError):
+        unpack(b"\x81\xc3\x01")
+    nested = 1
+    for _ in range(MAX_DEPTH):
+        nested = [nested]
+    assert unpack(pack(nested)) == nested
+    with pytest.raises(ValueError):
+        unpack(pack([nested]))
+
+
+def test_pack_rejects_out_of_range_ints():
+    for value in (2**64, -(2**63) - 1):
+        with pytest.raises(ValueError):
+            pack(value)
+    assert unpack(pack(2**64 - 1)) == 2**64 - 1
+
+
+def test_frames_use_type_tags():
+    message = {"type": "event", "data": {"text": "hi"}}
+    assert unpack(MSGPACK.encode(message)) == [TYPE_TAGS["event"], {"text": "hi"}]
+    assert len(MSGPACK.encode(message)) < len(json.dumps(message))
+
+    frame = pack([TYPE_TAGS["command"], {"input": "go north"}])
+    assert MSGPACK.decode(frame) == {"type": "command", "input": "go north"}
+    assert MSGPACK.decode(pack(["custom", {}])) == {"type": "custom"}
+    with pytest.raises(ValueError):
+        MSGPACK.decode(pack([len(MESSAGE_TYPES), {}]))
+
+
+def test_stamp_appends_seq_without_reencoding():
+    frame = MSGPACK.encode({"type": "event", "data": {"text": "hi"}})
+    stamped = MSGPACK.stamp(frame, 300)
+    assert unpack(stamped) == [TYPE_TAGS["event"], {"text": "hi"}, 300]
+
+
+def test_negotiate_prefers_subprotocol_then_query():
+    assert negotiate(["jungeon.msgpack"], None) == ("jungeon.msgpack", MSGPACK)
+    assert negotiate(["other", "jungeon.json"], "msgpack") == ("jungeon.json", None)
+    assert negotiate([], "msgpack") == (None, MSGPACK)
+    assert negotiate([], "bogus") == (None, None)
+
+
+@pytest.mark.asyncio
+async def test_send_many_encodes_once_per_codec():
+    connections = ConnectionManager()
+    sockets = {}
+    for pid, codec in (("j1", None), ("j2", None), ("b1", MSGPACK), ("b2", MSGPACK)):
+        ws = MagicMock()
+        ws.send_text = AsyncMock()
+        ws.send_bytes = AsyncMock()
+        sockets[pid] = ws
+        connections.attach(pid, ws, codec)
+
+    message = {"type": "event", "data": {"text": "hi"}}
+    await connections.send_to_all(message)
+    await connections.flush()
+
+    text = sockets["j1"].send_text.await_args.args[0]
+    binary = sockets["b1"].send_bytes.await_args.args[0]
+    assert json.loads(text) == message
+    assert unpack(binary) == [TYPE_TAGS["event"], {"text": "hi"}]
+    # Same frame object for every client sharing a codec.
+    assert sockets["j2"].send_text.await_args.args[0] is text
+    assert sockets["b2"].send_bytes.await_args.args[0] is binary
+    sockets["b1"].send_text.assert_not_awaited()
@@ -1,33 +1,45 @@
+from contextlib import asynccontextmanager
+
 import pytest
 
 from server.commands.base import CommandInput
-from server.commands.router import CommandRouter
+from server.commands.router import MAX_BATCH_COMMANDS, CommandRouter
 from server.services.connection_manager import ConnectionManager
 
 
 class StubPlayer:
     def __init__(self, name="Hero"):
         self.name = name
+        self.room_id = "room_0"
 
 
 class StubWorld:
     def __init__(self):
         self.player = StubPlayer()
+        self.locks_taken = 0
+
+    @asynccontextmanager
+    async def lock_player_room(self, player_id: str, *directions):
+        self.locks_taken += 1
+        yield self.player
 
-    async def move_player(self, player_id: str, direction: str):
+    def move_player_unlocked(self, player, direction: str):
         return {"name": "Room", "exits": ["north"], "description": "desc"}
 
-    async def collect_coins(self, player_id: str):
+    def collect_coins_unlocked(self, player):
         return {"collected": 2}
 
-    async def drop_coins(self, player_id: str):
+    def drop_coins_unlocked(self, player):
         return {"dropped": 3}
 
-    async def take_items(self, player_id: str, query):
+    def take_items_unlocked(self, player, query):
         return {"taken": ["ring"]}
 
-    async def get_inventory(self, player_id: str):
-        return {"coins": 0, "items": []}
+    def room_payload_unlocked(self, player_id: str):
+        return {"name": "Room", "exits": ["north"], "description": "desc"}
+
+    def inventory_unlocked(self, player):
+        return {"coins": 2, "items": []}
 
     async def get_emote_message(self, player_id: str, verb: str):
         if verb == "dance":
@@ -64,6 +76,35 @@ async def test_collect_command_sets_refresh_flags(router):
     assert result.refresh_room is True
     assert result.refresh_inventory is True
     assert result.replies[0].data["text"].startswith("You collect")
+    # The refreshed views are built under the command's own lock.
+    assert result.room["name"] == "Room"
+    assert result.inventory == {"coins": 2, "items": []}
+    assert router.world.locks_taken == 1
+
+
+@pytest.mark.asyncio()
+async def test_batch_takes_one_lock_and_keeps_going_after_errors(router):
+    commands = [
+        CommandInput(action="collect"),
+        CommandInput(action="go"),
+        CommandInput(action="dance"),
+        CommandInput(action="drop"),
+    ]
+    batch = await router.dispatch_batch("player1", commands)
+    assert router.world.locks_taken == 1
+    assert [r.replies[0].type for r in batch.results] == [
+        "event", "error", "error", "event",
+    ]
+    assert batch.room["name"] == "Room"
+    assert batch.inventory == {"coins": 2, "items": []}
+
+
+@pytest.mark.asyncio()
+async def test_batch_size_is_capped(router):
+    commands = [CommandInput(action="look")] * (MAX_BATCH_COMMANDS + 1)
+    with pytest.raises(ValueError):
+        await router.dispatch_batch("player1", commands)
+    assert router.world.locks_taken == 0
 
 
 @pytest.mark.asyncio()
@@ -1,4 +1,6 @@
 import asyncio
+from contextlib import asynccontextmanager
+
 import pytest
 from unittest.mock import AsyncMock, MagicMock
 
@@ -6,7 +8,7 @@ from server.commands.base import CommandInput
 from server.commands.parser import parse_command_input
 from server.commands.router import CommandRouter
 from server.models import PlayerState
-from server.services.connection_manager import ConnectionManager
+from server.services.connection_manager import ConnectionManager, encode_message
 from server.world.engine import WorldEngine
 
 
@@ -23,6 +25,13 @@ class MockWorld:
     async def get_player(self, player_id: str):
         return self.state.players.get(player_id)
 
+    @asynccontextmanager
+    async def lock_player_room(self, player_id: str, *directions):
+        player = self.state.players.get(player_id)
+        if player is None:
+            raise ValueError("You are not a valid player.")
+        yield player
+
     async def resolve_character_name(self, name_query: str, connections):
         query_lower = name_query.lower().strip()
         if not query_lower:
@@ -45,14 +54,14 @@ class MockWorld:
                 matches.append((player_id, full_name))
 
         if len(matches) == 1:
-            return matches[0][0]
+            return self.state.players[matches[0][0]]
         elif len(matches) > 1:
             exact_matches = [
                 pid for pid, name in matches
                 if name.lower() == query_lower or name.split()[0].lower() == query_lower
             ]
             if len(exact_matches) == 1:
-                return exact_matches[0]
+                return self.state.players[exact_matches[0]]
         return None
 
 
@@ -103,18 +112,16 @@ def mock_world():
 def connections():
     """Create a connection manager with mock websockets."""
     conn_mgr = ConnectionManager()
-    # Mock websockets for connected players - send_json needs to be async
+    # Mock websockets for connected players - send_text needs to be async
     mock_ws1 = MagicMock()
-    mock_ws1.send_json = AsyncMock()
+    mock_ws1.send_text = AsyncMock()
     mock_ws2 = MagicMock()
-    mock_ws2.send_json = AsyncMock()
+    mock_ws2.send_text = AsyncMock()
     mock_ws3 = MagicMock()
-    mock_ws3.send_json = AsyncMock()
-    conn_mgr._connections = {
-        "player1": mock_ws1,
-        "player2": mock_ws2,
-        "player3": mock_ws3,
-    }
+    mock_ws3.send_text = AsyncMock()
+    conn_mgr.attach("player1", mock_ws1)
+    conn_mgr.attach("player2", mock_ws2)
+    conn_mgr.attach("player3", mock_ws3)
     return conn_mgr
 
 
@@ -360,39 +367,39 @@ async def test_reply_without_message_raises(router, mock_world, connections):
 @pytest.mark.asyncio
 async def test_resolve_character_name_exact_match(mock_world, connections):
     """Test resolving character name with exact match."""
-    player_id = await mock_world.resolve_character_name("bob", connections)
-    assert player_id == "player1"
+    player = await mock_world.resolve_character_name("bob", connections)
+    assert player.player_id == "player1"
 
 
 @pytest.mark.asyncio
 async def test_resolve_character_name_case_insensitive(mock_world, connections):
     """Test resolving character name is case-insensitive."""
-    player_id = await mock_world.resolve_character_name("BOB", connections)
-    assert player_id == "player1"
+    player = await mock_world.resolve_character_name("BOB", connections)
+    assert player.player_id == "player1"
 
-    player_id = await mock_world.resolve_character_name("Bob", connections)
-    assert player_id == "player1"
+    player = await mock_world.resolve_character_name("Bob", connections)
+    assert player.player_id == "player1"
 
 
 @pytest.mark.asyncio
 async def test_resolve_character_name_partial_match(mock_world, connections):
     """Test resolving character name with partial match."""
-    player_id = await mock_world.resolve_character_name("bo", connections)
-    assert player_id == "player1"
+    player = await mock_world.resolve_character_name("bo", connections)
+    assert player.player_id == "player1"
 
 
 @pytest.mark.asyncio
 async def test_resolve_character_name_full_name(mock_world, connections):
     """Test resolving character name with full name."""
-    player_id = await mock_world.resolve_character_name("Bob the Brave", connections)
-    assert player_id == "player1"
+    player = await mock_world.resolve_character_name("Bob the Brave", connections)
+    assert player.player_id == "player1"
 
 
 @pytest.mark.asyncio
 async def test_resolve_character_name_nonexistent(mock_world, connections):
     """Test resolving nonexistent character name returns None."""
-    player_id = await mock_world.resolve_character_name("nonexistent", connections)
-    assert player_id is None
+    player = await mock_world.resolve_character_name("nonexistent", connections)
+    assert player is None
 
 
 @pytest.mark.asyncio
@@ -410,16 +417,16 @@ async def test_resolve_character_name_ambiguous(mock_world, connections):
     )
     mock_world.state.players["player4"] = player4
     mock_ws4 = MagicMock()
-    mock_ws4.send_json = AsyncMock()
-    connections._connections["player4"] = mock_ws4
+    mock_ws4.send_text = AsyncMock()
+    connections.attach("player4", mock_ws4)
 
     # "bo" is now ambiguous
-    player_id = await mock_world.resolve_character_name("bo", connections)
-    assert player_id is None
+    player = await mock_world.resolve_character_name("bo", connections)
+    assert player is None
 
     # But "bob the brave" should still work
-    player_id = await mock_world.resolve_character_name("bob the brave", connections)
-    assert player_id == "player1"
+    player = await mock_world.resolve_character_name("bob the brave", connections)
+    assert player.player_id == "player1"
 
 
 # Connection Manager Tests
@@ -435,10 +442,13 @@ async def test_send_to_all(connections):
     """Test sending message to all connected players."""
     message = {"type": "event", "data": {"text": "test"}}
     await connections.send_to_all(message)
+    await connections.flush()
 
     # Verify all connections received the message
-    for ws in connections._connections.values():
-        ws.send_json.assert_called_once()
+    for player_id in connections.get_all_connected_player_ids():
+        connections.get(player_id).send_text.assert_called_once_with(
+            encode_message(message)
+        )
 
 
 @pytest.mark.asyncio
@@ -446,10 +456,11 @@ async def test_send_to_specific_player(connections):
     """Test sending message to a specific player."""
     message = {"type": "event", "data": {"text": "test"}}
     await connections.send("player1", message)
+    await connections.flush()
 
-    connections._connections["player1"].send_json.assert_called_once_with(message)
+    connections.get("player1").send_text.assert_called_once_with(encode_message(message))
     # Other players should not receive it
-    connections._connections["player2"].send_json.assert_not_called()
+    connections.get("player2").send_text.assert_not_called()
 
 
 @pytest.mark.asyncio
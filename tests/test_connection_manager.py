@@ -0,0 +1,136 @@
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from server.services.connection_manager import ConnectionManager
+
+
+def make_ws(delay=0.0):
+    ws = MagicMock()
+    sent = []
+
+    async def send_text(frame):
+        if delay:
+            await asyncio.sleep(delay)
+        sent.append(json.loads(frame))
+
+    ws.send_text = AsyncMock(side_effect=send_text)
+    ws.close = AsyncMock()
+    ws.sent = sent
+    return ws
+
+
+def event(n):
+    return {"type": "event", "data": {"text": str(n)}}
+
+
+@pytest.mark.asyncio
+async def test_slow_client_does_not_block_others():
+    connections = ConnectionManager()
+    slow = make_ws(delay=10)
+    fast = make_ws()
+    connections.attach("slow", slow)
+    connections.attach("fast", fast)
+
+    await asyncio.wait_for(connections.send_to_all(event(1)), timeout=0.1)
+    await asyncio.wait_for(connections.flush("fast"), timeout=0.1)
+    assert fast.sent == [event(1)]
+    assert slow.sent == []
+
+
+@pytest.mark.asyncio
+async def test_drop_oldest_policy_keeps_newest_messages():
+    connections = ConnectionManager(max_queue=2)
+    ws = make_ws()
+    connections.attach("p1", ws)
+    for n in range(5):
+        await connections.send("p1", event(n))
+    assert connections.queue_depth("p1") == 2
+    await connections.flush()
+    assert ws.sent == [event(3), event(4)]
+    assert connections._connections["p1"].dropped == 3
+
+
+@pytest.mark.asyncio
+async def test_disconnect_policy_closes_slow_consumer():
+    connections = ConnectionManager(max_queue=1, overflow="disconnect")
+    ws = make_ws()
+    connections.attach("p1", ws)
+    await connections.send("p1", event(1))
+    await connections.send("p1", event(2))
+    await asyncio.sleep(0)
+
+    assert "p1" not in connections.get_all_connected_player_ids()
+    ws.close.assert_awaited_once_with(code=ConnectionManager.SLOW_CONSUMER_CLOSE_CODE)
+
+
+@pytest.mark.asyncio
+async def test_send_many_encodes_once(monkeypatch):
+    from server.services import connection_manager
+
+    calls = []
+    real_encode = connection_manager.encode_message
+
+    def counting_encode(message):
+        calls.append(message)
+        return real_encode(message)
+
+    monkeypatch.setattr(connection_manager, "encode_message", counting_encode)
+    connections = ConnectionManager()
+    sockets = {pid: make_ws() for pid in ("p1", "p2", "p3")}
+    for pid, ws in sockets.items():
+        connections.attach(pid, ws)
+
+    await connections.send_to_all(event("hi"))
+    await connections.flush()
+    assert len(calls) == 1
+    assert all(ws.sent == [event("hi")] for ws in sockets.values())
+
+
+@pytest.mark.asyncio
+async def test_resumable_connection_replays_missed_messages():
+    connections = ConnectionManager()
+    first = make_ws()
+    connections.attach("p1", first, resumable=True)
+    await connections.send("p1", event(1))
+    await connections.flush()
+    assert first.sent == [{"seq": 1, **event(1)}]
+
+    connections.detach("p1", first)
+    await connections.send("p1", event(2))
+    await connections.send_to_all(event(3))
+
+    second = make_ws()
+    connections.attach("p1", second, resumable=True)
+    assert connections.replay("p1", last_seq=1)
+    await connections.flush()
+    assert second.sent == [{"seq": 2, **event(2)}, {"seq": 3, **event(3)}]
+
+
+@pytest.mark.asyncio
+async def test_replay_refuses_evicted_or_unknown_seqs():
+    connections = ConnectionManager(replay_size=2)
+    connections.attach("p1", make_ws(), resumable=True)
+    for n in range(4):
+        await connections.send("p1", event(n))
+    assert not connections.replay("p1", last_seq=1)  # seq 2 was evicted
+    assert not connections.replay("p1", last_seq=9)
+    assert connections.replay("p1", last_seq=2)
+
+    connections.forget("p1")
+    assert not connections.replay("p1", last_seq=4)
+
+
+@pytest.mark.asyncio
+async def test_stale_socket_cannot_detach_its_replacement():
+    connections = ConnectionManager()
+    old, new = make_ws(), make_ws()
+    connections.attach("p1", old)
+    connections.attach("p1", new)
+    await asyncio.sleep(0)
+    old.close.assert_awaited_once_with(code=ConnectionManager.REPLACED_CLOSE_CODE)
+
+    connections.detach("p1", old)
+    assert connections.get("p1") is new
@@ -0,0 +1,38 @@
+import asyncio
+
+import pytest
+
+from server.services.game_service import GameService
+from server.sessions import SessionManager
+from server.world import WorldEngine, WorldLoader, WorldRepository
+
+
+@pytest.fixture
+def game(world_data_dir):
+    world = WorldEngine(
+        WorldLoader(world_data_dir), WorldRepository(world_data_dir / "savegame.json")
+    )
+    return GameService(world, SessionManager(), grace_period=0.05)
+
+
+@pytest.mark.asyncio
+async def test_suspended_session_can_resume_within_grace_period(game):
+    session_id, player = await game.login("bob")
+    ended = []
+
+    async def end_session():
+        ended.append(session_id)
+        await game.release_player(player.player_id)
+
+    await game.suspend(session_id, end_session)
+    await asyncio.sleep(0.01)
+    assert game.resume(session_id)
+    await asyncio.sleep(0.1)
+    assert ended == []
+    assert await game.world.get_player(player.player_id) is player
+
+    await game.suspend(session_id, end_session)
+    await asyncio.sleep(0.1)
+    assert ended == [session_id]
+    assert not game.resume(session_id)
+    assert await game.world.get_player(player.player_id) is None
@@ -0,0 +1,93 @@
+import random
+
+import pytest
+
+from server.services.connection_manager import ConnectionManager
+from server.world import WorldEngine, WorldLoader, WorldRepository
+from server.world.names import NameIndex
+
+
+def scan_resolve(names, online, name_query):
+    """The original linear scan, kept as the reference for the ambiguity rules."""
+    query_lower = name_query.lower().strip()
+    if not query_lower:
+        return None
+    matches = []
+    for player_id, full_name in names.items():
+        if player_id not in online:
+            continue
+        first_name = full_name.split()[0] if full_name else ""
+        if full_name.lower() == query_lower or first_name.lower() == query_lower:
+            matches.append((player_id, full_name))
+        elif first_name.lower().startswith(query_lower):
+            matches.append((player_id, full_name))
+    if len(matches) == 1:
+        return matches[0][0]
+    elif len(matches) > 1:
+        exact_matches = [
+            pid for pid, name in matches
+            if name.lower() == query_lower or name.split()[0].lower() == query_lower
+        ]
+        if len(exact_matches) == 1:
+            return exact_matches[0]
+    return None
+
+
+def test_prefix_and_exact_rules():
+    index = NameIndex()
+    names = {"p1": "Bob the Brave", "p2": "Bobby Tables", "p3": "Lina the Quiet"}
+    for player_id, name in names.items():
+        index.add(player_id, name)
+    online = set(names).__contains__
+
+    assert index.resolve("li", online) == "p3"
+    assert index.resolve("LINA THE QUIET", online) == "p3"
+    assert index.resolve("bo", online) is None  # ambiguous
+    assert index.resolve("bob", online) == "p1"  # exact first name wins
+    assert index.resolve("bobb", online) == "p2"
+    assert index.resolve("the", online) is None
+    assert index.resolve("  ", online) is None
+
+    index.remove("p1", "Bob the Brave")
+    assert index.resolve("bo", online) == "p2"
+    assert index.resolve("bob the brave", online) is None
+
+
+def test_matches_linear_scan_on_random_names():
+    rng = random.Random(3)
+    syllables = ["al", "an", "bo", "b", "li", "lin", "a", "na"]
+    names = {}
+    index = NameIndex()
+    for n in range(60):
+        first = "".join(rng.choice(syllables) for _ in range(rng.randint(1, 3)))
+        name = f"{first.title()} the {rng.choice(['Brave', 'Quiet', 'Al'])}"
+        names[f"p{n}"] = name
+        index.add(f"p{n}", name)
+    for n in range(0, 60, 4):
+        index.remove(f"p{n}", names.pop(f"p{n}"))
+    online = {pid for pid in names if rng.random() < 0.8}
+
+    queries = {name[:cut] for name in names.values() for cut in range(1, 8)}
+    queries |= {name.lower() for name in names.values()} | {"the", "al", "zz"}
+    for query in sorted(queries):
+        assert index.resolve(query, online.__contains__) == scan_resolve(
+            names, online, query
+        ), query
+
+
+@pytest.mark.asyncio
+async def test_engine_resolves_only_connected_players(world_data_dir):
+    world = WorldEngine(
+        WorldLoader(world_data_dir), WorldRepository(world_data_dir / "savegame.json")
+    )
+    connections = ConnectionManager()
+    bob = await world.allocate_player("bob")
+    lina = await world.allocate_player("lina")
+    connections.attach(bob.player_id, object())
+
+    assert await world.resolve_character_name("b", connections) is bob
+    assert await world.resolve_character_name("lina", connections) is None
+
+    await world.release_player(bob.player_id)
+    assert await world.resolve_character_name("b", connections) is None
+    assert lina.player_id in world.state.players
@@ -0,0 +1,279 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+from server.services.persistence import PersistenceWorker
+from server.world import SqliteWorldRepository, WorldEngine, WorldLoader, WorldRepository
+
+
+def make_world(data_dir, **repo_kwargs):
+    repository = WorldRepository(data_dir / "savegame.json", **repo_kwargs)
+    return WorldEngine(WorldLoader(data_dir), repository)
+
+
+def read_journal(data_dir):
+    path = data_dir / "savegame.journal"
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+# Journal Tests
+
+@pytest.mark.asyncio
+async def test_collect_journals_only_changed_entities(world_data_dir):
+    world = make_world(world_data_dir)
+    bob = await world.allocate_player("bob")
+    await world.collect_coins(bob.player_id)
+
+    entries = read_journal(world_data_dir)
+    assert entries[-1] == {
+        "rooms": {"room_0": {"coins": 0, "items": ["ring"]}},
+        "characters": {"bob": {"roomId": "room_0", "coins": 3, "items": []}},
+        "generation": 0,
+    }
+
+
+@pytest.mark.asyncio
+async def test_restore_replays_snapshot_and_journal(world_data_dir):
+    world = make_world(world_data_dir)
+    bob = await world.allocate_player("bob")
+    await world.collect_coins(bob.player_id)
+    await world.take_items(bob.player_id, "ring")
+
+    restored = make_world(world_data_dir)
+    assert restored.state.rooms_state["room_0"].coins == 0
+    assert restored.state.rooms_state["room_0"].items == []
+    save = restored.state.character_saves["bob"]
+    assert save.coins == 3
+    assert save.items == ["ring"]
+
+
+@pytest.mark.asyncio
+async def test_compaction_writes_snapshot_and_truncates_journal(world_data_dir):
+    world = make_world(world_data_dir, compact_every=3)
+    bob = await world.allocate_player("bob")
+    await world.collect_coins(bob.player_id)
+    await world.drop_coins(bob.player_id)
+
+    snapshot = json.loads((world_data_dir / "savegame.json").read_text(encoding="utf-8"))
+    assert snapshot["rooms"]["room_0"]["coins"] == 3
+    assert set(snapshot["rooms"]) == {"room_0", "room_1", "room_2"}
+    assert read_journal(world_data_dir) == []
+
+    restored = make_world(world_data_dir, compact_every=3)
+    assert restored.state.character_saves["bob"].coins == 0
+
+
+def test_restore_skips_journal_left_over_from_before_the_snapshot(world_data_dir):
+    repository = WorldRepository(world_data_dir / "savegame.json")
+    repository.write_delta({"rooms": {"room_1": {"coins": 1, "items": []}}})
+    stale_journal = repository.journal_file.read_text(encoding="utf-8")
+    repository.write_save({"rooms": {"room_1": {"coins": 2, "items": []}}})
+    # Crash between renaming the snapshot into place and truncating the journal.
+    repository.journal_file.write_text(stale_journal, encoding="utf-8")
+
+    restored = make_world(world_data_dir)
+    assert restored.state.rooms_state["room_1"].coins == 2
+    assert restored.repository.generation == 1
+
+    restored.repository.write_delta({"rooms": {"room_1": {"coins": 3, "items": []}}})
+    assert make_world(world_data_dir).state.rooms_state["room_1"].coins == 3
+
+
+def test_restore_skips_torn_journal_line(world_data_dir):
+    (world_data_dir / "savegame.journal").write_text(
+        '{"rooms":{"room_1":{"coins":9,"items":[]}}}\n{"rooms":{"room_2"',
+        encoding="utf-8",
+    )
+    world = make_world(world_data_dir)
+    assert world.state.rooms_state["room_1"].coins == 9
+    assert world.repository.journal_entries == 1
+
+
+# Persistence Worker Tests
+
+class RecordingRepository:
+    def __init__(self):
+        self.writes = []
+
+    def write_save(self, payload):
+        self.writes.append(("snapshot", payload))
+
+    def write_delta(self, payload):
+        self.writes.append(("delta", payload))
+
+
+def room_delta(room_id, coins):
+    return {"rooms": {room_id: {"coins": coins, "items": []}}, "characters": {}, "ghosts": {}}
+
+
+@pytest.mark.asyncio
+async def test_worker_coalesces_burst_into_one_write():
+    repository = RecordingRepository()
+    worker = PersistenceWorker(repository, min_interval=60, max_staleness=60)
+    for coins in range(5):
+        worker.schedule_delta(room_delta("room_0", coins))
+    worker.schedule_delta(room_delta("room_1", 7))
+    await worker.flush()
+
+    assert repository.writes == [
+        (
+            "delta",
+            {
+                "rooms": {
+                    "room_0": {"coins": 4, "items": []},
+                    "room_1": {"coins": 7, "items": []},
+                },
+                "characters": {},
+                "ghosts": {},
+            },
+        )
+    ]
+    assert worker.stats.scheduled == 6
+    assert worker.stats.coalesced == 5
+    assert worker.stats.written == 1
+
+
+@pytest.mark.asyncio
+async def test_worker_snapshot_supersedes_pending_deltas():
+    repository = RecordingRepository()
+    worker = PersistenceWorker(repository, min_interval=60, max_staleness=60)
+    worker.schedule_delta(room_delta("room_0", 1))
+    worker.schedule_save(room_delta("room_0", 2))
+    worker.schedule_delta(room_delta("room_1", 3))
+    await worker.flush()
+
+    assert len(repository.writes) == 1
+    kind, payload = repository.writes[0]
+    assert kind == "snapshot"
+    assert payload["rooms"] == {
+        "room_0": {"coins": 2, "items": []},
+        "room_1": {"coins": 3, "items": []},
+    }
+
+
+@pytest.mark.asyncio
+async def test_worker_builds_snapshots_off_the_event_loop():
+    repository = RecordingRepository()
+    worker = PersistenceWorker(repository, min_interval=60, max_staleness=60)
+    loop_thread = threading.get_ident()
+    built_in = []
+
+    def build():
+        built_in.append(threading.get_ident())
+        return room_delta("room_0", 1)
+
+    worker.schedule_snapshot(build)
+    worker.schedule_delta(room_delta("room_1", 2))
+    assert built_in == []
+    await worker.flush()
+
+    assert built_in and built_in[0] != loop_thread
+    assert repository.writes == [
+        (
+            "snapshot",
+            {
+                "rooms": {
+                    "room_0": {"coins": 1, "items": []},
+                    "room_1": {"coins": 2, "items": []},
+                },
+                "characters": {},
+                "ghosts": {},
+            },
+        )
+    ]
+
+
+@pytest.mark.asyncio
+async def test_worker_respects_max_staleness():
+    repository = RecordingRepository()
+    worker = PersistenceWorker(repository, min_interval=60, max_staleness=0.01)
+    worker.schedule_delta(room_delta("room_0", 1))
+    await asyncio.sleep(0.05)
+    worker.schedule_delta(room_delta("room_0", 2))
+    await asyncio.sleep(0.05)
+
+    assert [payload["rooms"]["room_0"]["coins"] for _, payload in repository.writes] == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_worker_debounces_changes_until_max_staleness():
+    repository = RecordingRepository()
+    worker = PersistenceWorker(repository, min_interval=0.1, max_staleness=0.4)
+    for coins in range(12):
+        worker.schedule_delta(room_delta("room_0", coins))
+        await asyncio.sleep(0.05)
+    written = [payload["rooms"]["room_0"]["coins"] for _, payload in repository.writes]
+    # A steady stream never goes quiet, so only the staleness cap forces a write.
+    assert written
+    assert 0 < written[0] < 11
+
+    await asyncio.sleep(0.2)
+    written = [payload["rooms"]["room_0"]["coins"] for _, payload in repository.writes]
+    assert written[-1] == 11
+    assert len(written) < 12
+
+
+# Crash Safety Tests
+
+def test_write_save_rotates_backups(world_data_dir):
+    repository = WorldRepository(world_data_dir / "savegame.json", backup_count=2)
+    for coins in range(4):
+        repository.write_save(room_delta("room_0", coins))
+
+    def coins_in(name):
+        data = json.loads((world_data_dir / name).read_text(encoding="utf-8"))
+        return data["rooms"]["room_0"]["coins"]
+
+    assert coins_in("savegame.json") == 3
+    assert coins_in("savegame.json.1") == 2
+    assert coins_in("savegame.json.2") == 1
+    assert not (world_data_dir / "savegame.json.3").exists()
+    assert not (world_data_dir / "savegame.json.tmp").exists()
+
+
+def test_restore_falls_back_to_backup(world_data_dir):
+    repository = WorldRepository(world_data_dir / "savegame.json", fsync="always")
+    repository.write_save(room_delta("room_1", 8))
+    repository.write_save(room_delta("room_1", 9))
+    (world_data_dir / "savegame.json").write_text('{"rooms": {"room_1"', encoding="utf-8")
+
+    world = make_world(world_data_dir)
+    assert world.state.rooms_state["room_1"].coins == 8
+
+
+def test_unknown_fsync_policy_rejected(world_data_dir):
+    with pytest.raises(ValueError, match="fsync"):
+        WorldRepository(world_data_dir / "savegame.json", fsync="sometimes")
+
+
+# SQLite Repository Tests
+
+@pytest.mark.asyncio
+async def test_sqlite_repository_round_trip(world_data_dir):
+    db_file = world_data_dir / "savegame.sqlite3"
+    repository = SqliteWorldRepository(db_file)
+    world = WorldEngine(WorldLoader(world_data_dir), repository)
+    bob = await world.allocate_player("bob")
+    await world.collect_coins(bob.player_id)
+    await world.take_items(bob.player_id, "all")
+    repository.close()
+
+    repository = SqliteWorldRepository(db_file)
+    restored = WorldEngine(WorldLoader(world_data_dir), repository)
+    assert restored.state.rooms_state["room_0"].coins == 0
+    assert restored.state.rooms_state["room_0"].items == []
+    assert restored.state.rooms_state["room_1"].coins == 5
+    save = restored.state.character_saves["bob"]
+    assert (save.coins, save.items) == (3, ["ring"])
+    repository.close()
+
+
+def test_sqlite_delta_upserts_only_listed_rows(world_data_dir):
+    repository = SqliteWorldRepository(world_data_dir / "savegame.sqlite3")
+    repository.write_delta(room_delta("room_0", 1))
+    repository.write_delta(room_delta("room_0", 2))
+    rows = repository._conn.execute("SELECT id, coins FROM rooms").fetchall()
+    assert rows == [("room_0", 2)]
+    repository.close()
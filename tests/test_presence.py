@@ -0,0 +1,99 @@
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from server.services.connection_manager import ConnectionManager
+from server.services.presence import PresenceService
+
+
+def attach(connections, player_id):
+    ws = MagicMock()
+    ws.sent = []
+
+    async def send_text(frame):
+        ws.sent.append(json.loads(frame))
+
+    ws.send_text = AsyncMock(side_effect=send_text)
+    connections.attach(player_id, ws)
+    return ws
+
+
+@pytest.mark.asyncio
+async def test_join_sends_full_roster_only_to_joiner():
+    connections = ConnectionManager()
+    presence = PresenceService(connections, debounce=None)
+    ws1 = attach(connections, "p1")
+    await presence.join("p1", "Bob the Brave")
+    ws2 = attach(connections, "p2")
+    await presence.join("p2", "Lina the Quiet")
+    await connections.flush()
+
+    assert ws2.sent == [
+        {
+            "type": "onlinePlayers",
+            "data": {
+                "players": [{"playerId": "p1", "name": "Bob the Brave"}],
+                "selfId": "p2",
+            },
+        }
+    ]
+    assert ws1.sent[0]["data"]["players"] == []
+    assert len(ws1.sent) == 1
+
+
+@pytest.mark.asyncio
+async def test_join_storm_is_batched_into_one_delta():
+    connections = ConnectionManager()
+    presence = PresenceService(connections, debounce=0.01)
+    sockets = {}
+    for n in range(5):
+        pid = f"p{n}"
+        sockets[pid] = attach(connections, pid)
+        await presence.join(pid, f"Player {n}")
+    await asyncio.sleep(0.05)
+    await connections.flush()
+
+    deltas = [m for m in sockets["p0"].sent if m["type"] == "playerJoined"]
+    assert len(deltas) == 1
+    assert [p["playerId"] for p in deltas[0]["data"]["players"]] == [
+        f"p{n}" for n in range(5)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_leave_sends_player_left_delta():
+    connections = ConnectionManager()
+    presence = PresenceService(connections, debounce=None)
+    ws1 = attach(connections, "p1")
+    attach(connections, "p2")
+    await presence.join("p1", "Bob the Brave")
+    await presence.join("p2", "Lina the Quiet")
+    await presence.flush()
+
+    connections.detach("p2")
+    presence.leave("p2")
+    await presence.flush()
+    await connections.flush()
+
+    assert ws1.sent[-1] == {"type": "playerLeft", "data": {"playerIds": ["p2"]}}
+    assert presence.online_players() == [{"playerId": "p1", "name": "Bob the Brave"}]
+
+
+@pytest.mark.asyncio
+async def test_join_then_leave_within_window_is_silent():
+    connections = ConnectionManager()
+    presence = PresenceService(connections, debounce=None)
+    ws1 = attach(connections, "p1")
+    await presence.join("p1", "Bob the Brave")
+    await presence.flush()
+    await connections.flush()
+    seen = len(ws1.sent)
+    attach(connections, "p2")
+    await presence.join("p2", "Lina the Quiet")
+    presence.leave("p2")
+    await presence.flush()
+    await connections.flush()
+
+    assert len(ws1.sent) == seen
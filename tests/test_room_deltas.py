@@ -0,0 +1,68 @@
+import pytest
+
+from server.services.room_deltas import RoomStateDeltas
+from server.world import WorldEngine, WorldLoader, WorldRepository
+
+
+def room_message(room):
+    return {"type": "roomState", "data": room}
+
+
+def apply(view, message):
+    """What the client does with a roomState or roomDelta message."""
+    data = dict(message["data"])
+    if message["type"] == "roomState":
+        return data
+    assert data.pop("baseVersion") == view["version"]
+    return {**view, **data}
+
+
+@pytest.fixture
+def world(world_data_dir):
+    return WorldEngine(
+        WorldLoader(world_data_dir), WorldRepository(world_data_dir / "savegame.json")
+    )
+
+
+@pytest.mark.asyncio
+async def test_only_changed_fields_are_sent(world):
+    deltas = RoomStateDeltas()
+    bob = await world.allocate_player("bob")
+
+    room = await world.describe_room_for_player(bob.player_id)
+    first = deltas.encode(room_message(room))
+    assert first["type"] == "roomState" and first["data"]["version"] == 1
+    view = apply(None, first)
+
+    await world.collect_coins(bob.player_id)
+    room = await world.describe_room_for_player(bob.player_id)
+    delta = deltas.encode(room_message(room))
+    assert delta["type"] == "roomDelta"
+    assert set(delta["data"]) == {"coins", "description", "version", "baseVersion"}
+    view = apply(view, delta)
+    assert view == {**room, "version": 2}
+
+    # Nothing changed: an empty delta still moves the version on.
+    same = deltas.encode(room_message(room))
+    assert same["data"] == {"version": 3, "baseVersion": 2}
+
+
+@pytest.mark.asyncio
+async def test_room_change_and_resync_send_full_views(world):
+    deltas = RoomStateDeltas()
+    bob = await world.allocate_player("bob")
+    deltas.encode(room_message(await world.describe_room_for_player(bob.player_id)))
+
+    moved = deltas.encode(room_message(await world.move_player(bob.player_id, "east")))
+    assert moved["type"] == "roomState" and moved["data"]["roomId"] == "room_1"
+
+    deltas.forget()
+    resync = deltas.encode(
+        room_message(await world.describe_room_for_player(bob.player_id))
+    )
+    assert resync["type"] == "roomState" and resync["data"]["version"] == 3
+
+
+def test_other_messages_pass_through():
+    message = {"type": "event", "data": {"text": "hi"}}
+    assert RoomStateDeltas().encode(message) is message
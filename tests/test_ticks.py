@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+from server.world.ticks import TickScheduler
+
+
+@pytest.mark.asyncio
+async def test_systems_run_at_their_own_frequency():
+    scheduler = TickScheduler(asyncio.Lock(), interval=0.25)
+    runs = {"fast": 0, "slow": 0}
+
+    def bump(name):
+        def system():
+            runs[name] += 1
+        return system
+
+    scheduler.register("fast", bump("fast"), every=0.25)
+    scheduler.register("slow", bump("slow"), every=1.0)
+    for _ in range(8):
+        await scheduler.run_tick()
+    assert runs == {"fast": 8, "slow": 2}
+    assert scheduler.stats()["slow"].runs == 2
+
+
+@pytest.mark.asyncio
+async def test_exclusive_systems_share_one_lock_acquisition():
+    lock = asyncio.Lock()
+    scheduler = TickScheduler(lock, interval=0.25)
+    seen = []
+
+    async def exclusive():
+        seen.append(("exclusive", lock.locked()))
+
+    async def free():
+        seen.append(("free", lock.locked()))
+
+    scheduler.register("a", exclusive, every=0.25, exclusive=True)
+    scheduler.register("b", free, every=0.25)
+    scheduler.register("c", exclusive, every=0.25, exclusive=True)
+    await scheduler.run_tick()
+    assert seen == [("exclusive", True), ("exclusive", True), ("free", False)]
+
+
+@pytest.mark.asyncio
+async def test_failing_system_is_counted_and_others_still_run():
+    scheduler = TickScheduler(asyncio.Lock(), interval=0.25)
+    ran = []
+
+    def broken():
+        raise RuntimeError("boom")
+
+    scheduler.register("broken", broken, every=0.25)
+    scheduler.register("fine", lambda: ran.append(True), every=0.25)
+    await scheduler.run_tick()
+    assert ran == [True]
+    assert scheduler.stats()["broken"].errors == 1
+
+
+@pytest.mark.asyncio
+async def test_slow_system_is_reported_as_overrun():
+    scheduler = TickScheduler(asyncio.Lock(), interval=0.01)
+
+    async def slow():
+        await asyncio.sleep(0.02)
+
+    scheduler.register("slow", slow, every=0.01)
+    await scheduler.run_tick()
+    stats = scheduler.stats()["slow"]
+    assert stats.overruns == 1
+    assert stats.max_time >= 0.02
+
+
+def test_duplicate_system_name_rejected():
+    scheduler = TickScheduler(asyncio.Lock())
+    scheduler.register("ghosts", lambda: None, every=1.0)
+    with pytest.raises(ValueError, match="already registered"):
+        scheduler.register("ghosts", lambda: None, every=1.0)
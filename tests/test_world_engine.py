@@ -0,0 +1,343 @@
+import asyncio
+import json
+
+import pytest
+
+from server.world import WorldEngine, WorldLoader, WorldRepository
+from server.world.locks import RoomLockManager
+from server.world.minimap import MinimapRenderer
+from server.world.npcs import VectorizedNpcEngine
+
+
+@pytest.fixture
+def world(world_data_dir):
+    loader = WorldLoader(world_data_dir)
+    repository = WorldRepository(world_data_dir / "savegame.json")
+    return WorldEngine(loader, repository)
+
+
+# Room Lock Tests
+
+@pytest.mark.asyncio
+async def test_room_locks_are_independent():
+    """Holding one room's lock does not block another room."""
+    locks = RoomLockManager()
+    async with locks.acquire("room_0"):
+        await asyncio.wait_for(locks.lock_for("room_1").acquire(), timeout=0.1)
+        locks.lock_for("room_1").release()
+        assert locks.lock_for("room_0").locked()
+
+
+@pytest.mark.asyncio
+async def test_room_locks_two_room_acquisition_does_not_deadlock():
+    """Opposite-direction crossings of the same doorway both complete."""
+    locks = RoomLockManager()
+    order = []
+
+    async def cross(a, b, label):
+        async with locks.acquire(a, b):
+            order.append(label)
+            await asyncio.sleep(0)
+
+    await asyncio.wait_for(
+        asyncio.gather(cross("room_0", "room_1", "east"), cross("room_1", "room_0", "west")),
+        timeout=1,
+    )
+    assert sorted(order) == ["east", "west"]
+    assert not locks.lock_for("room_0").locked()
+    assert not locks.lock_for("room_1").locked()
+
+
+@pytest.mark.asyncio
+async def test_room_locks_are_dropped_once_unused():
+    locks = RoomLockManager()
+    entered = asyncio.Event()
+
+    async def hold():
+        async with locks.acquire("room_0"):
+            entered.set()
+            await asyncio.sleep(0.01)
+
+    holder = asyncio.ensure_future(hold())
+    await entered.wait()
+    waiter = asyncio.ensure_future(hold())
+    await asyncio.sleep(0)
+    cancelled = asyncio.ensure_future(locks.acquire("room_0", "room_1").__aenter__())
+    await asyncio.sleep(0)
+    cancelled.cancel()
+    await asyncio.gather(holder, waiter, cancelled, return_exceptions=True)
+
+    assert locks._locks == {}
+    assert locks._users == {}
+
+
+# World Engine Tests
+
+@pytest.mark.asyncio
+async def test_collect_in_other_room_not_blocked(world):
+    """A held room lock only blocks commands in that room."""
+    bob = await world.allocate_player("bob")
+    lina = await world.allocate_player("lina")
+    async with world.room_locks.acquire(bob.room_id):
+        info = await asyncio.wait_for(world.collect_coins(lina.player_id), timeout=0.1)
+    assert info == {"collected": 5, "playerCoins": 5}
+
+
+@pytest.mark.asyncio
+async def test_player_released_while_waiting_for_room_lock(world):
+    bob = await world.allocate_player("bob")
+    async with world.room_locks.acquire(bob.room_id):
+        waiting = asyncio.ensure_future(world.collect_coins(bob.player_id))
+        await asyncio.sleep(0)
+        del world.state.players[bob.player_id]
+    with pytest.raises(ValueError):
+        await waiting
+    assert world.state.rooms_state[bob.room_id].coins == 3
+
+
+@pytest.mark.asyncio
+async def test_move_player_updates_both_rooms(world):
+    bob = await world.allocate_player("bob")
+    room_info = await world.move_player(bob.player_id, "east")
+    assert room_info["roomId"] == "room_1"
+    assert bob.player_id in world.state.rooms_state["room_1"].players
+    assert bob.player_id not in world.state.rooms_state["room_0"].players
+
+
+@pytest.mark.asyncio
+async def test_move_player_invalid_direction_raises(world):
+    bob = await world.allocate_player("bob")
+    with pytest.raises(ValueError, match="cannot go that way"):
+        await world.move_player(bob.player_id, "west")
+
+
+# Room Description Cache Tests
+
+@pytest.mark.asyncio
+async def test_repeated_look_hits_description_cache(world):
+    bob = await world.allocate_player("bob")
+    first = await world.describe_room_for_player(bob.player_id)
+    misses = world.descriptions.misses
+    second = await world.describe_room_for_player(bob.player_id)
+    assert second["description"] == first["description"]
+    assert world.descriptions.misses == misses
+    assert world.descriptions.hits >= 1
+
+
+@pytest.mark.asyncio
+async def test_description_cache_invalidated_by_room_changes(world):
+    bob = await world.allocate_player("bob")
+    before = await world.describe_room_for_player(bob.player_id)
+    assert "You see 3 gold coin(s)." in before["description"]
+
+    await world.collect_coins(bob.player_id)
+    after = await world.describe_room_for_player(bob.player_id)
+    assert "You see no coins here." in after["description"]
+
+    lina = await world.allocate_player("lina")
+    await world.move_player(lina.player_id, "west")
+    crowded = await world.describe_room_for_player(bob.player_id)
+    assert "Lina the Quiet lurks." in crowded["description"]
+    assert "Bob the Brave" not in crowded["description"]
+
+
+# Minimap Tests
+
+def _minimap_rows(rows):
+    return "\n".join(row.ljust(15) for row in rows)
+
+
+@pytest.mark.asyncio
+async def test_minimap_marks_occupied_neighbours(world):
+    bob = await world.allocate_player("bob")
+    await world.allocate_player("lina")
+    info = await world.describe_room_for_player(bob.player_id)
+    expected = [""] * 15
+    expected[6] = "      **  PP"
+    expected[7] = "      ** -PP"
+    expected[9] = "       |"
+    expected[10] = "      .."
+    expected[11] = "      .."
+    assert info["minimap"] == _minimap_rows(expected)
+
+
+@pytest.mark.asyncio
+async def test_minimap_reuses_rendered_map_until_occupancy_changes(world):
+    bob = await world.allocate_player("bob")
+    first = world._build_minimap_for_player(bob.player_id)
+    assert world._build_minimap_for_player(bob.player_id) == first
+    assert world.minimap.misses == 1
+    assert world.minimap.hits == 1
+
+    await world.allocate_player("lina")
+    crowded = world._build_minimap_for_player(bob.player_id)
+    assert crowded != first
+    assert world.minimap.misses == 2
+
+
+def test_minimap_layouts_are_lru_bounded(world):
+    renderer = MinimapRenderer(max_layouts=2)
+    rooms = world.state.config.rooms
+    for room_id in ("room_0", "room_1", "room_0", "room_2"):
+        renderer.layout(rooms[room_id], world.state.rooms_state)
+    # room_1 was the least recently used when room_2 came in.
+    assert list(renderer._layouts) == ["room_0", "room_2"]
+
+
+# Ghost Tests
+
+@pytest.mark.asyncio
+async def test_ghost_moves_are_indexed_by_room(world):
+    assert world.state.rooms_state["room_1"].ghosts == {"ghost_0"}
+    await world.move_ghosts_and_collect_events()
+    # room_1 has a single exit, west to room_0.
+    assert world.state.ghosts["ghost_0"].room_id == "room_0"
+    assert world.state.rooms_state["room_0"].ghosts == {"ghost_0"}
+    assert not world.state.rooms_state["room_1"].ghosts
+
+
+@pytest.mark.asyncio
+async def test_ghost_encounters_only_reach_players_in_its_room(world):
+    bob = await world.allocate_player("bob")
+    lina = await world.allocate_player("lina")
+    events = await world.move_ghosts_and_collect_events()
+    assert list(events) == [bob.player_id]
+    assert events[bob.player_id][0].startswith("A ghost passes through the room:")
+    assert lina.player_id not in events
+
+
+@pytest.mark.asyncio
+async def test_vectorized_npcs_match_room_walk(world_data_dir):
+    pytest.importorskip("numpy")
+    world = WorldEngine(
+        WorldLoader(world_data_dir),
+        WorldRepository(world_data_dir / "savegame.json"),
+        vectorized_npcs=True,
+    )
+    bob = await world.allocate_player("bob")
+    events = await world.move_ghosts_and_collect_events()
+    assert world.state.ghosts["ghost_0"].room_id == "room_0"
+    assert list(events) == [bob.player_id]
+    # The move is saved with the next delta rather than on its own.
+    await world.collect_coins(bob.player_id)
+    journal = (world_data_dir / "savegame.journal").read_text().splitlines()
+    assert json.loads(journal[-1])["ghosts"] == {"ghost_0": {"roomId": "room_0"}}
+
+
+@pytest.mark.asyncio
+async def test_ghost_ticks_alone_write_nothing(world, world_data_dir):
+    journal = world_data_dir / "savegame.journal"
+    journal_before = journal.read_text() if journal.exists() else ""
+    for _ in range(3):
+        await world.move_ghosts_and_collect_events()
+        async with world.lock:
+            world.autosave_unlocked()
+    assert (journal.read_text() if journal.exists() else "") == journal_before
+    assert not (world_data_dir / "savegame.json").exists()
+
+    async with world.lock:
+        world.persist_moved_ghosts_unlocked()
+    saved = json.loads(journal.read_text().splitlines()[-1])
+    assert saved["ghosts"] == {"ghost_0": {"roomId": "room_0"}}
+
+
+def test_vectorized_npcs_build_from_exit_table_without_paging(world_data_dir):
+    pytest.importorskip("numpy")
+    config, _, ghosts = WorldLoader(world_data_dir, paged=True, page_size=1).load()
+    npcs = VectorizedNpcEngine(config.rooms, ghosts, exits=config.exits)
+    assert config.rooms.loaded_pages == 0
+    assert npcs.indptr.tolist() == [0, 2, 3, 4]
+    assert npcs.indices.tolist() == [1, 2, 0, 0]
+    assert npcs.encounters(["room_1"]) == [("ghost_0", "room_1")]
+
+
+# Coin Respawn Tests
+
+@pytest.mark.asyncio
+async def test_emptied_room_refills_after_its_delay(world):
+    lina = await world.allocate_player("lina")
+    await world.collect_coins(lina.player_id)
+    assert world.respawn.pending == 1
+    now = world.respawn.clock()
+
+    assert world.respawn_coins_unlocked(now=now + 1) == []
+    assert world.state.rooms_state["room_1"].coins == 0
+
+    assert world.respawn_coins_unlocked(now=now + 31) == ["room_1"]
+    assert world.state.rooms_state["room_1"].coins == 5
+    assert world.respawn.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_respawn_waits_for_a_room_held_by_a_command(world):
+    lina = await world.allocate_player("lina")
+    await world.collect_coins(lina.player_id)
+    later = world.respawn.clock() + 31
+
+    async with world.lock_player_room(lina.player_id):
+        assert world.respawn_coins_unlocked(now=later) == []
+        assert world.state.rooms_state["room_1"].coins == 0
+    assert world.respawn_coins_unlocked(now=later) == ["room_1"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("vectorized", [False, True])
+async def test_ghosts_stay_out_of_rooms_held_by_a_command(world_data_dir, vectorized):
+    if vectorized:
+        pytest.importorskip("numpy")
+    world = WorldEngine(
+        WorldLoader(world_data_dir),
+        WorldRepository(world_data_dir / "savegame.json"),
+        vectorized_npcs=vectorized,
+    )
+    async with world.room_locks.acquire("room_0"):
+        async with world.lock:
+            world.move_ghosts_unlocked()
+    # ghost_0's only exit from room_1 leads into the held room_0.
+    assert world.state.ghosts["ghost_0"].room_id == "room_1"
+    async with world.lock:
+        world.move_ghosts_unlocked()
+    assert world.state.ghosts["ghost_0"].room_id == "room_0"
+
+
+@pytest.mark.asyncio
+async def test_rooms_without_respawn_are_never_scheduled(world):
+    bob = await world.allocate_player("bob")
+    await world.collect_coins(bob.player_id)
+    assert world.respawn.pending == 0
+    assert world.respawn_coins_unlocked(now=world.respawn.clock() + 3600) == []
+    assert list(world.respawn.room_ids) == ["room_1"]
+
+
+# Batched Commands
+
+@pytest.mark.asyncio
+async def test_batch_runs_in_order_under_one_lock(world):
+    """A batch walks, fails and collects in order with a single acquisition."""
+    from server.commands.base import CommandInput
+    from server.commands.router import CommandRouter
+    from server.services.connection_manager import ConnectionManager
+
+    router = CommandRouter(world, ConnectionManager())
+    player = await world.allocate_player("bob")
+    before = world.room_locks.acquisitions
+
+    batch = await router.dispatch_batch(
+        player.player_id,
+        [
+            CommandInput(action="go", args=["east"]),
+            CommandInput(action="go", args=["up"]),
+            CommandInput(action="collect"),
+            CommandInput(action="go", args=["west"]),
+        ],
+    )
+
+    assert world.room_locks.acquisitions == before + 1
+    assert [r.replies[0].type for r in batch.results] == [
+        "roomState", "error", "event", "roomState",
+    ]
+    assert player.room_id == "room_0" and player.coins == 5
+    # Events stay in the room they happened in.
+    assert batch.results[2].broadcasts[0].room_id == "room_1"
+    assert batch.room["roomId"] == "room_0"
+    assert batch.inventory["coins"] == 5
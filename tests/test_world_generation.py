@@ -0,0 +1,67 @@
+import io
+import json
+import random
+from collections import Counter
+
+from server.generate_world import generate_world_definition, write_world
+from server.world.graph import UnionFind, build_random_graph, is_connected
+
+
+def jungeon_degrees(room_count):
+    num_two = int(room_count * 0.8)
+    num_one = int(room_count * 0.1)
+    return [2] * num_two + [1] * num_one + [3] * (room_count - num_two - num_one)
+
+
+def test_random_graph_is_simple_connected_and_keeps_degrees():
+    degrees = jungeon_degrees(5000)
+    edges = build_random_graph(5000, degrees, random.Random(3))
+
+    assert all(u < v for u, v in edges)
+    assert len(set(edges)) == len(edges)
+    assert is_connected(5000, edges)
+    counts = Counter()
+    for u, v in edges:
+        counts[u] += 1
+        counts[v] += 1
+    mismatched = sum(1 for node, degree in enumerate(degrees) if counts[node] != degree)
+    assert mismatched <= 10
+
+
+def test_random_graph_is_deterministic_for_a_seed():
+    degrees = jungeon_degrees(500)
+    first = build_random_graph(500, degrees, random.Random(42))
+    second = build_random_graph(500, degrees, random.Random(42))
+    assert first == second
+
+
+def test_random_graph_connects_rooms_with_too_few_doors():
+    edges = build_random_graph(50, [1] * 50, random.Random(0))
+    assert is_connected(50, edges)
+
+
+def test_union_find_counts_components():
+    sets = UnionFind(4)
+    assert sets.union(0, 1)
+    assert not sets.union(1, 0)
+    sets.union(2, 3)
+    assert sets.components == 2
+    assert sets.find(3) == sets.find(2) != sets.find(0)
+
+
+def test_world_file_is_identical_for_any_worker_count():
+    single, pooled = io.StringIO(), io.StringIO()
+    write_world(single, 300, seed=11, workers=1, region_size=64)
+    write_world(pooled, 300, seed=11, workers=2, region_size=64)
+
+    assert single.getvalue() == pooled.getvalue()
+    assert json.loads(single.getvalue()) == generate_world_definition(
+        300, seed=11, region_size=64
+    )
+
+
+def test_different_seeds_give_different_worlds():
+    first = generate_world_definition(100, seed=1)
+    second = generate_world_definition(100, seed=2)
+    assert first["rooms"] != second["rooms"]
+    assert len(first["rooms"]) == len(second["rooms"]) == 100
@@ -0,0 +1,125 @@
+import json
+
+import pytest
+
+from server.world import WorldEngine, WorldLoader, WorldRepository
+from server.world.paging import PagedRoomStore
+
+
+def test_second_load_comes_from_cache(world_data_dir):
+    first = WorldLoader(world_data_dir)
+    config, rooms_state, ghosts = first.load()
+    assert not first.loaded_from_cache
+    assert first.cache_file.exists()
+
+    second = WorldLoader(world_data_dir)
+    cached_config, cached_rooms, cached_ghosts = second.load()
+    assert second.loaded_from_cache
+    assert cached_config == config
+    assert cached_rooms == rooms_state
+    assert cached_ghosts == ghosts
+
+
+def test_editing_a_source_file_rebuilds_the_cache(world_data_dir):
+    WorldLoader(world_data_dir).load()
+    world_file = world_data_dir / "world.json"
+    world = json.loads(world_file.read_text())
+    world["rooms"][0]["name"] = "Great Hall"
+    world_file.write_text(json.dumps(world))
+
+    loader = WorldLoader(world_data_dir)
+    config, _, _ = loader.load()
+    assert not loader.loaded_from_cache
+    assert config.rooms["room_0"].name == "Great Hall"
+
+
+def test_corrupt_cache_is_ignored(world_data_dir):
+    loader = WorldLoader(world_data_dir)
+    loader.load()
+    loader.cache_file.write_bytes(b"not a pickle")
+
+    config, _, _ = loader.load()
+    assert not loader.loaded_from_cache
+    assert "room_1" in config.rooms
+
+
+def test_paged_store_keeps_pages_of_rooms_in_use(world_data_dir):
+    loader = WorldLoader(world_data_dir, paged=True, page_size=1, max_pages=1)
+    config, _, _ = loader.load()
+    rooms = config.rooms
+    assert isinstance(rooms, PagedRoomStore)
+    assert loader.pages_file.exists()
+    assert len(rooms) == 3 and "room_2" in rooms
+    assert rooms.loaded_pages == 0
+
+    rooms.set_pinned("room_0", True)
+    assert [rooms[f"room_{n}"].name for n in range(3)] == ["Hall", "Cellar", "Vault"]
+    assert rooms.loaded_pages == 2
+    assert rooms.evictions == 1
+    assert rooms["room_0"].name == "Hall"
+    assert rooms.page_loads == 3
+
+    rooms.set_pinned("room_0", False)
+    rooms["room_1"]
+    assert rooms.loaded_pages == 1
+
+
+def test_paged_world_is_served_from_cache(world_data_dir):
+    WorldLoader(world_data_dir, paged=True).load()
+    loader = WorldLoader(world_data_dir, paged=True, max_pages=4)
+    config, _, _ = loader.load()
+    assert loader.loaded_from_cache
+    assert config.rooms.max_pages == 4
+    assert config.rooms["room_1"].exits["west"].target_room_id == "room_0"
+
+    unpaged = WorldLoader(world_data_dir)
+    config, _, _ = unpaged.load()
+    assert not unpaged.loaded_from_cache
+    assert isinstance(config.rooms, dict)
+
+
+@pytest.mark.asyncio
+async def test_engine_runs_on_a_paged_world(world_data_dir):
+    world = WorldEngine(
+        WorldLoader(world_data_dir, paged=True, page_size=1, max_pages=1),
+        WorldRepository(world_data_dir / "savegame.json"),
+    )
+    bob = await world.allocate_player("bob")
+    room_info = await world.move_player(bob.player_id, "east")
+    assert room_info["roomId"] == "room_1"
+    assert await world.collect_coins(bob.player_id) == {"collected": 5, "playerCoins": 5}
+    assert world._room_in_use("room_1")
+    assert not world._room_in_use("room_2")
+    assert world._paged_rooms._pinned == {1: {"room_1"}}
+    now = world.respawn.clock()
+    assert world.respawn_coins_unlocked(now=now + 31) == ["room_1"]
+
+
+def test_exits_are_stored_in_one_table(world_data_dir):
+    config, rooms_state, _ = WorldLoader(world_data_dir, use_cache=False).load()
+    table = config.exits
+    hall = config.rooms["room_0"]
+    assert hall.exits.table is table
+    assert dict(hall.exits) == {
+        "east": hall.exits["east"],
+        "south": hall.exits["south"],
+    }
+    assert table.room_ids[hall.exits["east"].target] == "room_1"
+
+    hall.exits["east"].locked = True
+    assert table.locked[hall.exits["east"].slot] == 1
+    assert config.rooms["room_0"].exits["east"].locked
+
+    # Identical templates are shared rather than copied per room.
+    assert config.rooms["room_1"].appearance is config.rooms["room_2"].appearance
+    assert rooms_state["room_2"].players is rooms_state["room_1"].players
+
+
+def test_exit_to_unknown_room_is_rejected(world_data_dir):
+    world_file = world_data_dir / "world.json"
+    world = json.loads(world_file.read_text())
+    world["rooms"][2]["exits"]["down"] = "room_9"
+    world_file.write_text(json.dumps(world))
+
+    with pytest.raises(ValueError, match="unknown room 'room_9'"):
+        WorldLoader(world_data_dir).load()
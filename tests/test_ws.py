@@ -0,0 +1,78 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from server.api.ws import create_websocket_endpoint
+from server.services.codec import TYPE_TAGS, pack, unpack
+from server.services.connection_manager import ConnectionManager
+from server.services.game_service import GameService
+from server.services.presence import PresenceService
+from server.sessions import SessionManager
+from server.world import WorldEngine, WorldLoader, WorldRepository
+
+
+@pytest.fixture
+def game(world_data_dir):
+    world = WorldEngine(
+        WorldLoader(world_data_dir), WorldRepository(world_data_dir / "savegame.json")
+    )
+    return GameService(world, SessionManager())
+
+
+@pytest.fixture
+def client(game):
+    connections = ConnectionManager()
+    presence = PresenceService(connections, debounce=None)
+    app = FastAPI()
+    app.websocket("/ws")(
+        create_websocket_endpoint(game, game.world, connections, presence)
+    )
+    with TestClient(app) as client:
+        yield client
+
+
+def login(client, game, character_id="bob"):
+    session_id, player = client.portal.call(game.login, character_id)
+    return session_id, player
+
+
+def test_malformed_message_gets_an_error_and_session_still_ends(client, game):
+    session_id, player = login(client, game)
+    with client.websocket_connect(f"/ws?sessionId={session_id}") as ws:
+        for _ in range(3):
+            ws.receive_json()
+        ws.send_json({"type": "batch", "commands": [{"input": "look"}]})
+        assert ws.receive_json() == {
+            "type": "error",
+            "data": {"message": "Malformed message."},
+        }
+        ws.send_json({"type": "command", "input": "look"})
+        assert ws.receive_json()["type"] == "roomState"
+
+    assert game.get_session(session_id) is None
+    assert player.player_id not in game.world.state.players
+
+
+@pytest.mark.parametrize(
+    "bad_frame", [b"\xc1\x00", bytes([0x92, 9, 0x81, 0x91, 1, 1]), "not binary"]
+)
+def test_bad_frame_on_msgpack_socket_gets_an_error(client, game, bad_frame):
+    session_id, player = login(client, game)
+    with client.websocket_connect(
+        f"/ws?sessionId={session_id}", subprotocols=["jungeon.msgpack"]
+    ) as ws:
+        for _ in range(3):
+            ws.receive_bytes()
+        if isinstance(bad_frame, bytes):
+            ws.send_bytes(bad_frame)
+        else:
+            ws.send_text(bad_frame)
+        assert unpack(ws.receive_bytes()) == [
+            TYPE_TAGS["error"],
+            {"message": "Malformed message."},
+        ]
+        ws.send_bytes(pack([TYPE_TAGS["command"], {"input": "look"}]))
+        assert unpack(ws.receive_bytes())[0] == TYPE_TAGS["roomState"]
+
+    assert game.get_session(session_id) is None
+    assert player.player_id not in game.world.state.players